@@ -11,6 +11,11 @@
 .. module:: AIEngineer
 """
 
+import importlib.metadata
+import importlib.util
+from pathlib import Path
+from typing import Optional
+
 import FreeCAD
 import FreeCADGui
 
@@ -19,23 +24,61 @@ FreeCAD.Console.PrintMessage('\n' + '=' * 60 + '\n')
 FreeCAD.Console.PrintMessage('[AIEngineer] Checking dependencies...\n')
 FreeCAD.Console.PrintMessage('=' * 60 + '\n')
 
+# Пакеты только ищутся, но не импортируются: импорт grpc, protobuf и
+# google.generativeai занимает сотни миллисекунд при каждом запуске FreeCAD,
+# а нужен лишь при первом обращении к Gemini
+
+
+def _find_package(name: str) -> Optional[Path]:
+    """
+    Функция находит каталог установленного пакета без его импорта.
+
+    Args:
+        name (str): Полное имя пакета (например, 'google.protobuf').
+
+    Returns:
+        Optional[Path]: Каталог пакета или None, если пакет не установлен.
+    """
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        # Не установлен родительский пакет (например, google)
+        return None
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return Path(next(iter(spec.submodule_search_locations)))
+
+
+def _dist_version(dist_name: str) -> str:
+    """
+    Функция возвращает версию установленного дистрибутива.
+
+    Args:
+        dist_name (str): Имя дистрибутива pip (например, 'grpcio').
+
+    Returns:
+        str: Версия или '?' если метаданные недоступны.
+    """
+    try:
+        return importlib.metadata.version(dist_name)
+    except importlib.metadata.PackageNotFoundError:
+        return '?'
+
+
 # Проверка gRPC
 has_grpc: bool = False
 try:
-    import grpc
-    try:
-        from grpc._cython import cygrpc
-        FreeCAD.Console.PrintMessage(f'[AIEngineer] ✓ gRPC v{grpc.__version__}\n')
+    grpc_dir: Optional[Path] = _find_package('grpc')
+    if grpc_dir is None:
+        FreeCAD.Console.PrintWarning('[AIEngineer] ✗ gRPC not found\n')
+    elif any((grpc_dir / '_cython').glob('cygrpc*')):
+        FreeCAD.Console.PrintMessage(f'[AIEngineer] ✓ gRPC v{_dist_version("grpcio")}\n')
         has_grpc = True
-    except ImportError:
+    else:
         FreeCAD.Console.PrintWarning(
             '[AIEngineer] ✗ gRPC cygrpc module not found\n'
             '[AIEngineer]   Trying to continue anyway...\n'
         )
-        has_grpc = False
-except ImportError:
-    FreeCAD.Console.PrintWarning('[AIEngineer] ✗ gRPC not found\n')
-    has_grpc = False
 except Exception as ex:
     FreeCAD.Console.PrintError(f'[AIEngineer] ✗ gRPC error: {ex}\n')
     has_grpc = False
@@ -43,12 +86,11 @@ except Exception as ex:
 # Проверка Protobuf
 has_protobuf: bool = False
 try:
-    import google.protobuf
-    FreeCAD.Console.PrintMessage('[AIEngineer] ✓ Protocol Buffers\n')
-    has_protobuf = True
-except ImportError:
-    FreeCAD.Console.PrintWarning('[AIEngineer] ✗ Protocol Buffers not found\n')
-    has_protobuf = False
+    if _find_package('google.protobuf') is not None:
+        FreeCAD.Console.PrintMessage('[AIEngineer] ✓ Protocol Buffers\n')
+        has_protobuf = True
+    else:
+        FreeCAD.Console.PrintWarning('[AIEngineer] ✗ Protocol Buffers not found\n')
 except Exception as ex:
     FreeCAD.Console.PrintError(f'[AIEngineer] ✗ Protobuf error: {ex}\n')
     has_protobuf = False
@@ -56,12 +98,11 @@ except Exception as ex:
 # Проверка Google Generative AI
 has_genai: bool = False
 try:
-    import google.generativeai
-    FreeCAD.Console.PrintMessage('[AIEngineer] ✓ Google Generative AI\n')
-    has_genai = True
-except ImportError:
-    FreeCAD.Console.PrintWarning('[AIEngineer] ✗ Google Generative AI not found\n')
-    has_genai = False
+    if _find_package('google.generativeai') is not None:
+        FreeCAD.Console.PrintMessage('[AIEngineer] ✓ Google Generative AI\n')
+        has_genai = True
+    else:
+        FreeCAD.Console.PrintWarning('[AIEngineer] ✗ Google Generative AI not found\n')
 except Exception as ex:
     FreeCAD.Console.PrintError(f'[AIEngineer] ✗ Generative AI error: {ex}\n')
     has_genai = False
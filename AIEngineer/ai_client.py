@@ -24,6 +24,15 @@ from pathlib import Path
 from typing import Optional, Dict, Any
 import FreeCAD
 
+# Форматы изображений, принимаемые OpenAI, и их MIME-типы
+OPENAI_IMAGE_MIME_TYPES: Dict[str, str] = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+
 
 # === ЛОГГЕР ДЛЯ FREECAD ===
 def log_info(msg: str) -> None:
@@ -147,9 +156,9 @@ class OpenAIClient:
 
         messages = [{'role': 'user', 'content': [{'type': 'text', 'text': prompt}]}]
         
-        if image_path and Path(image_path).suffix.lower() in {'.png', '.jpg', '.jpeg'}:
+        mime_type: Optional[str] = OPENAI_IMAGE_MIME_TYPES.get(Path(image_path).suffix.lower()) if image_path else None
+        if mime_type:
             b64_img = self.encode_image(image_path)
-            mime_type = 'image/jpeg' if Path(image_path).suffix.lower() in ['.jpg', '.jpeg'] else 'image/png'
             messages[0]['content'].append({
                 'type': 'image_url',
                 'image_url': {'url': f'data:{mime_type};base64,{b64_img}'}
@@ -0,0 +1,68 @@
+## \file AIEngineer/async_loop.py
+# -*- coding: utf-8 -*-
+"""
+Фоновый цикл asyncio для сетевых вызовов AIEngineer.
+=====================================================
+
+FreeCAD владеет основным циклом событий Qt, поэтому корутины
+(запросы к Gemini, сохранение истории) выполняются в одном
+долгоживущем цикле asyncio в отдельном потоке. Интерфейс получает
+результаты через сигналы Qt и не блокируется на время запроса.
+
+.. module:: AIEngineer.async_loop
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock: threading.Lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Функция возвращает общий фоновый цикл asyncio, запуская его при первом вызове.
+
+    Returns:
+        asyncio.AbstractEventLoop: Работающий цикл событий.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever,
+                name='AIEngineerAsyncLoop',
+                daemon=True,
+            )
+            thread.start()
+    return _loop
+
+
+def submit(coro: Coroutine[Any, Any, Any]) -> Future:
+    """
+    Функция планирует корутину в фоновом цикле.
+
+    Args:
+        coro (Coroutine): Корутина для выполнения.
+
+    Returns:
+        concurrent.futures.Future: Future с результатом корутины.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run_in_thread(func: Callable[..., Any], *args: Any) -> Future:
+    """
+    Функция выполняет блокирующую функцию в пуле потоков фонового цикла.
+
+    Args:
+        func (Callable): Блокирующая функция (чтение файла и т.п.).
+        *args: Аргументы функции.
+
+    Returns:
+        concurrent.futures.Future: Future с результатом функции.
+    """
+    return submit(asyncio.to_thread(func, *args))
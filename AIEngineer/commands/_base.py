@@ -0,0 +1,95 @@
+## \file AIEngineer/commands/_base.py
+# -*- coding: utf-8 -*-
+"""
+Базовый класс команд рабочей среды AI Engineer.
+================================================
+
+Содержит общую реализацию GetResources/IsActive, ленивое открытие
+диалогов и единый вывод ошибок для всех команд.
+
+.. module:: AIEngineer.commands._base
+"""
+
+import importlib
+from typing import Optional
+
+import FreeCAD
+from PySide import QtGui
+
+from ..utils import get_icon
+
+
+class CommandBase:
+    """
+    Базовая команда FreeCAD.
+
+    Атрибуты класса:
+        MENU (str): Текст пункта меню.
+        TOOLTIP (str): Всплывающая подсказка.
+        ICON (str): Имя файла иконки в Resources/icons.
+        DIALOG_CLASS_PATH (Optional[str]): Путь к классу диалога относительно
+            пакета команд, например '..dialogs.chat_dialog.ChatDialog'.
+        ERROR_TITLE (str): Заголовок окна ошибки.
+        ERROR_TEXT (str): Текст ошибки (без деталей исключения).
+    """
+
+    MENU: str = ''
+    TOOLTIP: str = ''
+    ICON: str = ''
+    DIALOG_CLASS_PATH: Optional[str] = None
+    ERROR_TITLE: str = 'Error'
+    ERROR_TEXT: str = 'Command failed'
+
+    def GetResources(self) -> dict:
+        """
+        Функция возвращает ресурсы команды (иконка, текст меню, подсказка).
+
+        Returns:
+            dict: Словарь с ресурсами команды.
+        """
+        return {
+            'MenuText': self.MENU,
+            'ToolTip': self.TOOLTIP,
+            'Pixmap': get_icon(self.ICON)
+        }
+
+    def Activated(self) -> None:
+        """Функция открывает диалог команды при активации."""
+        self._open_dialog()
+
+    def IsActive(self) -> bool:
+        """
+        Функция проверяет, активна ли команда.
+
+        Returns:
+            bool: True (по умолчанию команда всегда активна).
+        """
+        return True
+
+    def _open_dialog(self, *args) -> None:
+        """
+        Функция импортирует класс диалога по DIALOG_CLASS_PATH и открывает его.
+
+        Args:
+            *args: Аргументы конструктора диалога.
+        """
+        try:
+            mod_name, cls_name = self.DIALOG_CLASS_PATH.rsplit('.', 1)
+            module = importlib.import_module(mod_name, package=__package__)
+            getattr(module, cls_name)(*args).exec_()
+        except Exception as ex:
+            self._show_error(ex)
+
+    def _show_error(self, ex: Exception) -> None:
+        """
+        Функция выводит ошибку в консоль FreeCAD и в окне сообщения.
+
+        Args:
+            ex (Exception): Перехваченное исключение.
+        """
+        FreeCAD.Console.PrintError(f'[AIEngineer] {self.ERROR_TEXT}: {ex}\n')
+        QtGui.QMessageBox.critical(
+            None,
+            self.ERROR_TITLE,
+            f'{self.ERROR_TEXT}:\n{str(ex)}'
+        )
@@ -1,33 +1,18 @@
-## \file AIEngineer/project_manager.py
+## \file AIEngineer/commands/ai_settings.py
 # -*- coding: utf-8 -*-
 """
 Команда открытия настроек ИИ-провайдера (Google Gemini).
 """
 
-from PySide import QtGui
-from ..utils import get_icon
+from ._base import CommandBase
 
-class AISettingsCommand:
-    """Команда открытия диалога настроек API-ключа и параметров ИИ."""
-
-    def GetResources(self):
-        return {
-            "MenuText": "AI Settings",
-            "ToolTip": "Configure AI provider and API key",
-            "Pixmap": get_icon("ai_settings.svg")
-        }
 
-    def Activated(self):
-        try:
-            from ..settings_dialog import SettingsDialog
-            dialog = SettingsDialog()
-            dialog.exec_()
-        except Exception as ex:
-            QtGui.QMessageBox.critical(
-                None,
-                "Settings Error",
-                f"Failed to open settings dialog:\n{str(ex)}"
-            )
+class AISettingsCommand(CommandBase):
+    """Команда открытия диалога настроек API-ключа и параметров ИИ."""
 
-    def IsActive(self):
-        return True
\ No newline at end of file
+    MENU = 'AI Settings'
+    TOOLTIP = 'Configure AI provider and API key'
+    ICON = 'ai_settings.svg'
+    DIALOG_CLASS_PATH = '..settings_dialog.SettingsDialog'
+    ERROR_TITLE = 'Settings Error'
+    ERROR_TEXT = 'Failed to open settings dialog'
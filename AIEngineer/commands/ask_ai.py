@@ -7,32 +7,36 @@
 import FreeCAD
 from PySide import QtGui
 from typing import Optional
-from ..utils import get_icon, AI_DATA_DIR, save_ai_response_to_history, get_api_key
-from ..project_manager import AIProject
+from ._base import CommandBase
+from ..async_loop import submit
+from ..utils import AI_DATA_DIR, IMAGE_MIME_TYPES, save_ai_response_to_history, get_api_key
+from ..project_manager import AIProject, get_project
 
-# Инициализация проекта
-try:
-    project = AIProject()
-except Exception as ex:
-    FreeCAD.Console.PrintError(f'[AIEngineer] Failed to initialize project manager in ask_ai: {ex}\n')
-    project = None
 
+def _project() -> Optional[AIProject]:
+    """
+    Функция возвращает общий проект. project.json читается при первом обращении,
+    а не при импорте модуля во время загрузки верстака.
 
-class AskAICommand:
+    Returns:
+        Optional[AIProject]: Проект или None, если его не удалось загрузить.
+    """
+    try:
+        return get_project()
+    except Exception as ex:
+        FreeCAD.Console.PrintError(f'[AIEngineer] Failed to initialize project manager in ask_ai: {ex}\n')
+        return None
+
+# Диалог ответа создаётся один раз и переиспользуется между вызовами
+_RESPONSE_DIALOG = None
+
+
+class AskAICommand(CommandBase):
     """Команда отправки запроса в Google Gemini с изображением и текстом."""
 
-    def GetResources(self):
-        """
-        Функция возвращает ресурсы команды (иконка, текст меню, подсказка).
-        
-        Returns:
-            dict: Словарь с ресурсами команды.
-        """
-        return {
-            'MenuText': 'Ask AI',
-            'ToolTip': 'Send linked image+text to Google Gemini',
-            'Pixmap': get_icon('ai_chat.svg')
-        }
+    MENU = 'Ask AI'
+    TOOLTIP = 'Send linked image+text to Google Gemini'
+    ICON = 'ai_chat.svg'
 
     def Activated(self):
         """
@@ -42,6 +46,7 @@ class AskAICommand:
             None
         """
         # Проверка наличия связанных данных
+        project: Optional[AIProject] = _project()
         if not project or not project.get_all_links():
             QtGui.QMessageBox.information(
                 None, 'No Data', 'First link an image to a text using "Link Content".'
@@ -89,29 +94,17 @@ class AskAICommand:
             return
 
         FreeCAD.Console.PrintMessage('[AIEngineer] Sending to Google Gemini...\n')
-        response: str = 'Failed to get response.'
 
-        # Отправка запроса в Gemini
         try:
-            from ..gemini import GoogleGenerativeAi
+            from ..gemini import RESOURCE_EXHAUSTED, GoogleGenerativeAi
             
-            # Используем новый интегрированный класс
-            llm = GoogleGenerativeAi(
+            # Общий экземпляр: запрос без истории чата, клиент переиспользуется между вызовами
+            llm = GoogleGenerativeAi.get(
                 api_key=api_key,
                 model_name='gemini-1.5-flash',
                 system_instruction='Вы - технический ассистент для инженеров, работающих с FreeCAD. '
                                    'Анализируйте изображения чертежей и предоставляйте точные технические рекомендации.'
             )
-            
-            # Используем метод describe_image для обработки изображения с промптом
-            gemini_response: Optional[str] = llm.describe_image(
-                image=image_path,
-                mime_type='image/jpeg' if image_path.suffix.lower() in ['.jpg', '.jpeg'] else 'image/png',
-                prompt=prompt
-            )
-            
-            response = gemini_response if gemini_response is not None else 'Gemini returned empty response.'
-            
         except ValueError as ex:
             # Обработка ошибки отсутствия API-ключа
             QtGui.QMessageBox.critical(
@@ -120,26 +113,53 @@ class AskAICommand:
                 f'API key configuration error:\n{str(ex)}\n\nPlease configure API key in AI Settings.'
             )
             return
-            
         except Exception as ex:
-            response = f'Gemini error: {str(ex)}'
-            FreeCAD.Console.PrintError(f'[AIEngineer] Gemini request failed: {ex}\n')
-
-        # Сохранение в историю
-        save_ai_response_to_history(prompt, response)
+            self._show_error(ex)
+            return
 
-        # Отображение результата
+        # Диалог открывается сразу, ответ дописывается в него по мере генерации
+        global _RESPONSE_DIALOG
         try:
-            from ..dialogs.ai_response import AIResponseDialog
-            dialog = AIResponseDialog(prompt, response)
-            dialog.exec_()
+            if _RESPONSE_DIALOG is None:
+                from ..dialogs.ai_response import AIResponseDialog
+                _RESPONSE_DIALOG = AIResponseDialog('', '')
         except Exception as ex:
-            FreeCAD.Console.PrintError(f'[AIEngineer] Failed to show response dialog: {ex}\n')
-            QtGui.QMessageBox.information(
-                None,
-                'AI Response',
-                f'Prompt:\n{prompt[:200]}...\n\nResponse:\n{response[:500]}...'
+            self._show_error(ex)
+            return
+
+        dialog = _RESPONSE_DIALOG
+        stream_id: int = dialog.begin_stream(prompt)
+
+        async def _describe() -> str:
+            gemini_response: Optional[str] = await llm.describe_image_stream(
+                image=image_path,
+                mime_type=IMAGE_MIME_TYPES.get(image_path.suffix.lower(), 'application/octet-stream'),
+                prompt=prompt,
+                on_chunk=lambda piece: dialog.chunk_received.emit(stream_id, piece)
             )
+            return gemini_response if gemini_response is not None else 'Gemini returned empty response.'
+
+        def _done(future) -> None:
+            try:
+                response: str = future.result()
+            except Exception as ex:
+                response = f'Gemini error: {str(ex)}'
+                FreeCAD.Console.PrintError(f'[AIEngineer] Gemini request failed: {ex}\n')
+            if response == RESOURCE_EXHAUSTED:
+                # Маркер исчерпанной квоты не является ответом модели и в историю не попадает
+                response = 'Gemini quota exhausted. Please retry in a minute.'
+                FreeCAD.Console.PrintWarning('[AIEngineer] Gemini quota exhausted\n')
+            else:
+                # Сохранение в историю
+                save_ai_response_to_history(prompt, response)
+            try:
+                dialog.response_finished.emit(stream_id, response)
+            except RuntimeError:
+                # Диалог уже удален
+                pass
+
+        submit(_describe()).add_done_callback(_done)
+        dialog.exec_()
 
     def IsActive(self):
         """
@@ -148,4 +168,5 @@ class AskAICommand:
         Returns:
             bool: True если есть связанные данные, False иначе.
         """
+        project: Optional[AIProject] = _project()
         return project is not None and bool(project.get_all_links())
\ No newline at end of file
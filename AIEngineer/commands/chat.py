@@ -10,51 +10,15 @@
 .. module:: AIEngineer.commands.chat
 """
 
-import FreeCAD
-from PySide import QtGui
-from ..utils import get_icon
+from ._base import CommandBase
 
 
-class ChatCommand:
+class ChatCommand(CommandBase):
     """Команда открытия окна чата с AI."""
 
-    def GetResources(self):
-        """
-        Функция возвращает ресурсы команды (иконка, текст меню, подсказка).
-        
-        Returns:
-            dict: Словарь с ресурсами команды.
-        """
-        return {
-            'MenuText': 'AI Chat',
-            'ToolTip': 'Open interactive chat with Gemini AI',
-            'Pixmap': get_icon('ai_chat.svg')
-        }
-
-    def Activated(self):
-        """
-        Функция выполняет открытие диалога чата при активации команды.
-        
-        Returns:
-            None
-        """
-        try:
-            from ..dialogs.chat_dialog import ChatDialog
-            dialog = ChatDialog()
-            dialog.exec_()
-        except Exception as ex:
-            FreeCAD.Console.PrintError(f'[AIEngineer] Failed to open chat dialog: {ex}\n')
-            QtGui.QMessageBox.critical(
-                None,
-                'Chat Error',
-                f'Failed to open chat dialog:\n{str(ex)}'
-            )
-
-    def IsActive(self):
-        """
-        Функция проверяет, активна ли команда (всегда доступна).
-        
-        Returns:
-            bool: True (команда всегда активна).
-        """
-        return True
\ No newline at end of file
+    MENU = 'AI Chat'
+    TOOLTIP = 'Open interactive chat with Gemini AI'
+    ICON = 'ai_chat.svg'
+    DIALOG_CLASS_PATH = '..dialogs.chat_dialog.ChatDialog'
+    ERROR_TITLE = 'Chat Error'
+    ERROR_TEXT = 'Failed to open chat dialog'
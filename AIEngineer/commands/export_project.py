@@ -6,20 +6,43 @@
 
 import os
 import zipfile
-from pathlib import Path
+from typing import Iterator
 from PySide import QtGui
-from ..utils import get_icon, AI_DATA_DIR
+from ._base import CommandBase
+from ..utils import AI_DATA_DIR
 import FreeCAD
 
-class ExportProjectCommand:
+# Размер буфера записи итогового архива (1 МиБ вместо стандартных 8 КиБ)
+ZIP_WRITE_BUFFER_SIZE: int = 1 << 20
+
+
+def _walk_arc(base: str, root_prefix: str) -> Iterator[tuple[str, str]]:
+    """
+    Функция рекурсивно обходит директорию через os.scandir.
+
+    Args:
+        base (str): Директория для обхода.
+        root_prefix (str): Корень, относительно которого строятся пути в архиве.
+
+    Yields:
+        tuple[str, str]: Полный путь к файлу и путь внутри архива.
+    """
+    with os.scandir(base) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_arc(entry.path, root_prefix)
+            else:
+                yield entry.path, os.path.relpath(entry.path, root_prefix)
+
+
+class ExportProjectCommand(CommandBase):
     """Команда экспорта всех данных проекта (изображения, тексты, ссылки) в ZIP."""
 
-    def GetResources(self):
-        return {
-            "MenuText": "Export Project",
-            "ToolTip": "Export all data as ZIP",
-            "Pixmap": get_icon("export_project.svg")  # рекомендуется добавить иконку
-        }
+    MENU = 'Export Project'
+    TOOLTIP = 'Export all data as ZIP'
+    ICON = 'export_project.svg'
+    ERROR_TITLE = 'Error'
+    ERROR_TEXT = 'Export failed'
 
     def Activated(self):
         zip_path, _ = QtGui.QFileDialog.getSaveFileName(
@@ -31,24 +54,18 @@ class ExportProjectCommand:
             zip_path += ".zip"
 
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                # Архивируем всю папку AI_DATA_DIR (включая подпапки вроде ai_history)
-                root_dir = AI_DATA_DIR.parent  # .../AIEngineer/
-                for root, dirs, files in os.walk(AI_DATA_DIR):
-                    for file in files:
-                        full_path = Path(root) / file
-                        # Сохраняем структуру относительно AIEngineer/
-                        arc_path = full_path.relative_to(root_dir)
-                        zf.write(full_path, arc_path)
+            # Архивируем всю папку AI_DATA_DIR (включая подпапки вроде ai_history)
+            # Структура сохраняется относительно AIEngineer/
+            root_dir = str(AI_DATA_DIR.parent)
+
+            # allowZip64=True (по умолчанию) записывает расширения Zip64 только при необходимости
+            with open(zip_path, 'wb', buffering=ZIP_WRITE_BUFFER_SIZE) as raw, \
+                    zipfile.ZipFile(raw, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for full_path, arc_path in _walk_arc(str(AI_DATA_DIR), root_dir):
+                    zf.write(full_path, arc_path)
             QtGui.QMessageBox.information(
                 None, "Success", f"Project exported to:\n{zip_path}"
             )
             FreeCAD.Console.PrintMessage(f"[AIEngineer] Project exported: {zip_path}\n")
         except Exception as ex:
-            QtGui.QMessageBox.critical(
-                None, "Error", f"Export failed:\n{str(ex)}"
-            )
-            FreeCAD.Console.PrintError(f"[AIEngineer] Export error: {ex}\n")
-
-    def IsActive(self):
-        return True
\ No newline at end of file
+            self._show_error(ex)
\ No newline at end of file
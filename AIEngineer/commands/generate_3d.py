@@ -4,19 +4,24 @@
 Команда генерации 3D-объекта на основе текстового описания (в будущем — через ИИ).
 """
 
+import re
+
 import FreeCAD
 from PySide import QtGui
-from ..utils import get_icon
+from ._base import CommandBase
+
+# Числа в описании (целые и с плавающей точкой)
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+
 
-class Generate3DCommand:
+class Generate3DCommand(CommandBase):
     """Команда создания 3D-объекта по текстовому описанию."""
 
-    def GetResources(self):
-        return {
-            "MenuText": "Generate 3D from AI",
-            "ToolTip": "Create 3D object based on AI description",
-            "Pixmap": get_icon("generate_3d.svg")  # рекомендуется добавить иконку
-        }
+    MENU = 'Generate 3D from AI'
+    TOOLTIP = 'Create 3D object based on AI description'
+    ICON = 'generate_3d.svg'
+    ERROR_TITLE = 'Error'
+    ERROR_TEXT = '3D generation failed'
 
     def Activated(self):
         text, ok = QtGui.QInputDialog.getMultiLineText(
@@ -31,9 +36,7 @@ class Generate3DCommand:
 
             # Простой парсинг для "box"
             if "box" in description or "короб" in description or "параллелепипед" in description:
-                import re
-                # Ищем все числа (целые и с плавающей точкой)
-                nums = list(map(float, re.findall(r'\d+\.?\d*', text)))
+                nums = list(map(float, _NUMBER_RE.findall(text)))
                 if len(nums) >= 3:
                     l, w, h = nums[0], nums[1], nums[2]
                     box = doc.addObject("Part::Box", "AI_Box")
@@ -58,10 +61,4 @@ class Generate3DCommand:
                 None, "Input Error", f"Invalid number format:\n{str(ex)}"
             )
         except Exception as ex:
-            QtGui.QMessageBox.critical(
-                None, "Error", f"3D generation failed:\n{str(ex)}"
-            )
-            FreeCAD.Console.PrintError(f"[AIEngineer] 3D generation error: {ex}\n")
-
-    def IsActive(self):
-        return True
\ No newline at end of file
+            self._show_error(ex)
\ No newline at end of file
@@ -4,47 +4,40 @@
 Команда связывания изображения с текстовым описанием.
 """
 
-import AIEngineer
-
-
 import FreeCAD
 from PySide import QtGui
-from ..utils import get_icon
-from ..project_manager import AIProject
+from typing import Optional
+from ._base import CommandBase
+from ..project_manager import AIProject, get_project
+
+
+def _project() -> Optional[AIProject]:
+    """Функция возвращает общий проект, загружая project.json при первом обращении."""
+    try:
+        return get_project()
+    except Exception as ex:
+        FreeCAD.Console.PrintError(f"[AIEngineer] Project manager init failed in link_content: {ex}\n")
+        return None
 
-# Инициализация менеджера проекта
-try:
-    project = AIProject()
-except Exception as ex:
-    FreeCAD.Console.PrintError(f"[AIEngineer] Project manager init failed in link_content: {ex}\n")
-    project = None
 
-class LinkContentCommand:
+class LinkContentCommand(CommandBase):
     """Команда открытия диалога для связывания изображения и текстового файла."""
 
-    def GetResources(self):
-        return {
-            "MenuText": "Link Content",
-            "ToolTip": "Link image to text description",
-            "Pixmap": get_icon("link_content.svg")
-        }
+    MENU = 'Link Content'
+    TOOLTIP = 'Link image to text description'
+    ICON = 'link_content.svg'
+    DIALOG_CLASS_PATH = '..dialogs.link_content_dialog.LinkContentDialog'
+    ERROR_TITLE = 'Dialog Error'
+    ERROR_TEXT = 'Failed to open link dialog'
 
     def Activated(self):
-        if project is None:
+        if _project() is None:
             QtGui.QMessageBox.critical(
                 None, "Error", "Project manager not available."
             )
             return
-
-        try:
-            from ..dialogs.link_content_dialog import LinkContentDialog
-            dialog = LinkContentDialog()
-            dialog.exec_()
-        except Exception as ex:
-            QtGui.QMessageBox.critical(
-                None, "Dialog Error", f"Failed to open link dialog:\n{str(ex)}"
-            )
+        self._open_dialog()
 
     def IsActive(self):
         """Команда активна, только если менеджер проектов доступен."""
-        return project is not None
\ No newline at end of file
+        return _project() is not None
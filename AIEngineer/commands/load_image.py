@@ -6,20 +6,20 @@
 
 import os
 import shutil
-from pathlib import Path
 import FreeCAD
 from PySide import QtGui
-from ..utils import get_icon, AI_DATA_DIR
+from ._base import CommandBase
+from ..utils import AI_DATA_DIR
 
-class LoadImageCommand:
+
+class LoadImageCommand(CommandBase):
     """Команда загрузки одного или нескольких изображений в рабочую папку AIEngineer."""
 
-    def GetResources(self):
-        return {
-            "MenuText": "Load Image",
-            "ToolTip": "Load image into AI workspace",
-            "Pixmap": get_icon("load_image.svg")
-        }
+    MENU = 'Load Image'
+    TOOLTIP = 'Load image into AI workspace'
+    ICON = 'load_image.svg'
+    ERROR_TITLE = 'Copy Error'
+    ERROR_TEXT = 'Failed to copy'
 
     def Activated(self):
         files, _ = QtGui.QFileDialog.getOpenFileNames(
@@ -47,9 +47,4 @@ class LoadImageCommand:
                 shutil.copy2(src, dst)
                 FreeCAD.Console.PrintMessage(f"[AIEngineer] Saved: {dst}\n")
             except Exception as ex:
-                QtGui.QMessageBox.critical(
-                    None, "Copy Error", f"Failed to copy:\n{str(ex)}"
-                )
-
-    def IsActive(self):
-        return True
\ No newline at end of file
+                self._show_error(ex)
\ No newline at end of file
@@ -4,28 +4,15 @@
 Команда загрузки или создания нового текстового файла (промпта).
 """
 
-from PySide import QtGui
-from ..utils import get_icon
+from ._base import CommandBase
 
-class LoadTextCommand:
-    """Команда открытия текстового редактора для создания или загрузки промпта."""
-
-    def GetResources(self):
-        return {
-            "MenuText": "Load Text",
-            "ToolTip": "Load or write text (Markdown)",
-            "Pixmap": get_icon("load_text.svg")
-        }
 
-    def Activated(self):
-        try:
-            from ..dialogs.text_editor import TextEditorDialog
-            dialog = TextEditorDialog()
-            dialog.exec_()
-        except Exception as ex:
-            QtGui.QMessageBox.critical(
-                None, "Editor Error", f"Failed to open text editor:\n{str(ex)}"
-            )
+class LoadTextCommand(CommandBase):
+    """Команда открытия текстового редактора для создания или загрузки промпта."""
 
-    def IsActive(self):
-        return True
\ No newline at end of file
+    MENU = 'Load Text'
+    TOOLTIP = 'Load or write text (Markdown)'
+    ICON = 'load_text.svg'
+    DIALOG_CLASS_PATH = '..dialogs.text_editor.TextEditorDialog'
+    ERROR_TITLE = 'Editor Error'
+    ERROR_TEXT = 'Failed to open text editor'
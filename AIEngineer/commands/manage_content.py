@@ -4,28 +4,15 @@
 Команда открытия менеджера контента (просмотр, редактирование, удаление файлов).
 """
 
-from PySide import QtGui
-from ..utils import get_icon
+from ._base import CommandBase
 
-class ManageContentCommand:
-    """Команда управления загруженными изображениями и текстовыми файлами."""
-
-    def GetResources(self):
-        return {
-            "MenuText": "Manage Content",
-            "ToolTip": "View and edit your files",
-            "Pixmap": get_icon("manage_content.svg")
-        }
 
-    def Activated(self):
-        try:
-            from ..dialogs.content_manager import ContentManagerDialog
-            dialog = ContentManagerDialog()
-            dialog.exec_()
-        except Exception as ex:
-            QtGui.QMessageBox.critical(
-                None, "Manager Error", f"Failed to open content manager:\n{str(ex)}"
-            )
+class ManageContentCommand(CommandBase):
+    """Команда управления загруженными изображениями и текстовыми файлами."""
 
-    def IsActive(self):
-        return True
\ No newline at end of file
+    MENU = 'Manage Content'
+    TOOLTIP = 'View and edit your files'
+    ICON = 'manage_content.svg'
+    DIALOG_CLASS_PATH = '..dialogs.content_manager.ContentManagerDialog'
+    ERROR_TITLE = 'Manager Error'
+    ERROR_TEXT = 'Failed to open content manager'
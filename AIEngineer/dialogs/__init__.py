@@ -5,21 +5,53 @@
 ===================================
 
 Модуль экспортирует все диалоговые окна для использования
-в командах рабочей среды.
+в командах рабочей среды. Модули диалогов загружаются лениво
+(PEP 562) — при первом обращении к соответствующему имени.
 
 .. module:: AIEngineer.dialogs
 """
 
-from .ai_response import AIResponseDialog
-from .chat_dialog import ChatDialog
-from .content_manager import ContentManagerDialog
-from .link_content_dialog import LinkContentDialog
-from .text_editor import TextEditorDialog
+import importlib
+
+# Соответствие: имя класса → модуль, в котором он определён
+_DIALOG_MODULES: dict[str, str] = {
+    'AIResponseDialog': '.ai_response',
+    'ChatDialog': '.chat_dialog',
+    'ContentManagerDialog': '.content_manager',
+    'LinkContentDialog': '.link_content_dialog',
+    'TextEditorDialog': '.text_editor',
+}
 
 __all__ = [
     'AIResponseDialog',
     'ChatDialog',
     'ContentManagerDialog',
-    'LinkContentDialo',
+    'LinkContentDialog',
     'TextEditorDialog',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    """
+    Функция лениво импортирует класс диалога при первом обращении.
+
+    Args:
+        name (str): Имя запрашиваемого атрибута модуля.
+
+    Returns:
+        type: Класс диалога.
+
+    Raises:
+        AttributeError: Если имя не является экспортируемым диалогом.
+    """
+    module_name = _DIALOG_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    dialog_class = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = dialog_class
+    return dialog_class
+
+
+def __dir__() -> list[str]:
+    """Функция возвращает список атрибутов модуля, включая ленивые диалоги."""
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,126 @@
+## \file AIEngineer/dialogs/_chat_paint.py
+# -*- coding: utf-8 -*-
+"""
+Отрисовка и измерение «пузырей» сообщений чата.
+================================================
+
+Функции вызываются делегатом ChatDelegate для каждой видимой строки
+при каждой перерисовке, поэтому цвета создаются один раз, а размеры
+текста кэшируются по паре (текст, ширина).
+
+.. module:: AIEngineer.dialogs._chat_paint
+"""
+
+from typing import Dict, Tuple
+
+from PySide import QtGui, QtCore
+
+# Геометрия и цвета «пузырей» сообщений
+BUBBLE_MARGIN_H: int = 10
+BUBBLE_MARGIN_V: int = 5
+BUBBLE_PADDING: int = 8
+BUBBLE_RADIUS: float = 8.0
+BUBBLE_WIDTH_RATIO: float = 0.7
+USER_BUBBLE_COLOR: str = '#E3F2FD'
+USER_BORDER_COLOR: str = '#90CAF9'
+AI_BUBBLE_COLOR: str = '#F5F5F5'
+AI_BORDER_COLOR: str = '#E0E0E0'
+SELECTED_BORDER_COLOR: str = '#1976D2'
+
+# Предельный размер кэша измерений (при переполнении кэш сбрасывается)
+MEASURE_CACHE_SIZE: int = 2048
+
+_WRAP_FLAGS = QtCore.Qt.TextWordWrap
+_user_brush = QtGui.QColor(USER_BUBBLE_COLOR)
+_user_pen = QtGui.QColor(USER_BORDER_COLOR)
+_ai_brush = QtGui.QColor(AI_BUBBLE_COLOR)
+_ai_pen = QtGui.QColor(AI_BORDER_COLOR)
+_selected_pen = QtGui.QColor(SELECTED_BORDER_COLOR)
+
+_measure_cache: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+
+def measure_bubble(text: str, row_width: int, font_metrics: QtGui.QFontMetrics) -> Tuple[int, int]:
+    """
+    Функция вычисляет размер «пузыря» для текста при заданной ширине строки.
+
+    Args:
+        text (str): Текст сообщения.
+        row_width (int): Ширина строки представления.
+        font_metrics (QFontMetrics): Метрики шрифта представления.
+
+    Returns:
+        Tuple[int, int]: Ширина и высота пузыря (с отступами).
+    """
+    max_text_w: int = max(1, int(row_width * BUBBLE_WIDTH_RATIO) - 2 * BUBBLE_PADDING)
+    key: Tuple[str, int] = (text, max_text_w)
+    size = _measure_cache.get(key)
+    if size is None:
+        text_rect = font_metrics.boundingRect(0, 0, max_text_w, 1 << 24, _WRAP_FLAGS, text)
+        size = (
+            min(text_rect.width(), max_text_w) + 2 * BUBBLE_PADDING,
+            text_rect.height() + 2 * BUBBLE_PADDING,
+        )
+        if len(_measure_cache) >= MEASURE_CACHE_SIZE:
+            _measure_cache.clear()
+        _measure_cache[key] = size
+    return size
+
+
+def clear_measure_cache() -> None:
+    """Функция сбрасывает кэш измерений (например, после смены шрифта)."""
+    _measure_cache.clear()
+
+
+def bubble_rect(row_rect: QtCore.QRect, text: str, is_user: bool,
+                font_metrics: QtGui.QFontMetrics) -> QtCore.QRect:
+    """
+    Функция вычисляет прямоугольник «пузыря» сообщения внутри строки.
+
+    Args:
+        row_rect (QRect): Прямоугольник строки.
+        text (str): Текст сообщения.
+        is_user (bool): True — пузырь прижимается вправо.
+        font_metrics (QFontMetrics): Метрики шрифта представления.
+
+    Returns:
+        QRect: Прямоугольник пузыря.
+    """
+    bubble_w, bubble_h = measure_bubble(text, row_rect.width(), font_metrics)
+    if is_user:
+        x: int = row_rect.right() - BUBBLE_MARGIN_H - bubble_w
+    else:
+        x = row_rect.left() + BUBBLE_MARGIN_H
+    return QtCore.QRect(x, row_rect.top() + BUBBLE_MARGIN_V, bubble_w, bubble_h)
+
+
+def paint_bubble(painter: QtGui.QPainter, rect: QtCore.QRect, text: str, is_user: bool,
+                 selected: bool, text_color: QtGui.QColor) -> None:
+    """
+    Функция рисует пузырь сообщения и его текст.
+
+    Args:
+        painter (QPainter): Активный QPainter.
+        rect (QRect): Прямоугольник пузыря (см. bubble_rect).
+        text (str): Текст сообщения.
+        is_user (bool): True если сообщение от пользователя.
+        selected (bool): True если строка выбрана.
+        text_color (QColor): Цвет текста из палитры представления.
+    """
+    if selected:
+        pen = _selected_pen
+    else:
+        pen = _user_pen if is_user else _ai_pen
+
+    painter.save()
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setPen(pen)
+    painter.setBrush(_user_brush if is_user else _ai_brush)
+    painter.drawRoundedRect(rect, BUBBLE_RADIUS, BUBBLE_RADIUS)
+    painter.setPen(text_color)
+    painter.drawText(
+        rect.adjusted(BUBBLE_PADDING, BUBBLE_PADDING, -BUBBLE_PADDING, -BUBBLE_PADDING),
+        _WRAP_FLAGS,
+        text,
+    )
+    painter.restore()
@@ -0,0 +1,58 @@
+## \file AIEngineer/dialogs/_list_sync.py
+# -*- coding: utf-8 -*-
+"""
+Инкрементальное обновление QListWidget со списками файлов.
+==========================================================
+
+Вместо clear() и повторного добавления всех строк список изменяется
+только на разницу с новым набором имен: элементы не пересоздаются,
+выделение и позиция прокрутки сохраняются.
+
+.. module:: AIEngineer.dialogs._list_sync
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from PySide import QtGui, QtCore
+
+# Цвет отмеченных (связанных) элементов
+MARKED_COLOR: QtGui.QColor = QtGui.QColor('green')
+
+# Роль, в которой элемент хранит текущее состояние отметки
+_MARKED_ROLE: int = QtCore.Qt.UserRole + 1
+
+
+def sync_list_items(
+    widget: QtGui.QListWidget,
+    shown: Dict[str, QtGui.QListWidgetItem],
+    names: List[str],
+    is_marked: Optional[Callable[[str], bool]] = None
+) -> None:
+    """
+    Функция приводит содержимое списка к отсортированному набору имен.
+
+    Args:
+        widget (QListWidget): Обновляемый список.
+        shown (Dict[str, QListWidgetItem]): Отображаемые элементы по имени (изменяется на месте).
+        names (List[str]): Новый отсортированный список имен.
+        is_marked (Optional[Callable[[str], bool]]): Признак отметки элемента цветом.
+    """
+    current = set(names)
+
+    for name in shown.keys() - current:
+        widget.takeItem(widget.row(shown.pop(name)))
+
+    # Имена отсортированы, поэтому вставка по индексу сохраняет порядок
+    for row, name in enumerate(names):
+        item = shown.get(name)
+        if item is None:
+            item = QtGui.QListWidgetItem(name)
+            widget.insertItem(row, item)
+            shown[name] = item
+
+        if is_marked is None:
+            continue
+        marked: bool = is_marked(name)
+        if item.data(_MARKED_ROLE) != marked:
+            item.setData(_MARKED_ROLE, marked)
+            item.setForeground(MARKED_COLOR if marked else widget.palette().color(QtGui.QPalette.Text))
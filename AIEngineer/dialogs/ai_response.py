@@ -9,12 +9,20 @@
 .. module:: AIEngineer.dialogs.ai_response
 """
 
-from PySide import QtGui
+from PySide import QtGui, QtCore
 
 
 class AIResponseDialog(QtGui.QDialog):
     """Окно для просмотра и копирования ответа ИИ."""
 
+    # Фрагмент потокового ответа: (номер потока, текст)
+    chunk_received = QtCore.Signal(int, str)
+    # Завершение потокового ответа: (номер потока, итоговый текст)
+    response_finished = QtCore.Signal(int, str)
+
+    PROMPT_LABEL: str = '<b>Your prompt:</b>'
+    RESPONSE_LABEL: str = '<b>Gemini Response:</b>'
+
     def __init__(self, prompt: str, response: str):
         """
         Функция инициализирует диалог ответа AI.
@@ -27,23 +35,24 @@ class AIResponseDialog(QtGui.QDialog):
         self.setWindowTitle('AI Engineer — Response from Gemini')
         self.resize(700, 500)
 
+        self._response: str = ''
+        self._stream_id: int = 0
+
         layout = QtGui.QVBoxLayout()
-        layout.addWidget(QtGui.QLabel('<b>Your prompt:</b>'))
-        
-        prompt_edit = QtGui.QTextEdit()
-        prompt_edit.setPlainText(prompt)
-        prompt_edit.setReadOnly(True)
-        layout.addWidget(prompt_edit)
-
-        layout.addWidget(QtGui.QLabel('<b>Gemini Response:</b>'))
-        response_edit = QtGui.QTextEdit()
-        response_edit.setPlainText(str(response))
-        response_edit.setReadOnly(True)
-        layout.addWidget(response_edit)
+        layout.addWidget(QtGui.QLabel(self.PROMPT_LABEL))
+
+        self._prompt_edit = QtGui.QTextEdit()
+        self._prompt_edit.setReadOnly(True)
+        layout.addWidget(self._prompt_edit)
+
+        layout.addWidget(QtGui.QLabel(self.RESPONSE_LABEL))
+        self._response_edit = QtGui.QTextEdit()
+        self._response_edit.setReadOnly(True)
+        layout.addWidget(self._response_edit)
 
         copy_btn = QtGui.QPushButton('Copy Response')
         close_btn = QtGui.QPushButton('Close')
-        copy_btn.clicked.connect(lambda: QtGui.QApplication.clipboard().setText(str(response)))
+        copy_btn.clicked.connect(self._copy_response)
         close_btn.clicked.connect(self.accept)
 
         btn_layout = QtGui.QHBoxLayout()
@@ -52,4 +61,67 @@ class AIResponseDialog(QtGui.QDialog):
         btn_layout.addWidget(close_btn)
         layout.addLayout(btn_layout)
 
-        self.setLayout(layout)
\ No newline at end of file
+        self.setLayout(layout)
+        self.set_content(prompt, response)
+
+        self.chunk_received.connect(self._append_chunk)
+        self.response_finished.connect(self._finish_stream)
+
+    def set_content(self, prompt: str, response: str) -> None:
+        """
+        Функция обновляет текст запроса и ответа без пересоздания виджетов.
+
+        Args:
+            prompt (str): Текст запроса пользователя.
+            response (str): Ответ от AI модели.
+        """
+        self._response = str(response)
+        self._prompt_edit.setPlainText(prompt)
+        self._response_edit.setPlainText(self._response)
+
+    def _copy_response(self) -> None:
+        """Функция копирует текст ответа в буфер обмена."""
+        QtGui.QApplication.clipboard().setText(self._response)
+
+    def begin_stream(self, prompt: str) -> int:
+        """
+        Функция готовит диалог к потоковому ответу.
+
+        Фрагменты предыдущего (незавершенного) потока после этого игнорируются.
+
+        Args:
+            prompt (str): Текст запроса пользователя.
+
+        Returns:
+            int: Номер потока для сигналов chunk_received/response_finished.
+        """
+        self._stream_id += 1
+        self.set_content(prompt, '')
+        return self._stream_id
+
+    def _append_chunk(self, stream_id: int, piece: str) -> None:
+        """
+        Функция дописывает фрагмент ответа в конец поля ответа.
+
+        Args:
+            stream_id (int): Номер потока.
+            piece (str): Фрагмент текста.
+        """
+        if stream_id != self._stream_id:
+            return
+        self._response += piece
+        self._response_edit.moveCursor(QtGui.QTextCursor.End)
+        self._response_edit.insertPlainText(piece)
+
+    def _finish_stream(self, stream_id: int, response: str) -> None:
+        """
+        Функция заменяет накопленный текст итоговым (нормализованным) ответом.
+
+        Args:
+            stream_id (int): Номер потока.
+            response (str): Итоговый ответ.
+        """
+        if stream_id != self._stream_id or response == self._response:
+            return
+        self._response = response
+        self._response_edit.setPlainText(response)
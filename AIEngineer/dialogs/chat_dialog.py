@@ -11,68 +11,354 @@
 """
 
 import asyncio
+import hashlib
+import os
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import TYPE_CHECKING, Optional, List, Dict, Tuple
 from PySide import QtGui, QtCore
 import FreeCAD
 
-from ..gemini import GoogleGenerativeAi
-from ..utils import get_api_key, AI_DATA_DIR, get_image_files
+from ..async_loop import get_loop, run_in_thread, submit
+from ._chat_paint import BUBBLE_MARGIN_V, bubble_rect, clear_measure_cache, paint_bubble
+from ..utils import get_api_key, AI_DATA_DIR, IMAGE_MIME_TYPES, get_image_files
 
+# Окно объединения подряд отправленных сообщений в один запрос (мс)
+BATCH_WINDOW_MS: int = 150
+# Разделитель сообщений внутри объединенного запроса
+BATCH_SEPARATOR: str = '\n---\n'
+# Задержка подсчета токенов после последнего изменения ввода (мс)
+TOKEN_COUNT_DEBOUNCE_MS: int = 400
+# Лимит размера запроса в токенах по умолчанию (QSettings: max_prompt_tokens)
+DEFAULT_MAX_PROMPT_TOKENS: int = 100000
+# Сколько более ранних сообщений подгружается из журнала при прокрутке к началу
+HISTORY_PAGE_TURNS: int = 50
+# Количество строк, раскладываемых представлением за один проход
+LAYOUT_BATCH_SIZE: int = 50
 
-class ChatMessage(QtGui.QWidget):
-    """Виджет для отображения одного сообщения в чате."""
+# Единая таблица стилей диалога: виджеты выбираются по objectName,
+# поэтому CSS разбирается один раз на корневом виджете
+_CHAT_DIALOG_QSS: str = (
+    'QLabel#modelLabel { '
+    'color: #1976D2; '
+    'font-weight: bold; '
+    'padding: 5px; '
+    'background-color: #E3F2FD; '
+    'border-radius: 4px; '
+    '} '
+    'QListView#messagesView { '
+    'background-color: white; '
+    'border: 1px solid #E0E0E0; '
+    'border-radius: 4px; '
+    '} '
+    'QTextEdit#inputText { '
+    'border: 2px solid #90CAF9; '
+    'border-radius: 4px; '
+    'padding: 8px; '
+    'font-size: 11pt; '
+    '} '
+    'QPushButton#sendButton { '
+    'background-color: #2196F3; '
+    'color: white; '
+    'border: none; '
+    'border-radius: 4px; '
+    'padding: 10px 20px; '
+    'font-size: 11pt; '
+    'font-weight: bold; '
+    '} '
+    'QPushButton#sendButton:hover { '
+    'background-color: #1976D2; '
+    '} '
+    'QPushButton#sendButton:disabled { '
+    'background-color: #BDBDBD; '
+    '} '
+    'QLabel#tokenLabel { '
+    'color: #757575; '
+    'font-size: 9pt; '
+    '} '
+    'QLabel#loadingLabel { '
+    'color: #1976D2; '
+    'font-weight: bold; '
+    'padding: 5px; '
+    '}'
+)
 
-    def __init__(self, text: str, is_user: bool = True, parent=None):
+# Системная инструкция ассистента чата
+SYSTEM_INSTRUCTION: str = (
+    'Вы - технический ассистент для инженеров, работающих с FreeCAD. '
+    'Предоставляйте точные, краткие и полезные ответы. '
+    'При анализе изображений описывайте технические детали.'
+)
+
+if TYPE_CHECKING:
+    from ..gemini import GoogleGenerativeAi
+
+# Подготовленное изображение: ((mtime_ns, size), байты)
+ImagePayload = Tuple[Tuple[int, int], bytes]
+
+
+def _image_stamp(image_path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Функция возвращает отметку версии файла (mtime_ns, size).
+
+    Args:
+        image_path (Path): Путь к файлу.
+
+    Returns:
+        Optional[Tuple[int, int]]: Отметка или None, если файл недоступен.
+    """
+    try:
+        st = os.stat(image_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _load_image(image_path: Path) -> Optional[ImagePayload]:
+    """
+    Функция читает изображение вместе с отметкой версии файла.
+
+    Выполняется в пуле потоков, пока пользователь набирает сообщение.
+
+    Args:
+        image_path (Path): Путь к изображению.
+
+    Returns:
+        Optional[ImagePayload]: Подготовленное изображение или None при ошибке.
+    """
+    stamp = _image_stamp(image_path)
+    if stamp is None:
+        return None
+    try:
+        data: bytes = image_path.read_bytes()
+    except OSError as ex:
+        FreeCAD.Console.PrintError(f'[AIEngineer] Failed to read image: {ex}\n')
+        return None
+    return stamp, data
+
+
+# Роли сообщений истории, отображаемые в чате
+_CHAT_ROLES: frozenset = frozenset({'user', 'model'})
+
+# Отправитель сообщения в записи _Turn
+ROLE_USER: int = 0
+ROLE_MODEL: int = 1
+
+
+class _Turn:
+    """Запись сообщения чата (одна строка модели)."""
+
+    __slots__ = ('role', 'content')
+
+    def __init__(self, role: int, content: str):
         """
-        Функция инициализирует виджет сообщения.
+        Функция инициализирует запись сообщения.
 
         Args:
-            text (str): Текст сообщения.
-            is_user (bool): True если сообщение от пользователя, False если от AI.
-            parent: Родительский виджет.
+            role (int): ROLE_USER или ROLE_MODEL.
+            content (str): Текст сообщения.
+        """
+        self.role = role
+        self.content = content
+
+
+def _turns_to_rows(turns: List[Dict]) -> List[Tuple[str, bool]]:
+    """
+    Функция преобразует сообщения истории в строки модели чата.
+
+    Args:
+        turns (List[Dict]): Сообщения {'role': ..., 'parts': [...]}.
+
+    Returns:
+        List[Tuple[str, bool]]: Пары (текст, от пользователя).
+    """
+    # Один проход: роль проверяется до сборки текста, сообщения без текста пропускаются
+    return [
+        (text, msg['role'] == 'user')
+        for msg in turns
+        if msg.get('role') in _CHAT_ROLES
+        and (text := '\n'.join(p for p in msg.get('parts', ()) if isinstance(p, str)))
+    ]
+
+
+def _log_close_save(future) -> None:
+    """
+    Функция сообщает о результате сохранения истории при закрытии диалога.
+
+    Args:
+        future (concurrent.futures.Future): Завершенная задача сохранения.
+    """
+    try:
+        if future.result():
+            FreeCAD.Console.PrintMessage('[AIEngineer] Chat history saved on close\n')
+    except Exception as ex:
+        FreeCAD.Console.PrintError(f'[AIEngineer] Failed to save history on close: {ex}\n')
+
+
+class ChatModel(QtCore.QAbstractListModel):
+    """Модель списка сообщений чата: одна строка — одно сообщение."""
+
+    IsUserRole = QtCore.Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        """
+        Функция инициализирует пустую модель.
+
+        Args:
+            parent: Родительский объект.
         """
         super().__init__(parent)
-        
-        layout = QtGui.QHBoxLayout()
-        layout.setContentsMargins(10, 5, 10, 5)
-        
-        # Текстовое поле сообщения
-        text_edit = QtGui.QTextEdit()
-        text_edit.setPlainText(text)
-        text_edit.setReadOnly(True)
-        text_edit.setMaximumHeight(150)
-        
-        # Стилизация в зависимости от отправителя
-        if is_user:
-            text_edit.setStyleSheet(
-                'QTextEdit { '
-                'background-color: #E3F2FD; '
-                'border: 1px solid #90CAF9; '
-                'border-radius: 8px; '
-                'padding: 8px; '
-                '}'
-            )
-            layout.addStretch()
-            layout.addWidget(text_edit, 7)
-        else:
-            text_edit.setStyleSheet(
-                'QTextEdit { '
-                'background-color: #F5F5F5; '
-                'border: 1px solid #E0E0E0; '
-                'border-radius: 8px; '
-                'padding: 8px; '
-                '}'
-            )
-            layout.addWidget(text_edit, 7)
-            layout.addStretch()
-        
-        self.setLayout(layout)
+        self._rows: List[_Turn] = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        """Функция возвращает количество сообщений."""
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        Функция возвращает данные сообщения для указанной роли.
+
+        Args:
+            index (QModelIndex): Индекс строки.
+            role (int): DisplayRole — текст, IsUserRole — отправитель.
+        """
+        if not index.isValid():
+            return None
+        turn: _Turn = self._rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return turn.content
+        if role == self.IsUserRole:
+            return turn.role == ROLE_USER
+        return None
+
+    def append(self, text: str, is_user: bool) -> int:
+        """
+        Функция добавляет сообщение в конец списка.
+
+        Args:
+            text (str): Текст сообщения.
+            is_user (bool): True если сообщение от пользователя.
+
+        Returns:
+            int: Номер добавленной строки.
+        """
+        row: int = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(_Turn(ROLE_USER if is_user else ROLE_MODEL, text))
+        self.endInsertRows()
+        return row
+
+    def extend(self, rows: List[Tuple[str, bool]]) -> None:
+        """
+        Функция добавляет несколько сообщений одной вставкой.
+
+        Args:
+            rows (List[Tuple[str, bool]]): Пары (текст, от пользователя).
+        """
+        if not rows:
+            return
+        first: int = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(
+            _Turn(ROLE_USER if is_user else ROLE_MODEL, text) for text, is_user in rows
+        )
+        self.endInsertRows()
+
+    def prepend(self, rows: List[Tuple[str, bool]]) -> None:
+        """
+        Функция вставляет более ранние сообщения в начало списка одной вставкой.
+
+        Args:
+            rows (List[Tuple[str, bool]]): Пары (текст, от пользователя).
+        """
+        if not rows:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), 0, len(rows) - 1)
+        self._rows[:0] = [
+            _Turn(ROLE_USER if is_user else ROLE_MODEL, text) for text, is_user in rows
+        ]
+        self.endInsertRows()
+
+    def set_text(self, row: int, text: str) -> None:
+        """
+        Функция заменяет текст сообщения и перерисовывает только эту строку.
+
+        Args:
+            row (int): Номер строки.
+            text (str): Новый текст сообщения.
+        """
+        self._rows[row].content = text
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def append_text(self, row: int, piece: str) -> None:
+        """
+        Функция дописывает фрагмент текста к сообщению (потоковый ответ).
+
+        Args:
+            row (int): Номер строки.
+            piece (str): Фрагмент текста.
+        """
+        self.set_text(row, self._rows[row].content + piece)
+
+    def clear(self) -> None:
+        """Функция удаляет все сообщения одним сбросом модели."""
+        self.beginResetModel()
+        self._rows.clear()
+        self.endResetModel()
+
+
+class ChatDelegate(QtGui.QStyledItemDelegate):
+    """Делегат, рисующий сообщения чата напрямую через QPainter."""
+
+    def __init__(self, view: QtGui.QListView):
+        """
+        Функция инициализирует делегат.
+
+        Args:
+            view (QListView): Представление, ширина которого задает перенос строк.
+        """
+        super().__init__(view)
+        self._view = view
+        self._fm = QtGui.QFontMetrics(view.font())
+
+    def sizeHint(self, option, index) -> QtCore.QSize:
+        """Функция возвращает размер строки с учетом переноса текста."""
+        width: int = self._view.viewport().width()
+        rect = bubble_rect(
+            QtCore.QRect(0, 0, width, 0),
+            index.data(QtCore.Qt.DisplayRole) or '',
+            bool(index.data(ChatModel.IsUserRole)),
+            self._fm,
+        )
+        return QtCore.QSize(width, rect.height() + 2 * BUBBLE_MARGIN_V)
+
+    def paint(self, painter, option, index) -> None:
+        """Функция рисует пузырь сообщения и его текст."""
+        text: str = index.data(QtCore.Qt.DisplayRole) or ''
+        is_user: bool = bool(index.data(ChatModel.IsUserRole))
+        paint_bubble(
+            painter,
+            bubble_rect(option.rect, text, is_user, self._fm),
+            text,
+            is_user,
+            bool(option.state & QtGui.QStyle.State_Selected),
+            option.palette.color(QtGui.QPalette.Text),
+        )
 
 
 class ChatDialog(QtGui.QDialog):
     """Диалог чата с Google Gemini AI."""
 
+    # Сигналы доставляют результат из фонового цикла asyncio в поток GUI
+    response_ready = QtCore.Signal(object)
+    ai_ready = QtCore.Signal(object)
+    ai_failed = QtCore.Signal(str)
+    chunk_received = QtCore.Signal(str)
+    retrying = QtCore.Signal(int, int)
+    tokens_counted = QtCore.Signal(object, int)
+    request_failed = QtCore.Signal(str)
+    history_exported = QtCore.Signal(bool, str)
+
     def __init__(self, parent=None):
         """
         Функция инициализирует диалог чата.
@@ -85,22 +371,54 @@ class ChatDialog(QtGui.QDialog):
         self.resize(800, 600)
         
         # Инициализация переменных
-        self.llm: Optional[GoogleGenerativeAi] = None
+        self.llm: Optional['GoogleGenerativeAi'] = None
+        self._initializing: bool = False
+        # Выбранное изображение и его MIME-тип (вычисляются при смене выбора)
         self.current_image: Optional[Path] = None
+        self._current_mime: Optional[str] = None
+        # Чтение выбранного изображения, запущенное при его выборе
+        self._image_future = None
+        # Оценка размера запроса: (хэш текста, длина истории) → токены
+        self._token_cache: Dict[tuple, int] = {}
+        self._over_budget: bool = False
+        self._max_prompt_tokens: int = int(QtCore.QSettings('FreeCAD', 'AIEngineer').value(
+            'max_prompt_tokens', DEFAULT_MAX_PROMPT_TOKENS
+        ))
         self.current_model: str = ''
         self.chat_session_name: str = 'freecad_chat'
+        self._pending_msgs: List[str] = []
+        self._busy: bool = False
+        # Последний показанный список изображений (None — комбобокс еще не заполнен)
+        self._image_files: Optional[List[str]] = None
+        
+        # Таймер объединения сообщений: перезапускается при каждой отправке
+        self._flush_timer = QtCore.QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(BATCH_WINDOW_MS)
+        self._flush_timer.timeout.connect(self._flush_batch)
+        
+        # Потоковый ответ: строка модели, в которую дописываются фрагменты
+        self._stream_row: Optional[int] = None
+        self._cancel: bool = False
+        
+        self.response_ready.connect(self._on_response)
+        self.ai_ready.connect(self._on_ai_ready)
+        self.ai_failed.connect(self._on_ai_failed)
+        self.chunk_received.connect(self._on_chunk)
+        self.retrying.connect(self._on_retrying)
+        self.tokens_counted.connect(self._on_tokens_counted)
+        self.request_failed.connect(self._on_request_failed)
+        self.history_exported.connect(self._on_history_exported)
         
         # Создание UI
         self._create_ui()
         
-        # Инициализация AI клиента
-        self._initialize_ai()
-        
-        # Загрузка истории при открытии
-        self._load_chat_history()
+        # Инициализация AI клиента и загрузка истории — в фоне, диалог открывается сразу
+        self._initialize_ai(load_history=True)
 
     def _create_ui(self) -> None:
         """Функция создает пользовательский интерфейс."""
+        self.setStyleSheet(_CHAT_DIALOG_QSS)
         main_layout = QtGui.QVBoxLayout()
         
         # === ЗАГОЛОВОК ===
@@ -113,51 +431,60 @@ class ChatDialog(QtGui.QDialog):
         
         # Отображение текущей модели
         self.model_label = QtGui.QLabel('Model: Loading...')
-        self.model_label.setStyleSheet(
-            'QLabel { '
-            'color: #1976D2; '
-            'font-weight: bold; '
-            'padding: 5px; '
-            'background-color: #E3F2FD; '
-            'border-radius: 4px; '
-            '}'
-        )
+        self.model_label.setObjectName('modelLabel')
         header_layout.addWidget(self.model_label)
         
         # Кнопка настроек
-        settings_btn = QtGui.QPushButton('⚙️ Settings')
-        settings_btn.clicked.connect(self._open_settings)
-        settings_btn.setMaximumWidth(100)
-        settings_btn.setToolTip('Open AI Settings to change model')
-        header_layout.addWidget(settings_btn)
+        self.settings_btn = QtGui.QPushButton('⚙️ Settings')
+        self.settings_btn.clicked.connect(self._open_settings)
+        self.settings_btn.setMaximumWidth(100)
+        self.settings_btn.setToolTip('Open AI Settings to change model')
+        header_layout.addWidget(self.settings_btn)
+        
+        # Кнопка экспорта истории в JSON
+        export_btn = QtGui.QPushButton('💾 Export')
+        export_btn.clicked.connect(self._export_history)
+        export_btn.setMaximumWidth(80)
+        export_btn.setToolTip('Export the full chat history to a JSON file')
+        header_layout.addWidget(export_btn)
         
         # Кнопка очистки истории
-        clear_btn = QtGui.QPushButton('🗑️ Clear')
-        clear_btn.clicked.connect(self._clear_chat)
-        clear_btn.setMaximumWidth(80)
-        header_layout.addWidget(clear_btn)
+        self.clear_btn = QtGui.QPushButton('🗑️ Clear')
+        self.clear_btn.clicked.connect(self._clear_chat)
+        self.clear_btn.setMaximumWidth(80)
+        header_layout.addWidget(self.clear_btn)
         
         main_layout.addLayout(header_layout)
         
         # === ОБЛАСТЬ СООБЩЕНИЙ ===
-        self.messages_scroll = QtGui.QScrollArea()
-        self.messages_scroll.setWidgetResizable(True)
-        self.messages_scroll.setStyleSheet(
-            'QScrollArea { '
-            'background-color: white; '
-            'border: 1px solid #E0E0E0; '
-            'border-radius: 4px; '
-            '}'
-        )
+        # Одно представление на весь чат: строки рисует делегат, виджеты на сообщение не создаются
+        self._model = ChatModel(self)
+        self.messages_view = QtGui.QListView()
+        self.messages_view.setModel(self._model)
+        self.messages_view.setItemDelegate(ChatDelegate(self.messages_view))
+        self.messages_view.setUniformItemSizes(False)
+        self.messages_view.setResizeMode(QtGui.QListView.Adjust)
+        # Длинная история раскладывается порциями в цикле событий, а не за один проход
+        self.messages_view.setLayoutMode(QtGui.QListView.Batched)
+        self.messages_view.setBatchSize(LAYOUT_BATCH_SIZE)
+        self.messages_view.setVerticalScrollMode(QtGui.QAbstractItemView.ScrollPerPixel)
+        self.messages_view.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+        self.messages_view.setObjectName('messagesView')
+        
+        # Копирование выбранного сообщения (Ctrl+C)
+        copy_shortcut = QtGui.QShortcut(QtGui.QKeySequence.Copy, self.messages_view)
+        copy_shortcut.activated.connect(self._copy_selected_message)
         
-        # Контейнер для сообщений
-        self.messages_container = QtGui.QWidget()
-        self.messages_layout = QtGui.QVBoxLayout()
-        self.messages_layout.addStretch()
-        self.messages_container.setLayout(self.messages_layout)
-        self.messages_scroll.setWidget(self.messages_container)
+        # Автопрокрутка: вниз при росте содержимого, пока пользователь не прокрутил вверх
+        self._autoscroll: bool = True
+        # Подгрузка ранних сообщений: расстояние до конца списка, которое нужно сохранить
+        self._scroll_anchor: Optional[int] = None
+        self._history_exhausted: bool = False
+        scroll_bar = self.messages_view.verticalScrollBar()
+        scroll_bar.rangeChanged.connect(self._on_scroll_range_changed)
+        scroll_bar.valueChanged.connect(self._on_scroll_value_changed)
         
-        main_layout.addWidget(self.messages_scroll)
+        main_layout.addWidget(self.messages_view)
         
         # === ПАНЕЛЬ КОНТЕКСТА ===
         context_layout = QtGui.QHBoxLayout()
@@ -165,6 +492,7 @@ class ChatDialog(QtGui.QDialog):
         # Выбор изображения
         self.image_combo = QtGui.QComboBox()
         self.image_combo.addItem('No image')
+        self.image_combo.currentIndexChanged.connect(self._on_image_changed)
         self._refresh_image_list()
         context_layout.addWidget(QtGui.QLabel('Attach image:'))
         context_layout.addWidget(self.image_combo, 3)
@@ -187,40 +515,34 @@ class ChatDialog(QtGui.QDialog):
         self.input_text = QtGui.QTextEdit()
         self.input_text.setMaximumHeight(100)
         self.input_text.setPlaceholderText('Type your message here...')
-        self.input_text.setStyleSheet(
-            'QTextEdit { '
-            'border: 2px solid #90CAF9; '
-            'border-radius: 4px; '
-            'padding: 8px; '
-            'font-size: 11pt; '
-            '}'
-        )
+        self.input_text.setObjectName('inputText')
         input_layout.addWidget(self.input_text)
         
+        # Оценка размера запроса в токенах (обновляется после паузы в наборе)
+        self.token_label = QtGui.QLabel('')
+        self.token_label.setObjectName('tokenLabel')
+        input_layout.addWidget(self.token_label)
+        
+        self._token_timer = QtCore.QTimer(self)
+        self._token_timer.setSingleShot(True)
+        self._token_timer.setInterval(TOKEN_COUNT_DEBOUNCE_MS)
+        self._token_timer.timeout.connect(self._estimate_tokens)
+        self.input_text.textChanged.connect(self._token_timer.start)
+        
         # Кнопки отправки
         buttons_layout = QtGui.QHBoxLayout()
         
         self.send_btn = QtGui.QPushButton('📤 Send (Ctrl+Enter)')
         self.send_btn.clicked.connect(self._send_message)
-        self.send_btn.setStyleSheet(
-            'QPushButton { '
-            'background-color: #2196F3; '
-            'color: white; '
-            'border: none; '
-            'border-radius: 4px; '
-            'padding: 10px 20px; '
-            'font-size: 11pt; '
-            'font-weight: bold; '
-            '} '
-            'QPushButton:hover { '
-            'background-color: #1976D2; '
-            '} '
-            'QPushButton:disabled { '
-            'background-color: #BDBDBD; '
-            '}'
-        )
+        self.send_btn.setObjectName('sendButton')
         buttons_layout.addWidget(self.send_btn)
         
+        self.stop_btn = QtGui.QPushButton('⏹ Stop')
+        self.stop_btn.clicked.connect(self._stop_response)
+        self.stop_btn.setMaximumWidth(100)
+        self.stop_btn.hide()
+        buttons_layout.addWidget(self.stop_btn)
+        
         close_btn = QtGui.QPushButton('Close')
         close_btn.clicked.connect(self._on_close)
         close_btn.setMaximumWidth(100)
@@ -231,13 +553,7 @@ class ChatDialog(QtGui.QDialog):
         
         # === ИНДИКАТОР ЗАГРУЗКИ ===
         self.loading_label = QtGui.QLabel('⏳ Processing...')
-        self.loading_label.setStyleSheet(
-            'QLabel { '
-            'color: #1976D2; '
-            'font-weight: bold; '
-            'padding: 5px; '
-            '}'
-        )
+        self.loading_label.setObjectName('loadingLabel')
         self.loading_label.hide()
         main_layout.addWidget(self.loading_label)
         
@@ -247,8 +563,16 @@ class ChatDialog(QtGui.QDialog):
         send_shortcut = QtGui.QShortcut(QtGui.QKeySequence('Ctrl+Return'), self)
         send_shortcut.activated.connect(self._send_message)
 
-    def _initialize_ai(self) -> None:
-        """Функция инициализирует AI клиент с настройками из QSettings."""
+    def _initialize_ai(self, load_history: bool = False) -> None:
+        """
+        Функция запускает инициализацию AI клиента с настройками из QSettings.
+
+        Импорт Google SDK и создание клиента выполняются в фоновом цикле
+        asyncio; результат приходит через сигналы ai_ready/ai_failed.
+
+        Args:
+            load_history (bool): Загрузить сохраненную историю чата после инициализации.
+        """
         api_key: str = get_api_key()
         
         if not api_key:
@@ -266,68 +590,107 @@ class ChatDialog(QtGui.QDialog):
         settings = QtCore.QSettings('FreeCAD', 'AIEngineer')
         model_name: str = settings.value('model_name', 'gemini-2.5-flash')
         
+        self.current_model = model_name
+        self._initializing = True
+        self.model_label.setText('Model: ⏳ Connecting...')
+        future = submit(self._create_client(api_key, model_name, load_history))
+        future.add_done_callback(self._on_init_done)
+
+    async def _create_client(self, api_key: str, model_name: str, load_history: bool) -> 'GoogleGenerativeAi':
+        """
+        Функция создает AI клиент (выполняется в фоновом цикле asyncio).
+
+        Args:
+            api_key (str): Ключ API Gemini.
+            model_name (str): Имя модели.
+            load_history (bool): Загрузить сохраненную историю чата.
+
+        Returns:
+            GoogleGenerativeAi: Инициализированный клиент.
+        """
+        from ..gemini import GoogleGenerativeAi
+
+        llm = GoogleGenerativeAi(
+            api_key=api_key,
+            model_name=model_name,
+            system_instruction=SYSTEM_INSTRUCTION
+        )
+        # Установка имени сессии чата
+        llm.chat_session_name = self.chat_session_name
+        if load_history:
+            await llm._load_chat_history()
+        return llm
+
+    def _on_init_done(self, future) -> None:
+        """
+        Функция передает результат инициализации в поток GUI через сигналы.
+
+        Args:
+            future (concurrent.futures.Future): Завершенная задача.
+        """
         try:
-            self.current_model = model_name
-            self.llm = GoogleGenerativeAi(
-                api_key=api_key,
-                model_name=model_name,
-                system_instruction=(
-                    'Вы - технический ассистент для инженеров, работающих с FreeCAD. '
-                    'Предоставляйте точные, краткие и полезные ответы. '
-                    'При анализе изображений описывайте технические детали.'
-                )
-            )
-            # Установка имени сессии чата
-            self.llm.chat_session_name = self.chat_session_name
-            self.model_label.setText(f'Model: {model_name}')
-            FreeCAD.Console.PrintMessage(f'[AIEngineer] Chat initialized with {model_name}\n')
-            
-        except Exception as ex:
-            FreeCAD.Console.PrintError(f'[AIEngineer] Failed to initialize AI: {ex}\n')
-            QtGui.QMessageBox.critical(
-                self,
-                'Initialization Error',
-                f'Failed to initialize Gemini:\n{str(ex)}'
-            )
-            self.send_btn.setEnabled(False)
-            self.model_label.setText('Model: Error')
+            try:
+                llm = future.result()
+            except Exception as ex:
+                self.ai_failed.emit(str(ex))
+                return
+            self.ai_ready.emit(llm)
+        except RuntimeError:
+            # Диалог уже закрыт и удален
+            pass
+
+    def _on_ai_ready(self, llm: 'GoogleGenerativeAi') -> None:
+        """
+        Функция подключает инициализированный клиент и показывает историю.
+
+        Args:
+            llm (GoogleGenerativeAi): Инициализированный клиент.
+        """
+        self._initializing = False
+        self.llm = llm
+        self.model_label.setText(f'Model: {self.current_model}')
+        FreeCAD.Console.PrintMessage(f'[AIEngineer] Chat initialized with {self.current_model}\n')
+        self._show_chat_history()
+        
+        # Сообщения, отправленные до завершения инициализации
+        if self._pending_msgs:
+            self._flush_timer.start()
+
+    def _on_ai_failed(self, error: str) -> None:
+        """
+        Функция сообщает об ошибке инициализации клиента.
 
-    def _load_chat_history(self) -> None:
-        """Функция загружает историю чата при открытии диалога."""
-        if not self.llm:
+        Args:
+            error (str): Текст ошибки.
+        """
+        self._initializing = False
+        self._pending_msgs.clear()
+        FreeCAD.Console.PrintError(f'[AIEngineer] Failed to initialize AI: {error}\n')
+        QtGui.QMessageBox.critical(
+            self,
+            'Initialization Error',
+            f'Failed to initialize Gemini:\n{error}'
+        )
+        self.send_btn.setEnabled(False)
+        self.model_label.setText('Model: Error')
+
+    def _show_chat_history(self) -> None:
+        """Функция восстанавливает сообщения загруженной истории в UI."""
+        if not self.llm.chat_history or self._model.rowCount():
             return
         
+        # Одна вставка вместо отдельной раскладки на каждое сообщение;
+        # перерисовка отключена до конца вставки и первой порции раскладки
+        self.messages_view.setUpdatesEnabled(False)
         try:
-            # Попытка загрузить историю из файла
-            import asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.llm._load_chat_history())
-            loop.close()
-            
-            # Восстановление сообщений в UI
-            if self.llm.chat_history:
-                for msg in self.llm.chat_history:
-                    role = msg.get('role', '')
-                    parts = msg.get('parts', [])
-                    
-                    if role == 'user':
-                        # Извлечение текста из частей
-                        text_parts = [p for p in parts if isinstance(p, str)]
-                        if text_parts:
-                            text = '\n'.join(text_parts)
-                            self._add_message_to_ui(text, is_user=True)
-                    elif role == 'model':
-                        text_parts = [p for p in parts if isinstance(p, str)]
-                        if text_parts:
-                            text = '\n'.join(text_parts)
-                            self._add_message_to_ui(text, is_user=False)
-                
-                FreeCAD.Console.PrintMessage(
-                    f'[AIEngineer] Loaded {len(self.llm.chat_history)} messages from history\n'
-                )
-        except Exception as ex:
-            FreeCAD.Console.PrintError(f'[AIEngineer] Failed to load chat history: {ex}\n')
+            self._model.extend(_turns_to_rows(self.llm.chat_history))
+            self.messages_view.doItemsLayout()
+        finally:
+            self.messages_view.setUpdatesEnabled(True)
+        
+        FreeCAD.Console.PrintMessage(
+            f'[AIEngineer] Loaded {len(self.llm.chat_history)} messages from history\n'
+        )
 
     def _open_settings(self) -> None:
         """Функция открывает диалог настроек для изменения модели."""
@@ -351,7 +714,14 @@ class ChatDialog(QtGui.QDialog):
                     )
                     
                     if response == QtGui.QMessageBox.Yes:
-                        self._initialize_ai()
+                        if self.llm is not None and self.llm.api_key == get_api_key():
+                            # Ключ не менялся — клиент переключается на новую модель на месте.
+                            # Сеанс изменяется только в фоновом цикле, где идут запросы
+                            get_loop().call_soon_threadsafe(self.llm.set_model, new_model)
+                            self.current_model = new_model
+                            self.model_label.setText(f'Model: {new_model}')
+                        else:
+                            self._initialize_ai()
                         self._clear_chat()
                         
         except Exception as ex:
@@ -363,12 +733,16 @@ class ChatDialog(QtGui.QDialog):
             )
 
     def _refresh_image_list(self) -> None:
-        """Функция обновляет список доступных изображений."""
+        """Функция обновляет список доступных изображений, если он изменился."""
+        images: List[str] = get_image_files()
+        if images == self._image_files:
+            return
+        self._image_files = images
+
         current_text: str = self.image_combo.currentText()
+        self.image_combo.blockSignals(True)
         self.image_combo.clear()
         self.image_combo.addItem('No image')
-        
-        images: List[str] = get_image_files()
         self.image_combo.addItems(images)
         
         # Восстановление выбранного изображения
@@ -376,10 +750,33 @@ class ChatDialog(QtGui.QDialog):
             index: int = self.image_combo.findText(current_text)
             if index >= 0:
                 self.image_combo.setCurrentIndex(index)
+        self.image_combo.blockSignals(False)
+        self._on_image_changed(self.image_combo.currentIndex())
+
+    def _on_image_changed(self, index: int) -> None:
+        """
+        Функция запоминает путь и MIME-тип выбранного изображения
+        и запускает его фоновое чтение.
+
+        Args:
+            index (int): Индекс выбранного элемента списка изображений.
+        """
+        if index <= 0:
+            self.current_image = None
+            self._current_mime = None
+            self._image_future = None
+            return
+        self.current_image = AI_DATA_DIR / self.image_combo.itemText(index)
+        self._current_mime = IMAGE_MIME_TYPES.get(
+            self.current_image.suffix.lower(), 'application/octet-stream'
+        )
+        # Файл читается заранее, пока пользователь набирает сообщение
+        self._image_future = run_in_thread(_load_image, self.current_image)
 
     def _clear_chat(self) -> None:
         """Функция очищает историю чата."""
-        if not self.llm or not self.llm.chat_history:
+        # Во время ответа история еще изменяется потоковым запросом
+        if self._busy or not self.llm or not self.llm.chat_history:
             return
         
         response = QtGui.QMessageBox.question(
@@ -390,18 +787,49 @@ class ChatDialog(QtGui.QDialog):
         )
         
         if response == QtGui.QMessageBox.Yes:
-            # Очистка UI
-            while self.messages_layout.count() > 1:
-                item = self.messages_layout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
+            # Очистка UI: строки модели — легкие записи, виджетов для повторного
+            # использования нет; освобождаются только размеры удаленных сообщений
+            self._model.clear()
+            clear_measure_cache()
             
-            # Очистка истории в модели
-            if self.llm:
-                self.llm.clear_history()
+            # Очистка истории в модели — в фоновом цикле, под блокировкой записи журнала
+            submit(self.llm.clear_history())
             
             FreeCAD.Console.PrintMessage('[AIEngineer] Chat history cleared\n')
 
+    def _export_history(self) -> None:
+        """Функция запускает экспорт полной истории чата (журнала) в JSON файл."""
+        if not self.llm or not self.llm.loaded_turns:
+            return
+        llm = self.llm
+
+        def _done(future) -> None:
+            try:
+                ok: bool = future.result()
+            except Exception as ex:
+                FreeCAD.Console.PrintError(f'[AIEngineer] Failed to export chat history: {ex}\n')
+                ok = False
+            try:
+                self.history_exported.emit(ok, str(llm.history_json_file))
+            except RuntimeError:
+                # Диалог уже удален
+                pass
+
+        submit(llm.export_history()).add_done_callback(_done)
+
+    def _on_history_exported(self, ok: bool, path: str) -> None:
+        """
+        Функция сообщает о результате экспорта истории (выполняется в потоке GUI).
+
+        Args:
+            ok (bool): Экспорт выполнен успешно.
+            path (str): Путь к JSON файлу.
+        """
+        if ok:
+            QtGui.QMessageBox.information(self, 'Export', f'Chat history exported to:\n{path}')
+        else:
+            QtGui.QMessageBox.critical(self, 'Export Error', 'Failed to export chat history.')
+
     def _add_message_to_ui(self, text: str, is_user: bool = True) -> None:
         """
         Функция добавляет сообщение в UI.
@@ -410,17 +838,59 @@ class ChatDialog(QtGui.QDialog):
             text (str): Текст сообщения.
             is_user (bool): True если от пользователя, False если от AI.
         """
-        message_widget = ChatMessage(text, is_user)
-        self.messages_layout.insertWidget(self.messages_layout.count() - 1, message_widget)
-        
-        # Прокрутка вниз
-        QtCore.QTimer.singleShot(100, lambda: self.messages_scroll.verticalScrollBar().setValue(
-            self.messages_scroll.verticalScrollBar().maximum()
-        ))
+        self._model.append(text, is_user)
+
+    def _on_scroll_range_changed(self, _minimum: int, maximum: int) -> None:
+        """
+        Функция прокручивает список к последнему сообщению при росте содержимого.
+
+        Args:
+            _minimum (int): Минимум полосы прокрутки.
+            maximum (int): Новый максимум полосы прокрутки.
+        """
+        scroll_bar = self.messages_view.verticalScrollBar()
+        if self._scroll_anchor is not None:
+            # После вставки ранних сообщений видимая область остается на месте
+            scroll_bar.setValue(maximum - self._scroll_anchor)
+            self._scroll_anchor = None
+        elif self._autoscroll:
+            scroll_bar.setValue(maximum)
+
+    def _on_scroll_value_changed(self, value: int) -> None:
+        """
+        Функция включает автопрокрутку, только если список прокручен до конца,
+        и подгружает ранние сообщения при прокрутке к началу.
+
+        Args:
+            value (int): Текущее положение полосы прокрутки.
+        """
+        scroll_bar = self.messages_view.verticalScrollBar()
+        self._autoscroll = value >= scroll_bar.maximum()
+        if value == scroll_bar.minimum() and scroll_bar.maximum() > 0:
+            self._load_older_messages()
+
+    def _load_older_messages(self) -> None:
+        """Функция подгружает из журнала сообщения, предшествующие показанным."""
+        # Во время ответа номер строки потокового сообщения не должен сдвигаться
+        if self.llm is None or self._busy or self._history_exhausted:
+            return
+        rows: List[Tuple[str, bool]] = _turns_to_rows(self.llm.load_older_turns(HISTORY_PAGE_TURNS))
+        if not rows:
+            self._history_exhausted = True
+            return
+        scroll_bar = self.messages_view.verticalScrollBar()
+        self._scroll_anchor = scroll_bar.maximum() - scroll_bar.value()
+        self._model.prepend(rows)
+
+    def _copy_selected_message(self) -> None:
+        """Функция копирует текст выбранного сообщения в буфер обмена."""
+        index = self.messages_view.currentIndex()
+        if index.isValid():
+            QtGui.QApplication.clipboard().setText(index.data(QtCore.Qt.DisplayRole))
 
     def _send_message(self) -> None:
         """Функция отправляет сообщение в AI."""
-        if not self.llm:
+        if not self.llm and not self._initializing:
             QtGui.QMessageBox.warning(
                 self,
                 'Not Initialized',
@@ -434,105 +904,256 @@ class ChatDialog(QtGui.QDialog):
             QtGui.QMessageBox.warning(self, 'Warning', 'Please enter a message.')
             return
         
-        # Отключение UI во время обработки
-        self.send_btn.setEnabled(False)
-        self.input_text.setEnabled(False)
-        self.loading_label.show()
-        
-        # Добавление сообщения пользователя в UI
+        # Добавление сообщения пользователя в UI и в очередь отправки
+        # (собственное сообщение всегда возвращает прокрутку к концу)
+        self._autoscroll = True
         self._add_message_to_ui(message, is_user=True)
         self.input_text.clear()
+        self._pending_msgs.append(message)
+        self._flush_timer.start()
+
+    def _flush_batch(self) -> None:
+        """
+        Функция отправляет накопленные сообщения одним запросом.
+
+        Сообщения, отправленные подряд в пределах BATCH_WINDOW_MS,
+        объединяются через BATCH_SEPARATOR — один сетевой запрос вместо N.
+        """
+        # До завершения инициализации сообщения остаются в очереди
+        if not self._pending_msgs or self.llm is None:
+            return
         
-        # Проверка наличия прикрепленного изображения
-        selected_image: str = self.image_combo.currentText()
-        image_path: Optional[Path] = None
+        message: str = BATCH_SEPARATOR.join(self._pending_msgs)
+        self._pending_msgs.clear()
         
-        if selected_image and selected_image != 'No image':
-            image_path = AI_DATA_DIR / selected_image
-            FreeCAD.Console.PrintMessage(f'[AIEngineer] Attaching image: {selected_image}\n')
+        # Отключение UI во время обработки
+        self._cancel = False
+        self._stream_row = None
+        self._set_busy(True)
+        
+        # Прикрепленное изображение уже определено при выборе в списке
+        image_path: Optional[Path] = self.current_image
+        if image_path:
+            FreeCAD.Console.PrintMessage(f'[AIEngineer] Attaching image: {image_path.name}\n')
         
-        # Отправка запроса
-        QtCore.QTimer.singleShot(10, lambda: self._process_message(message, image_path))
+        # Запрос, превысивший лимит при оценке, сокращается за счет старых сообщений
+        trim_history: bool = self._over_budget
+        self._over_budget = False
+        
+        # Отправка запроса в фоновом цикле asyncio — UI не блокируется
+        future = submit(self._process_message(
+            message, image_path, self._current_mime, self._image_future, trim_history
+        ))
+        future.add_done_callback(self._on_future_done)
 
-    def _process_message(self, message: str, image_path: Optional[Path] = None) -> None:
+    async def _process_message(
+        self,
+        message: str,
+        image_path: Optional[Path] = None,
+        mime_type: Optional[str] = None,
+        image_future=None,
+        trim_history: bool = False
+    ) -> Optional[str]:
         """
         Функция обрабатывает сообщение и использует метод chat для сохранения истории.
 
+        Выполняется в фоновом цикле asyncio, поэтому не обращается к виджетам.
+
         Args:
             message (str): Текст сообщения.
             image_path (Optional[Path]): Путь к изображению.
+            mime_type (Optional[str]): MIME-тип изображения.
+            image_future (Optional[concurrent.futures.Future]): Чтение изображения,
+                запущенное при его выборе.
+            trim_history (bool): Сократить контекст до лимита max_prompt_tokens.
+
+        Returns:
+            Optional[str]: Ответ модели или None.
+        """
+        # Изображение прочитано заранее; перечитывается, только если файл изменился
+        image: Optional[ImagePayload] = None
+        if image_path and image_future is not None:
+            image = await asyncio.wrap_future(image_future)
+            if image is not None and _image_stamp(image_path) != image[0]:
+                image = await asyncio.to_thread(_load_image, image_path)
+        
+        # Изображение отправляется в тот же сеанс чата, что и текст: у модели
+        # один контекст, история ведется методом chat_stream
+        attachments: Optional[List[Dict]] = None
+        if image:
+            attachments = [{'mime_type': mime_type, 'data': image[1]}]
+        
+        if trim_history:
+            await self.llm.fit_history(message, self._max_prompt_tokens)
+        
+        # Потоковый чат: фрагменты уходят в поток GUI через сигнал, история сохраняется
+        response: Optional[str] = await self.llm.chat_stream(
+            message,
+            chat_session_name=self.chat_session_name,
+            attachments=attachments,
+            on_chunk=self.chunk_received.emit,
+            is_cancelled=lambda: self._cancel,
+            on_retry=self.retrying.emit
+        )
+        
+        return response
+
+    def _estimate_tokens(self) -> None:
+        """Функция запускает оценку размера запроса для текущего ввода."""
+        text: str = self.input_text.toPlainText().strip()
+        if not text or self.llm is None:
+            self.token_label.setText('')
+            return
+        
+        key: tuple = (
+            hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(),
+            self.llm.loaded_turns,
+        )
+        cached: Optional[int] = self._token_cache.get(key)
+        if cached is not None:
+            self._on_tokens_counted(key, cached)
+            return
+        
+        def _done(future) -> None:
+            try:
+                count: Optional[int] = future.result()
+                if count is not None:
+                    self.tokens_counted.emit(key, count)
+            except RuntimeError:
+                # Диалог уже закрыт и удален
+                pass
+        
+        submit(self.llm.count_prompt_tokens(text)).add_done_callback(_done)
+
+    def _on_tokens_counted(self, key: tuple, count: int) -> None:
+        """
+        Функция показывает оценку размера запроса и отмечает превышение лимита.
+
+        Args:
+            key (tuple): Ключ кэша оценки.
+            count (int): Количество токенов.
+        """
+        self._token_cache[key] = count
+        self._over_budget = count > self._max_prompt_tokens
+        self.token_label.setText(f'~{count:,} tokens')
+        self.send_btn.setToolTip(
+            'Prompt too long — history will be truncated' if self._over_budget else ''
+        )
+
+    def _on_future_done(self, future) -> None:
+        """
+        Функция передает результат фоновой задачи в поток GUI через сигналы.
+
+        Args:
+            future (concurrent.futures.Future): Завершенная задача.
         """
         try:
-            response: Optional[str] = None
-            
-            # Использование метода chat для сохранения истории
-            if image_path and image_path.exists():
-                # Для изображений используем describe_image, но добавляем в историю вручную
-                mime_type: str = 'image/jpeg' if image_path.suffix.lower() in ['.jpg', '.jpeg'] else 'image/png'
-                response = self.llm.describe_image(
-                    image=image_path,
-                    mime_type=mime_type,
-                    prompt=message
-                )
-                
-                # Добавление в историю вручную, так как describe_image не использует chat
-                if response:
-                    self.llm.chat_history.append({'role': 'user', 'parts': [message, str(image_path)]})
-                    self.llm.chat_history.append({'role': 'model', 'parts': [response]})
-                    
-                    # Сохранение истории
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self.llm._save_chat_history())
-                    loop.close()
-            else:
-                # Использование метода chat, который автоматически сохраняет историю
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                response = loop.run_until_complete(
-                    self.llm.chat(message, chat_session_name=self.chat_session_name)
-                )
-                loop.close()
-            
-            # Обработка ответа
-            if response:
+            try:
+                response = future.result()
+            except Exception as ex:
+                self.request_failed.emit(str(ex))
+                return
+            self.response_ready.emit(response)
+        except RuntimeError:
+            # Диалог уже закрыт и удален — результат некому показать
+            pass
+
+    def _on_chunk(self, piece: str) -> None:
+        """
+        Функция дописывает фрагмент потокового ответа в сообщение модели.
+
+        Args:
+            piece (str): Фрагмент текста.
+        """
+        if self._stream_row is None:
+            self._stream_row = self._model.append(piece, False)
+        else:
+            self._model.append_text(self._stream_row, piece)
+            # Высота строки растет вместе с текстом — представление пересчитывает раскладку
+            self.messages_view.itemDelegate().sizeHintChanged.emit(
+                self._model.index(self._stream_row)
+            )
+
+    def _on_retrying(self, attempt: int, attempts: int) -> None:
+        """
+        Функция показывает ход повторных попыток запроса.
+
+        Args:
+            attempt (int): Номер текущей попытки.
+            attempts (int): Всего попыток.
+        """
+        self.loading_label.setText(f'⏳ Retrying ({attempt}/{attempts})...')
+
+    def _stop_response(self) -> None:
+        """Функция прерывает получение потокового ответа."""
+        self._cancel = True
+        self.stop_btn.setEnabled(False)
+
+    def _on_response(self, response: Optional[str]) -> None:
+        """
+        Функция отображает ответ модели (выполняется в потоке GUI).
+
+        Args:
+            response (Optional[str]): Ответ модели.
+        """
+        stream_row: Optional[int] = self._stream_row
+        self._stream_row = None
+        if response:
+            if stream_row is None:
                 self._add_message_to_ui(response, is_user=False)
-                FreeCAD.Console.PrintMessage('[AIEngineer] Response received and saved to history\n')
             else:
-                QtGui.QMessageBox.warning(
-                    self,
-                    'No Response',
-                    'AI did not return a response. Please try again.'
-                )
-            
-        except Exception as ex:
-            FreeCAD.Console.PrintError(f'[AIEngineer] Chat error: {ex}\n')
-            QtGui.QMessageBox.critical(
+                self._model.set_text(stream_row, response)
+            FreeCAD.Console.PrintMessage('[AIEngineer] Response received and saved to history\n')
+        elif self._cancel:
+            FreeCAD.Console.PrintMessage('[AIEngineer] Response stopped\n')
+        else:
+            QtGui.QMessageBox.warning(
                 self,
-                'Error',
-                f'An error occurred:\n{str(ex)}'
+                'No Response',
+                'AI did not return a response. Please try again.'
             )
-        
-        finally:
-            # Включение UI
-            self.send_btn.setEnabled(True)
-            self.input_text.setEnabled(True)
-            self.loading_label.hide()
+        self._set_busy(False)
+
+    def _on_request_failed(self, error: str) -> None:
+        """
+        Функция сообщает об ошибке запроса (выполняется в потоке GUI).
+
+        Args:
+            error (str): Текст ошибки.
+        """
+        FreeCAD.Console.PrintError(f'[AIEngineer] Chat error: {error}\n')
+        QtGui.QMessageBox.critical(
+            self,
+            'Error',
+            f'An error occurred:\n{error}'
+        )
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool) -> None:
+        """
+        Функция переключает UI в режим ожидания ответа и обратно.
+
+        Args:
+            busy (bool): True — запрос выполняется.
+        """
+        self._busy = busy
+        self.send_btn.setEnabled(not busy)
+        self.input_text.setEnabled(not busy)
+        # Очистка и смена модели изменяют сеанс, который использует текущий запрос
+        self.clear_btn.setEnabled(not busy)
+        self.settings_btn.setEnabled(not busy)
+        self.loading_label.setText('⏳ Processing...')
+        self.loading_label.setVisible(busy)
+        self.stop_btn.setVisible(busy)
+        self.stop_btn.setEnabled(busy)
+        if not busy:
             self.input_text.setFocus()
 
     def _on_close(self) -> None:
-        """Функция сохраняет историю при закрытии диалога."""
-        if self.llm and self.llm.chat_history:
-            try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self.llm._save_chat_history())
-                loop.close()
-                FreeCAD.Console.PrintMessage('[AIEngineer] Chat history saved on close\n')
-            except Exception as ex:
-                FreeCAD.Console.PrintError(f'[AIEngineer] Failed to save history on close: {ex}\n')
+        """Функция дописывает в журнал еще не сохраненные сообщения при закрытии диалога."""
+        if self.llm:
+            # Сообщения уже в журнале или в очереди отложенной записи —
+            # при закрытии очередь сбрасывается сразу, без ожидания паузы
+            submit(self.llm.flush_history()).add_done_callback(_log_close_save)
         
-        self.accept()
\ No newline at end of file
+        self.accept()
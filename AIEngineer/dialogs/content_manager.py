@@ -12,13 +12,13 @@
 
 import os
 from pathlib import Path
-from PySide import QtGui
+from PySide import QtGui, QtCore
 from ..utils import get_image_files, get_text_files, AI_DATA_DIR, safe_remove
-from ..project_manager import AIProject
+from ..project_manager import get_project
+from ._list_sync import sync_list_items
+from .text_editor import TextEditorDialog
 import FreeCAD
 
-project = AIProject()
-
 
 class ContentManagerDialog(QtGui.QDialog):
     """Основной диалог управления контентом."""
@@ -29,6 +29,10 @@ class ContentManagerDialog(QtGui.QDialog):
         self.setWindowTitle('AI Engineer — Content Manager')
         self.resize(700, 500)
 
+        # Отображаемые элементы списков по имени файла
+        self._shown_images: dict[str, QtGui.QListWidgetItem] = {}
+        self._shown_texts: dict[str, QtGui.QListWidgetItem] = {}
+
         self.tabs = QtGui.QTabWidget()
         self.image_tab = self.create_image_tab()
         self.text_tab = self.create_text_tab()
@@ -43,6 +47,20 @@ class ContentManagerDialog(QtGui.QDialog):
         layout.addWidget(close_btn)
         self.setLayout(layout)
 
+        # Списки обновляются только при фактическом изменении каталога данных
+        self._watcher = QtCore.QFileSystemWatcher([str(AI_DATA_DIR)], self)
+        self._watcher.directoryChanged.connect(self._on_data_dir_changed)
+
+    def _on_data_dir_changed(self, _path: str) -> None:
+        """
+        Функция обновляет списки при изменении содержимого AI_DATA_DIR.
+
+        Args:
+            _path (str): Путь к измененному каталогу.
+        """
+        self.refresh_image_list()
+        self.refresh_text_list()
+
     def create_image_tab(self) -> QtGui.QWidget:
         """Функция создает вкладку для управления изображениями."""
         widget = QtGui.QWidget()
@@ -93,23 +111,21 @@ class ContentManagerDialog(QtGui.QDialog):
 
     def refresh_image_list(self) -> None:
         """Функция обновляет список изображений."""
-        self.image_list.clear()
-        for f in get_image_files():
-            item = QtGui.QListWidgetItem(f)
-            if project and project.is_image_linked(f):
-                item.setForeground(QtGui.QColor('green'))
-            self.image_list.addItem(item)
+        sync_list_items(
+            self.image_list,
+            self._shown_images,
+            get_image_files(),
+            get_project().linked_images_snapshot().__contains__
+        )
 
     def refresh_text_list(self) -> None:
         """Функция обновляет список текстовых файлов."""
-        self.text_list.clear()
-        for f in get_text_files():
-            self.text_list.addItem(f)
+        sync_list_items(self.text_list, self._shown_texts, get_text_files())
 
     def link_image(self) -> None:
         """Функция связывает выбранное изображение с текстом."""
         items = self.image_list.selectedItems()
-        if not items or project is None:
+        if not items:
             return
         image_file = items[0].text()
         text_files = get_text_files()
@@ -120,16 +136,17 @@ class ContentManagerDialog(QtGui.QDialog):
             self, 'Link Text', 'Select text file:', text_files, 0, False
         )
         if ok and text_file:
-            project.link_text_to_image(image_file, text_file)
+            get_project().link_text_to_image(image_file, text_file)
             FreeCAD.Console.PrintMessage(f'[AIEngineer] Linked: {image_file} ↔ {text_file}\n')
             self.refresh_image_list()
 
     def unlink_image(self) -> None:
         """Функция отвязывает выбранное изображение от текста."""
         items = self.image_list.selectedItems()
-        if not items or project is None:
+        if not items:
             return
         image_file = items[0].text()
+        project = get_project()
         if project.is_image_linked(image_file):
             project.unlink_image(image_file)
             FreeCAD.Console.PrintMessage(f'[AIEngineer] Unlinked: {image_file}\n')
@@ -142,10 +159,8 @@ class ContentManagerDialog(QtGui.QDialog):
             return
         filename = items[0].text()
         filepath = AI_DATA_DIR / filename
-        from .text_editor import TextEditorDialog
         dialog = TextEditorDialog(filepath)
         dialog.exec_()
-        self.refresh_text_list()
 
     def delete_selected_text(self) -> None:
         """Функция удаляет выбранный текстовый файл."""
@@ -160,10 +175,8 @@ class ContentManagerDialog(QtGui.QDialog):
             return
 
         # Отвязывание от изображений
-        if project:
-            project.unlink_text(filename)
+        get_project().unlink_text(filename)
 
         filepath = AI_DATA_DIR / filename
         if safe_remove(filepath):
-            FreeCAD.Console.PrintMessage(f'[AIEngineer] Deleted: {filename}\n')
-            self.refresh_text_list()
\ No newline at end of file
+            FreeCAD.Console.PrintMessage(f'[AIEngineer] Deleted: {filename}\n')
\ No newline at end of file
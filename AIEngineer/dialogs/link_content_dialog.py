@@ -8,10 +8,10 @@ import AIEngineer
 
 
 from PySide import QtGui
+import FreeCAD
 from ..utils import get_image_files, get_text_files
-from ..project_manager import AIProject
-
-project = AIProject()  # предполагается, что инициализация безопасна
+from ..project_manager import get_project
+from ._list_sync import sync_list_items
 
 class LinkContentDialog(QtGui.QDialog):
     """Простой диалог: слева изображения, справа тексты, кнопка → посередине."""
@@ -21,6 +21,8 @@ class LinkContentDialog(QtGui.QDialog):
         self.setWindowTitle("Link Image and Text")
         self.resize(600, 400)
 
+        self._shown_images: dict[str, QtGui.QListWidgetItem] = {}
+        self._shown_texts: dict[str, QtGui.QListWidgetItem] = {}
         self.image_list = QtGui.QListWidget()
         self.text_list = QtGui.QListWidget()
         self.refresh_lists()
@@ -44,17 +46,13 @@ class LinkContentDialog(QtGui.QDialog):
         self.setLayout(main_layout)
 
     def refresh_lists(self) -> None:
-        self.image_list.clear()
-        self.text_list.clear()
-
-        for f in get_image_files():
-            item = QtGui.QListWidgetItem(f)
-            if project and project.is_image_linked(f):
-                item.setForeground(QtGui.QColor("green"))
-            self.image_list.addItem(item)
-
-        for f in get_text_files():
-            self.text_list.addItem(f)
+        sync_list_items(
+            self.image_list,
+            self._shown_images,
+            get_image_files(),
+            get_project().linked_images_snapshot().__contains__
+        )
+        sync_list_items(self.text_list, self._shown_texts, get_text_files())
 
     def link_selected(self) -> None:
         img_items = self.image_list.selectedItems()
@@ -65,8 +63,7 @@ class LinkContentDialog(QtGui.QDialog):
 
         image_file = img_items[0].text()
         text_file = txt_items[0].text()
-        project.link_text_to_image(image_file, text_file)
+        get_project().link_text_to_image(image_file, text_file)
 
-        from FreeCAD import Console
-        Console.PrintMessage(f"[AIEngineer] Linked: {image_file} ↔ {text_file}\n")
+        FreeCAD.Console.PrintMessage(f"[AIEngineer] Linked: {image_file} ↔ {text_file}\n")
         self.refresh_lists()
\ No newline at end of file
@@ -10,11 +10,139 @@
 .. module:: AIEngineer.dialogs.text_editor
 """
 
+import codecs
 import os
 from pathlib import Path
-from PySide import QtGui
+from typing import BinaryIO, Iterable, Iterator, Optional
+from PySide import QtGui, QtCore
+import FreeCAD
 from ..utils import AI_DATA_DIR
 
+# Файлы больше этого размера загружаются в редактор порциями, не блокируя GUI
+LARGE_FILE_BYTES: int = 256 * 1024
+LOAD_CHUNK_BYTES: int = 64 * 1024
+
+# Имена новых промптов: ai_prompt_<номер>.md
+PROMPT_BASE_NAME: str = 'ai_prompt'
+PROMPT_EXT: str = '.md'
+_PROMPT_NAME_TEMPLATE: str = f'{PROMPT_BASE_NAME}_{{}}{PROMPT_EXT}'
+
+# Занятые имена промптов и первый свободный номер; действительны, пока не изменился mtime каталога
+_prompt_names_cache: dict = {'mtime': None, 'names': set(), 'next': 1}
+
+# Системный моноширинный шрифт (определяется один раз при первом открытии)
+_FIXED_FONT: Optional[QtGui.QFont] = None
+
+
+def _fixed_font() -> QtGui.QFont:
+    """
+    Функция возвращает системный моноширинный шрифт редактора.
+
+    Returns:
+        QtGui.QFont: Шрифт, общий для всех экземпляров диалога.
+    """
+    global _FIXED_FONT
+    if _FIXED_FONT is None:
+        _FIXED_FONT = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
+    return _FIXED_FONT
+
+
+def _advance_prompt_counter(counter: int) -> None:
+    """
+    Функция сохраняет в кэше первый свободный номер промпта, начиная с counter.
+
+    Args:
+        counter (int): Номер, с которого начинается поиск.
+    """
+    names: set[str] = _prompt_names_cache['names']
+    while _PROMPT_NAME_TEMPLATE.format(counter) in names:
+        counter += 1
+    _prompt_names_cache['next'] = counter
+
+
+def _next_prompt_path() -> Path:
+    """
+    Функция возвращает путь к первому свободному файлу ai_prompt_<N>.md в AI_DATA_DIR.
+
+    Каталог читается одним scandir и только если его mtime изменился
+    с прошлого вызова; иначе номер берется из кэша.
+
+    Returns:
+        Path: Путь к новому файлу промпта.
+    """
+    mtime: int = os.stat(AI_DATA_DIR).st_mtime_ns
+    if mtime != _prompt_names_cache['mtime']:
+        prefix: str = f'{PROMPT_BASE_NAME}_'
+        with os.scandir(AI_DATA_DIR) as it:
+            _prompt_names_cache['names'] = {
+                entry.name for entry in it
+                if entry.name.startswith(prefix) and entry.name.endswith(PROMPT_EXT)
+            }
+        _prompt_names_cache['mtime'] = mtime
+        _advance_prompt_counter(1)
+    return AI_DATA_DIR / _PROMPT_NAME_TEMPLATE.format(_prompt_names_cache['next'])
+
+
+def _remember_prompt(filepath: Path) -> None:
+    """
+    Функция учитывает в кэше только что сохраненный промпт, чтобы следующее
+    сохранение не перечитывало каталог из-за собственной записи.
+
+    Args:
+        filepath (Path): Путь к сохраненному файлу.
+    """
+    if _prompt_names_cache['mtime'] is None or filepath.parent != AI_DATA_DIR:
+        return
+    _prompt_names_cache['names'].add(filepath.name)
+    _prompt_names_cache['mtime'] = os.stat(AI_DATA_DIR).st_mtime_ns
+    _advance_prompt_counter(_prompt_names_cache['next'])
+
+
+def _document_chunks(doc: QtGui.QTextDocument) -> Iterator[bytes]:
+    """
+    Функция отдает текст документа построчно в UTF-8, не собирая его в одну строку.
+
+    Args:
+        doc (QtGui.QTextDocument): Документ редактора.
+
+    Yields:
+        bytes: Закодированная строка документа или разделитель строк.
+    """
+    block = doc.firstBlock()
+    while block.isValid():
+        yield block.text().encode('utf-8')
+        block = block.next()
+        if block.isValid():
+            yield b'\n'
+
+
+def _atomic_write(filepath: Path, chunks: Iterable[bytes]) -> None:
+    """
+    Функция атомарно заменяет содержимое файла.
+
+    Данные пишутся во временный файл рядом с целевым и после fsync
+    подменяют его через os.replace: при сбое во время записи прежнее
+    содержимое остается целым.
+
+    Args:
+        filepath (Path): Путь к файлу.
+        chunks (Iterable[bytes]): Новое содержимое, по частям.
+
+    Raises:
+        OSError: Ошибка записи (временный файл удаляется).
+    """
+    tmp: Path = filepath.with_name(filepath.name + '.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filepath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
 
 class TextEditorDialog(QtGui.QDialog):
     """Редактор текста для создания или изменения промптов."""
@@ -31,26 +159,44 @@ class TextEditorDialog(QtGui.QDialog):
         self.setWindowTitle('Edit Text' if filepath else 'New Text')
         self.resize(600, 500)
 
-        self.text_edit = QtGui.QTextEdit()
-        self.text_edit.setAcceptRichText(False)
-        self.text_edit.setFont(QtGui.QFont('Courier', 10))
+        # Виджеты создаются при первом показе диалога (см. showEvent)
+        self._built: bool = False
 
-        if filepath and filepath.exists():
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    self.text_edit.setPlainText(f.read())
-            except Exception as ex:
-                QtGui.QMessageBox.critical(self, 'Load Error', str(ex))
-                return
+        # Состояние порционной загрузки большого файла
+        self._load_file: Optional[BinaryIO] = None
+        self._load_decoder = None
+        self._load_timer: Optional[QtCore.QTimer] = None
 
-        save_btn = QtGui.QPushButton('Save')
+    def showEvent(self, event) -> None:
+        """
+        Функция строит интерфейс при первом показе диалога и запускает загрузку файла.
+
+        Args:
+            event (QShowEvent): Событие показа.
+        """
+        if not self._built:
+            self._built = True
+            self._build_ui()
+            # Файл читается после появления окна
+            QtCore.QTimer.singleShot(0, self._load_contents)
+        super().showEvent(event)
+
+    def _build_ui(self) -> None:
+        """Функция создает виджеты редактора."""
+        # Простой текстовый документ: раскладка по строкам, без движка rich text
+        self.text_edit = QtGui.QPlainTextEdit()
+        self.text_edit.setFont(_fixed_font())
+
+        self.save_btn = QtGui.QPushButton('Save')
         cancel_btn = QtGui.QPushButton('Cancel')
-        save_btn.clicked.connect(self.save_text)
+        self.save_btn.clicked.connect(self.save_text)
+        # До загрузки файла сохранение пустого редактора перезаписало бы его
+        self.save_btn.setEnabled(not self.filepath)
         cancel_btn.clicked.connect(self.reject)
 
         btn_layout = QtGui.QHBoxLayout()
         btn_layout.addStretch()
-        btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(self.save_btn)
         btn_layout.addWidget(cancel_btn)
 
         layout = QtGui.QVBoxLayout()
@@ -59,29 +205,123 @@ class TextEditorDialog(QtGui.QDialog):
         layout.addLayout(btn_layout)
         self.setLayout(layout)
 
+    def _load_contents(self) -> None:
+        """Функция загружает редактируемый файл в редактор."""
+        filepath: Optional[Path] = self.filepath
+        if not filepath or not self.isVisible():
+            return
+        try:
+            if filepath.exists():
+                if filepath.stat().st_size > LARGE_FILE_BYTES:
+                    # Сохранение включится по окончании порционной загрузки
+                    self._start_chunked_load(filepath)
+                    return
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    text: str = f.read()
+                self.text_edit.setUpdatesEnabled(False)
+                try:
+                    self.text_edit.setPlainText(text)
+                finally:
+                    self.text_edit.setUpdatesEnabled(True)
+        except Exception as ex:
+            # Сохранение остается отключенным: пустой редактор не должен перезаписать файл
+            QtGui.QMessageBox.critical(self, 'Load Error', str(ex))
+            return
+        self.save_btn.setEnabled(True)
+
+    def _start_chunked_load(self, filepath: Path) -> None:
+        """
+        Функция начинает загрузку большого файла порциями по LOAD_CHUNK_BYTES.
+
+        Порции читаются по таймеру в цикле событий; до конца загрузки
+        редактор доступен только для чтения, а сохранение отключено,
+        чтобы неполный текст не перезаписал файл.
+
+        Args:
+            filepath (Path): Путь к файлу.
+        """
+        self._load_file = open(filepath, 'rb')
+        self._load_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text_edit.setReadOnly(True)
+        self.save_btn.setEnabled(False)
+        # Загружаемый текст не должен попадать в стек отмены
+        self.text_edit.document().setUndoRedoEnabled(False)
+
+        self._load_timer = QtCore.QTimer(self)
+        self._load_timer.setInterval(0)
+        self._load_timer.timeout.connect(self._load_next_chunk)
+        self._load_timer.start()
+
+    def _load_next_chunk(self) -> None:
+        """Функция читает и добавляет в конец документа очередную порцию файла."""
+        try:
+            data: bytes = self._load_file.read(LOAD_CHUNK_BYTES)
+            text: str = self._load_decoder.decode(data, final=not data)
+        except Exception as ex:
+            self._finish_chunked_load()
+            QtGui.QMessageBox.critical(self, 'Load Error', str(ex))
+            return
+
+        if text:
+            cursor = QtGui.QTextCursor(self.text_edit.document())
+            cursor.movePosition(QtGui.QTextCursor.End)
+            cursor.insertText(text)
+        if not data:
+            self._finish_chunked_load()
+            self.text_edit.setReadOnly(False)
+            self.save_btn.setEnabled(True)
+
+    def _finish_chunked_load(self) -> None:
+        """Функция останавливает порционную загрузку, закрывает файл и включает отмену."""
+        if self._load_timer is not None:
+            self._load_timer.stop()
+            self._load_timer = None
+        if self._load_file is not None:
+            self._load_file.close()
+            self._load_file = None
+            self.text_edit.document().setUndoRedoEnabled(True)
+
+    def done(self, result: int) -> None:
+        """
+        Функция закрывает диалог, прерывая незавершенную загрузку файла.
+
+        Args:
+            result (int): Код результата диалога.
+        """
+        self._finish_chunked_load()
+        super().done(result)
+
     def save_text(self) -> None:
         """Функция сохраняет текст в файл."""
-        text = self.text_edit.toPlainText().strip()
-        if not text:
+        doc = self.text_edit.document()
+        # Пустой документ проверяется без выгрузки текста
+        if doc.isEmpty():
             QtGui.QMessageBox.warning(self, 'Warning', 'Text is empty!')
             return
 
+        chunks: Iterable[bytes]
+        if doc.characterCount() > LARGE_FILE_BYTES:
+            # Большой документ записывается построчно, без копии всего текста в памяти
+            chunks = _document_chunks(doc)
+        else:
+            text: str = self.text_edit.toPlainText()
+            # isspace() не создает копию
+            if text.isspace():
+                QtGui.QMessageBox.warning(self, 'Warning', 'Text is empty!')
+                return
+            # strip() возвращает ту же строку, если пробелов по краям нет
+            chunks = (text.strip().encode('utf-8'),)
+
         if self.filepath:
             filepath = self.filepath
         else:
-            base_name = 'ai_prompt'
-            ext = '.md'
-            counter = 1
-            while (AI_DATA_DIR / f'{base_name}_{counter}{ext}').exists():
-                counter += 1
-            filepath = AI_DATA_DIR / f'{base_name}_{counter}{ext}'
+            filepath = _next_prompt_path()
 
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(text)
-            from FreeCAD import Console
-            Console.PrintMessage(f'[AIEngineer] Saved: {filepath}\n')
-            QtGui.QMessageBox.information(self, 'Saved', 'Text saved successfully!')
+            _atomic_write(filepath, chunks)
+            _remember_prompt(filepath)
+            # Диалог закрывается сразу; подтверждение — в консоли FreeCAD, без модального окна
+            FreeCAD.Console.PrintMessage(f'[AIEngineer] Saved: {filepath}\n')
             self.accept()
         except Exception as ex:
             QtGui.QMessageBox.critical(self, 'Save Error', str(ex))
\ No newline at end of file
@@ -10,17 +10,28 @@
 .. module:: AIEngineer.gemini
 """
 
+from __future__ import annotations
+
 import asyncio
+import contextlib
+import difflib
+import functools
+import hashlib
+import random
+import re
+import threading
 import time
 import json
-from io import IOBase
+import logging
+from io import BytesIO, IOBase
+from collections import deque
 from pathlib import Path
-from typing import Optional, Dict, List, Any, Union
+from typing import Optional, Dict, List, Any, AsyncIterator, Literal, Sequence, Tuple, Union, Callable
 from types import SimpleNamespace
 import datetime
 
 import google.generativeai as genai
-import grpc
+from google.ai import generativelanguage as glm
 
 from grpc import RpcError
 from google.api_core.exceptions import (
@@ -37,49 +48,730 @@ from google.auth.exceptions import (
 
 import FreeCAD
 
+from AIEngineer.async_loop import get_loop, submit
+from AIEngineer.rate_limit import TokenBucket
+from AIEngineer.response_cache import CacheStats, EmbeddingCache, ResponseCache, SemanticCache
 from AIEngineer.utils import (
     get_api_key,
     AI_DATA_DIR,
+    IMAGE_MIME_TYPES,
     j_dumps,
     j_loads,
+    jsonl_append,
+    jsonl_load,
+    jsonl_tail,
     get_image_bytes,
     normalize_answer,
 )
 
 # === ЛОГГЕР ДЛЯ FREECAD ===
+# Сообщение — строка или функция без аргументов, возвращающая строку.
+# Функция вызывается, только если уровень сообщения не ниже уровня логгера
+LogMessage = Union[str, Callable[[], str]]
+
+
 class MockLogger:
-    """Класс логгера для вывода сообщений в консоль FreeCAD."""
-    
-    def info(self, msg: str, *args, **kwargs) -> None:
+    """
+    Класс логгера для вывода сообщений в консоль FreeCAD.
+
+    Сообщения ниже level не форматируются и не передаются в консоль.
+
+    Атрибуты:
+        level (int): Минимальный выводимый уровень (уровни модуля logging).
+    """
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def _emit(self, level: int, label: str, print_fn: Callable[[str], None], msg: LogMessage, args: tuple) -> None:
+        """
+        Функция форматирует и выводит сообщение, если его уровень не ниже level.
+
+        Args:
+            level (int): Уровень сообщения.
+            label (str): Метка уровня в выводе.
+            print_fn (Callable[[str], None]): Функция вывода консоли FreeCAD.
+            msg (LogMessage): Сообщение или функция, возвращающая его.
+            args (tuple): Аргументы для подстановки через % (как в logging).
+        """
+        if level < self.level:
+            return
+        text: str = msg() if callable(msg) else msg
+        if args:
+            text = text % args
+        print_fn(f'[Gemini] {label}: {text}\n')
+
+    def info(self, msg: LogMessage, *args, **kwargs) -> None:
         """Функция выводит информационное сообщение."""
-        FreeCAD.Console.PrintMessage(f'[Gemini] INFO: {msg}\n')
+        self._emit(logging.INFO, 'INFO', FreeCAD.Console.PrintMessage, msg, args)
     
-    def error(self, msg: str, *args, **kwargs) -> None:
+    def error(self, msg: LogMessage, *args, **kwargs) -> None:
         """Функция выводит сообщение об ошибке."""
-        FreeCAD.Console.PrintError(f'[Gemini] ERROR: {msg}\n')
+        self._emit(logging.ERROR, 'ERROR', FreeCAD.Console.PrintError, msg, args)
     
-    def warning(self, msg: str, *args, **kwargs) -> None:
+    def warning(self, msg: LogMessage, *args, **kwargs) -> None:
         """Функция выводит предупреждение."""
-        FreeCAD.Console.PrintMessage(f'[Gemini] WARN: {msg}\n')
+        self._emit(logging.WARNING, 'WARN', FreeCAD.Console.PrintMessage, msg, args)
     
-    def debug(self, msg: str, *args, **kwargs) -> None:
+    def debug(self, msg: LogMessage, *args, **kwargs) -> None:
         """Функция выводит отладочное сообщение."""
-        FreeCAD.Console.PrintMessage(f'[Gemini] DEBUG: {msg}\n')
+        self._emit(logging.DEBUG, 'DEBUG', FreeCAD.Console.PrintLog, msg, args)
     
-    def critical(self, msg: str, *args, **kwargs) -> None:
+    def critical(self, msg: LogMessage, *args, **kwargs) -> None:
         """Функция выводит критическое сообщение."""
-        FreeCAD.Console.PrintError(f'[Gemini] CRITICAL: {msg}\n')
+        self._emit(logging.CRITICAL, 'CRITICAL', FreeCAD.Console.PrintError, msg, args)
 
 logger = MockLogger()
 
 # === КОНСТАНТЫ ===
 NETWORK_ERROR_MAX_ATTEMPTS: int = 5
 SERVICE_UNAVAILABLE_MAX_ATTEMPTS: int = 3
-INVALID_INPUT_MAX_ATTEMPTS: int = 3
-INITIAL_RETRY_SLEEP_SECONDS: int = 2
 NETWORK_RETRY_SLEEP_SECONDS: int = 120
 SERVICE_RETRY_SLEEP_SECONDS_BASE: int = 10
-QUOTA_EXHAUSTED_SLEEP_SECONDS: int = 14400
+CHAT_RETRY_MAX_ATTEMPTS: int = 5
+CHAT_RETRY_MAX_SLEEP_SECONDS: float = 60.0
+RATE_LIMIT_PER_MINUTE: int = 8
+RATE_LIMIT_BURST: int = 4
+MAX_CONCURRENT_REQUESTS: int = 2
+HISTORY_MEMORY_TURNS: int = 200
+HISTORY_SUMMARY_PROMPT: str = (
+    'Кратко перескажи приведенную часть диалога. Сохрани технические детали: '
+    'размеры, параметры, имена объектов и принятые решения.'
+)
+HISTORY_FLUSH_DELAY_SECONDS: float = 0.5
+# Оценка длины нового сообщения в токенах, когда размер истории уже известен
+CHARS_PER_TOKEN: float = 4.0
+BACKOFF_BASE_SECONDS: float = 1.0
+BACKOFF_MAX_SECONDS: float = 30.0
+BACKOFF_JITTER: float = 0.5
+QUOTA_COOLDOWN_SECONDS: float = 60.0
+EMBEDDING_MODEL: str = 'models/text-embedding-004'
+SEMANTIC_CACHE_THRESHOLD: float = 0.92
+# Почти совпадающие запросы (опечатка, знак вопроса) сравниваются по тексту без эмбеддинга
+FUZZY_MATCH_THRESHOLD: float = 0.95
+FUZZY_RECENT_ASKS: int = 256
+# Через сколько запросов ask_async сводка статистики кэшей выводится в консоль
+CACHE_STATS_LOG_INTERVAL: int = 100
+EMBEDDING_BATCH_SIZE: int = 100
+CONTEXT_CACHE_MIN_CHARS: int = 16384
+CONTEXT_CACHE_TTL_SECONDS: int = 3600
+# Через сколько секунд повторяется попытка создать кэш контекста после ошибки
+CONTEXT_CACHE_RETRY_SECONDS: int = 300
+# Предел встроенных данных запроса; изображения крупнее загружаются через File API
+INLINE_DATA_MAX_BYTES: int = 20 * 1024 * 1024
+# Файлы меньше этого размера загружаются одним запросом, без открытия сеанса resumable-загрузки
+RESUMABLE_UPLOAD_MIN_BYTES: int = 5 * 1024 * 1024
+
+# Общий для всех клиентов ограничитель частоты запросов (квота привязана к ключу API)
+_request_bucket: TokenBucket = TokenBucket(rate=RATE_LIMIT_PER_MINUTE / 60, burst=RATE_LIMIT_BURST)
+# Одновременно выполняемые запросы (потоковый ответ занимает слот до конца потока)
+_request_slots: asyncio.Semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Фоновые (flex) запросы занимают не больше MAX_CONCURRENT_REQUESTS - 1 слотов,
+# поэтому интерактивному чату всегда остается свободный слот
+ServiceTier = Literal['standard', 'flex', 'priority']
+_flex_slots: asyncio.Semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENT_REQUESTS - 1))
+
+
+def _tier_slots(service_tier: str) -> contextlib.AbstractAsyncContextManager:
+    """
+    Функция возвращает дополнительное ограничение для уровня обслуживания запроса.
+
+    Args:
+        service_tier (str): 'standard', 'flex' или 'priority'.
+
+    Returns:
+        AbstractAsyncContextManager: Семафор фоновых запросов для 'flex', иначе пустой контекст.
+    """
+    return _flex_slots if service_tier == 'flex' else contextlib.nullcontext()
+
+# Ключ, с которым сконфигурирован SDK. genai.configure сбрасывает кэш клиентов SDK
+# (и их открытые gRPC-каналы), поэтому повторно вызывается только при смене ключа
+_configured_api_key: Optional[str] = None
+_configure_lock: threading.Lock = threading.Lock()
+
+
+def _configure_api(api_key: str) -> None:
+    """
+    Функция конфигурирует Gemini SDK ключом API, если он еще не установлен.
+
+    Клиенты SDK создаются один раз и переиспользуют свои каналы (TCP/TLS)
+    во всех последующих запросах и экземплярах GoogleGenerativeAi.
+
+    Args:
+        api_key (str): Ключ API.
+    """
+    global _configured_api_key
+    with _configure_lock:
+        if api_key != _configured_api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+            # Модели запоминают клиент SDK, созданный со старым ключом
+            _shared_model.cache_clear()
+            logger.debug('Gemini API сконфигурирован с ключом API')
+
+
+@functools.lru_cache(maxsize=16)
+def _shared_model(model_name: str, system_instruction: Optional[str]) -> genai.GenerativeModel:
+    """
+    Функция возвращает общий клиент модели для пары (модель, системная инструкция).
+
+    Экземпляры GoogleGenerativeAi создаются на каждый запрос Ask AI и при
+    каждом открытии чата; клиент модели не хранит состояния диалога
+    (оно в ChatSession), поэтому его можно переиспользовать.
+
+    Args:
+        model_name (str): Имя модели Gemini.
+        system_instruction (Optional[str]): Системная инструкция.
+
+    Returns:
+        genai.GenerativeModel: Клиент модели.
+    """
+    return genai.GenerativeModel(
+        model_name=model_name,
+        system_instruction=system_instruction,
+    )
+
+
+def _run_blocking(coro: Any) -> Any:
+    """
+    Функция выполняет корутину в общем фоновом цикле и ждет ее результат.
+
+    Синхронные методы (ask, describe_images_batch) не держат собственных
+    циклов повторов: паузы выполняются в фоновом цикле, а не time.sleep
+    в вызывающем потоке.
+
+    Args:
+        coro (Coroutine): Корутина для выполнения.
+
+    Returns:
+        Any: Результат корутины.
+
+    Raises:
+        RuntimeError: Если вызвано из самого фонового цикла (ожидание заблокировало бы его).
+    """
+    try:
+        running: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None and running is get_loop():
+        coro.close()
+        raise RuntimeError('Синхронный вызов из фонового цикла AIEngineer, используйте асинхронный метод')
+    return submit(coro).result()
+
+
+def _backoff(attempt: int) -> float:
+    """
+    Функция вычисляет паузу перед повтором: экспонента с потолком и случайным разбросом.
+
+    Разброс не дает нескольким клиентам повторять запросы синхронно.
+
+    Args:
+        attempt (int): Номер попытки, начиная с 0.
+
+    Returns:
+        float: Пауза в секундах (не больше BACKOFF_MAX_SECONDS * (1 + BACKOFF_JITTER)).
+    """
+    delay: float = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** min(attempt, 32))
+    return delay * (1 + random.random() * BACKOFF_JITTER)
+
+
+# Ответ-маркер исчерпанной квоты (не кэшируется и не очищается normalize_answer)
+RESOURCE_EXHAUSTED: str = 'ResourceExhausted'
+
+# До этого момента (time.monotonic) запросы не отправляются: квота исчерпана
+_quota_blocked_until: float = 0.0
+
+# До этого момента (time.monotonic) запросы ждут: сервер попросил короткую
+# паузу (поминутный лимит), после нее запросы отправляются как обычно
+_quota_paused_until: float = 0.0
+
+
+def _quota_blocked() -> bool:
+    """
+    Функция проверяет, действует ли пауза после исчерпания квоты.
+
+    Returns:
+        bool: True, если запрос отправлять не следует.
+    """
+    return time.monotonic() < _quota_blocked_until
+
+
+def _block_quota(seconds: float = QUOTA_COOLDOWN_SECONDS) -> None:
+    """
+    Функция запрещает запросы на заданное время.
+
+    Используется, когда квота исчерпана надолго (суточный лимит или пауза
+    длиннее QUOTA_COOLDOWN_SECONDS): первый получивший ResourceExhausted
+    вызов выставляет запрет для всех экземпляров, и остальные вызовы
+    получают отказ сразу, не повторяя запрос.
+
+    Args:
+        seconds (float): Длительность паузы. По умолчанию QUOTA_COOLDOWN_SECONDS.
+    """
+    global _quota_blocked_until
+    _quota_blocked_until = time.monotonic() + seconds
+    logger.warning(f'Квота исчерпана, запросы приостановлены на {seconds:.0f} сек.')
+
+
+def _pause_quota(seconds: float) -> None:
+    """
+    Функция откладывает все запросы на короткую паузу, указанную сервером.
+
+    В отличие от _block_quota, запросы не отклоняются, а ждут окончания
+    паузы в _wait_quota_pause.
+
+    Args:
+        seconds (float): Длительность паузы.
+    """
+    global _quota_paused_until
+    _quota_paused_until = max(_quota_paused_until, time.monotonic() + seconds)
+    logger.warning(f'Превышен поминутный лимит, запросы отложены на {seconds:.1f} сек.')
+
+
+def _quota_error(ex: Exception) -> None:
+    """
+    Функция откладывает или запрещает запросы после ResourceExhausted без повтора.
+
+    Короткая пауза, указанная сервером, откладывает запросы (_pause_quota);
+    в остальных случаях они запрещаются (_block_quota).
+
+    Args:
+        ex (Exception): Ошибка ResourceExhausted.
+    """
+    delay: Optional[float] = _retry_after(ex)
+    if delay is not None and delay <= QUOTA_COOLDOWN_SECONDS:
+        _pause_quota(delay)
+    else:
+        _block_quota(delay or QUOTA_COOLDOWN_SECONDS)
+
+
+async def _wait_quota_pause() -> None:
+    """
+    Функция ожидает окончания короткой паузы после ResourceExhausted (см. _pause_quota).
+
+    Проверка повторяется после сна: таймер цикла asyncio может сработать
+    немного раньше срока.
+    """
+    while (remaining := _quota_paused_until - time.monotonic()) > 0:
+        await asyncio.sleep(remaining)
+
+
+_RETRY_IN_RE = re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE)
+
+
+def _retry_after(ex: Exception) -> Optional[float]:
+    """
+    Функция извлекает рекомендованную сервером паузу перед повтором.
+
+    Gemini передает ее в деталях ошибки (google.rpc.RetryInfo.retry_delay),
+    а также в тексте сообщения ('Please retry in 12.3s').
+
+    Args:
+        ex (Exception): Ошибка запроса.
+
+    Returns:
+        Optional[float]: Пауза в секундах или None, если сервер ее не указал.
+    """
+    for detail in getattr(ex, 'details', None) or ():
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    match = _RETRY_IN_RE.search(str(ex))
+    return float(match.group(1)) if match else None
+
+
+def _retry_service(ex: Exception, attempt: int) -> Optional[float]:
+    """
+    Функция определяет паузу перед повтором при недоступности сервиса.
+
+    Args:
+        ex (Exception): Ошибка запроса.
+        attempt (int): Номер попытки, начиная с 0.
+
+    Returns:
+        Optional[float]: Пауза в секундах или None, если попытки исчерпаны.
+    """
+    if attempt >= SERVICE_UNAVAILABLE_MAX_ATTEMPTS:
+        logger.error(f'Сервис недоступен после {SERVICE_UNAVAILABLE_MAX_ATTEMPTS} попыток')
+        return None
+    return SERVICE_RETRY_SLEEP_SECONDS_BASE + _backoff(attempt)
+
+
+def _quota_exhausted(ex: Exception, attempt: int) -> Union[float, str]:
+    """
+    Функция обрабатывает исчерпание квоты.
+
+    Если сервер указал короткую паузу (поминутный лимит), запрос повторяется
+    после нее, а остальные запросы ждут ту же паузу (см. _pause_quota);
+    иначе запросы запрещаются и вызов завершается маркером исчерпанной квоты.
+
+    Args:
+        ex (Exception): Ошибка ResourceExhausted.
+        attempt (int): Номер попытки, начиная с 0.
+
+    Returns:
+        Union[float, str]: Пауза перед повтором или RESOURCE_EXHAUSTED.
+    """
+    delay: Optional[float] = _retry_after(ex)
+    if delay is not None and delay <= QUOTA_COOLDOWN_SECONDS and attempt < SERVICE_UNAVAILABLE_MAX_ATTEMPTS:
+        # Остальные вызовы ждут эту паузу, а не упираются в лимит
+        _pause_quota(delay)
+        return float(delay)
+    logger.critical(f'Исчерпан лимит. В ответе будет передан `{RESOURCE_EXHAUSTED}` строкой')
+    _block_quota(delay or QUOTA_COOLDOWN_SECONDS)
+    return RESOURCE_EXHAUSTED
+
+
+def _give_up(message: str) -> Callable[[Exception, int], None]:
+    """
+    Функция создает обработчик ошибки, после которой повтор бессмыслен.
+
+    Args:
+        message (str): Сообщение для журнала.
+
+    Returns:
+        Callable[[Exception, int], None]: Обработчик, всегда прекращающий попытки.
+    """
+    def handler(ex: Exception, attempt: int) -> None:
+        logger.error(f'{message}: {ex}')
+    return handler
+
+
+# Обработка ошибок запроса по типу исключения. Обработчик возвращает паузу (float)
+# для повтора, строку — окончательный ответ, None — отказ от запроса.
+# Ищется ближайший класс в MRO исключения, поэтому подклассы (DeadlineExceeded
+# для GatewayTimeout) обрабатываются как их базовый тип.
+_RETRY_HANDLERS: Dict[type, Callable[[Exception, int], Union[float, str, None]]] = {
+    GatewayTimeout: _retry_service,
+    ServiceUnavailable: _retry_service,
+    asyncio.TimeoutError: _retry_service,
+    ResourceExhausted: _quota_exhausted,
+    DefaultCredentialsError: _give_up('Ошибка аутентификации'),
+    RefreshError: _give_up('Ошибка аутентификации'),
+    # Повтор с теми же входными данными дал бы ту же ошибку
+    ValueError: _give_up('Некорректные входные данные'),
+    TypeError: _give_up('Некорректные входные данные'),
+    InvalidArgument: _give_up('Ошибка API'),
+    RpcError: _give_up('Ошибка API'),
+    RetryError: _give_up('Модель перегружена (RetryError). Попробуйте позже'),
+    Exception: _give_up('Неожиданная ошибка'),
+}
+
+
+def _response_text(response: Any) -> Optional[str]:
+    """
+    Функция однократно читает текст ответа модели.
+
+    Свойство response.text собирает текст из частей ответа при каждом
+    обращении и выбрасывает ValueError, если текстовых частей нет
+    (например, ответ заблокирован фильтрами).
+
+    Args:
+        response (Any): Ответ generate_content.
+
+    Returns:
+        Optional[str]: Текст ответа или None, если он пуст или отсутствует.
+    """
+    try:
+        return response.text or None
+    except (AttributeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _context_block(context: Union[str, tuple]) -> str:
+    """
+    Функция формирует блок контекста RAG для запроса.
+
+    Один и тот же набор документов обычно передается в каждом сообщении,
+    поэтому склеенная строка кэшируется, а не собирается заново.
+
+    Args:
+        context (Union[str, tuple]): Контекст строкой или кортежем фрагментов.
+
+    Returns:
+        str: Блок 'Контекст: ...' для первой части запроса.
+    """
+    context_str: str = context if isinstance(context, str) else '\n'.join(context)
+    logger.debug(lambda: f'Контекст RAG добавлен в запрос (длина: {len(context_str)} символов)')
+    return f'Контекст:\n{context_str}\n\n'
+
+
+def _context_arg(context: Union[str, List[str]]) -> Union[str, tuple]:
+    """Функция приводит контекст RAG к хешируемому виду для _context_block и _context_digest."""
+    return context if isinstance(context, str) else tuple(context)
+
+
+@functools.lru_cache(maxsize=8)
+def _context_digest(context: Union[str, tuple]) -> str:
+    """
+    Функция возвращает дайджест блока контекста RAG.
+
+    Дайджест подставляется в ключи кэшей вместо самого контекста, поэтому
+    большой контекст не сериализуется в JSON при каждом запросе.
+
+    Args:
+        context (Union[str, tuple]): Контекст строкой или кортежем фрагментов.
+
+    Returns:
+        str: BLAKE2b блока контекста в шестнадцатеричном виде.
+    """
+    return hashlib.blake2b(_context_block(context).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _upload_size(file: Path | IOBase) -> Optional[int]:
+    """
+    Функция определяет размер загружаемого файла, не читая его.
+
+    Args:
+        file (Path | IOBase): Путь к файлу или файловый объект (позиция не меняется).
+
+    Returns:
+        Optional[int]: Размер в байтах или None, если его не удалось определить.
+    """
+    try:
+        if isinstance(file, Path):
+            return file.stat().st_size
+        position: int = file.tell()
+        size: int = file.seek(0, 2) - position
+        file.seek(position)
+        return size
+    except (OSError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=32)
+def _text_part(text: str) -> glm.Part:
+    """
+    Функция возвращает текстовую часть запроса в виде protobuf.
+
+    При пакетной обработке изображений промпт повторяется, поэтому часть
+    создается один раз и не преобразуется SDK из строки при каждом вызове.
+
+    Args:
+        text (str): Текст части.
+
+    Returns:
+        glm.Part: Часть запроса (не изменяется вызывающим кодом).
+    """
+    return glm.Part(text=text)
+
+
+# Чаты с еще не записанными сообщениями. Один общий таймер дописывает журналы
+# всех таких чатов за одно обращение к пулу потоков
+_dirty_histories: set = set()
+_history_writer: Optional[asyncio.Task] = None
+
+
+async def _write_dirty_histories() -> None:
+    """
+    Функция периодически дописывает журналы всех чатов с новыми сообщениями.
+
+    Сообщения, поступившие в течение HISTORY_FLUSH_DELAY_SECONDS, в том числе
+    из разных чатов, записываются одним заданием в пуле потоков. Задача
+    завершается, когда записывать больше нечего.
+    """
+    while _dirty_histories:
+        await asyncio.sleep(HISTORY_FLUSH_DELAY_SECONDS)
+        histories: List[GoogleGenerativeAi] = list(_dirty_histories)
+        _dirty_histories.clear()
+
+        async with contextlib.AsyncExitStack() as stack:
+            # Блокировки исключают одновременную запись журнала из flush_history
+            for history in histories:
+                await stack.enter_async_context(history._flush_lock)
+            batch: List[tuple] = [
+                (history, history._take_pending_turns(), history.history_jsonl_file)
+                for history in histories
+            ]
+            batch = [entry for entry in batch if entry[1]]
+            if not batch:
+                continue
+            results: List[bool] = await asyncio.to_thread(
+                lambda: [jsonl_append(records, path) for _, records, path in batch]
+            )
+            for (history, records, _), ok in zip(batch, results):
+                history._settle_pending_turns(records, ok)
+
+
+def _chat_error(ex: Exception) -> str:
+    """
+    Функция формирует сообщение журнала об ошибке потокового чата.
+
+    ResourceExhausted дополнительно откладывает или запрещает запросы (см. _quota_error).
+
+    Args:
+        ex (Exception): Ошибка запроса.
+
+    Returns:
+        str: Текст сообщения.
+    """
+    if isinstance(ex, ResourceExhausted):
+        _quota_error(ex)
+        return 'Исчерпан ресурс (Resource exhausted). Возможно, превышена квота'
+    if isinstance(ex, InvalidArgument):
+        return f'Недопустимый аргумент (InvalidArgument): {ex}'
+    if isinstance(ex, RpcError):
+        return f'Ошибка RPC: {ex.code()} - {ex.details()}'
+    return f'Ошибка потокового ответа в чате: {ex}'
+
+
+# Общие экземпляры для вызовов без собственного диалога (см. GoogleGenerativeAi.get)
+_shared_instances: Dict[tuple, 'GoogleGenerativeAi'] = {}
+
+
+# Выполняющиеся запросы ask_async по ключу кэша (объединение одновременных дубликатов)
+_inflight_asks: Dict[bytes, asyncio.Future] = {}
+
+# Статистика кэшей всех экземпляров (см. GoogleGenerativeAi.stats)
+_cache_stats: CacheStats = CacheStats()
+
+
+def _record_ask(hit: bool) -> None:
+    """
+    Функция учитывает обращение ask_async к кэшу ответов и периодически выводит сводку.
+
+    Args:
+        hit (bool): Ответ найден по точному ключу.
+    """
+    _cache_stats.add(exact_hits=int(hit), exact_misses=int(not hit))
+    stats: dict = _cache_stats.snapshot()
+    if (stats['exact_hits'] + stats['exact_misses']) % CACHE_STATS_LOG_INTERVAL == 0:
+        logger.info(
+            f"Кэш: попаданий {stats['hit_rate']:.0%} (точных {stats['exact_hits']}, "
+            f"почти совпадающих {stats['fuzzy_hits']}, семантических {stats['semantic_hits']}), "
+            f"эмбеддинги из кэша {stats['embedding_hits']}/{stats['embedding_hits'] + stats['embedding_misses']}, "
+            f"запрос эмбеддингов {stats['embedding_avg_ms']:.0f} мс"
+        )
+
+
+# Последние ответы модели на ask_async:
+# (пространство имен, нормализованный запрос, числа запроса, ответ)
+_recent_asks: deque = deque(maxlen=FUZZY_RECENT_ASKS)
+
+# Дата, время или UUID в запросе: такие запросы различаются только этими
+# значениями, и ответ на один не подходит к другому
+_VOLATILE_PROMPT_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}|\d{1,2}:\d{2}(:\d{2})?'
+    r'|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
+    re.IGNORECASE
+)
+
+
+# Числа в запросе (размеры, количества): запросы, различающиеся только ими,
+# похожи как строки, но требуют разных ответов
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)?')
+
+
+def _fuzzy_text(q: str) -> str:
+    """Функция приводит запрос к виду для нечеткого сравнения."""
+    return ' '.join(q.casefold().split()).rstrip('?!. ')
+
+
+def _remember_answer(namespace: bytes, q: str, response: str) -> None:
+    """
+    Функция запоминает ответ модели для поиска почти совпадающих запросов.
+
+    Args:
+        namespace (bytes): Пространство имен (модель, инструкция, контекст).
+        q (str): Текст запроса.
+        response (str): Ответ модели (не найденный в кэше).
+    """
+    _recent_asks.append((namespace, _fuzzy_text(q), _NUMBER_RE.findall(q), response))
+
+
+def _recent_answer(namespace: bytes, q: str) -> Optional[str]:
+    """
+    Функция ищет ответ на почти совпадающий недавний запрос.
+
+    Сравнение по тексту (difflib) занимает микросекунды и выполняется до
+    вычисления эмбеддинга для семантического кэша. Запросы с разными
+    числами (например, '10 mm' и '12 mm') совпадающими не считаются.
+
+    Args:
+        namespace (bytes): Пространство имен (модель, инструкция, контекст).
+        q (str): Текст запроса.
+
+    Returns:
+        Optional[str]: Ответ или None, если похожего запроса не было.
+    """
+    text: str = _fuzzy_text(q)
+    numbers: List[str] = _NUMBER_RE.findall(q)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(text)
+    for stored_namespace, stored_text, stored_numbers, response in reversed(_recent_asks):
+        if stored_namespace != namespace or stored_numbers != numbers:
+            continue
+        matcher.set_seq1(stored_text)
+        # Быстрые верхние оценки отсекают заведомо разные строки
+        if (matcher.real_quick_ratio() >= FUZZY_MATCH_THRESHOLD
+                and matcher.quick_ratio() >= FUZZY_MATCH_THRESHOLD
+                and matcher.ratio() >= FUZZY_MATCH_THRESHOLD):
+            return response
+    return None
+
+# Общий кэш ответов ask/ask_async (открывается при первом обращении)
+_response_cache: Optional[ResponseCache] = None
+_response_cache_failed: bool = False
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_failed: bool = False
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_failed: bool = False
+
+
+def _get_response_cache() -> Optional[ResponseCache]:
+    """
+    Функция возвращает общий кэш ответов, открывая его при первом вызове.
+
+    Returns:
+        Optional[ResponseCache]: Кэш или None, если файл кэша открыть не удалось.
+    """
+    global _response_cache, _response_cache_failed
+    with _configure_lock:
+        if _response_cache is None and not _response_cache_failed:
+            try:
+                _response_cache = ResponseCache(AI_DATA_DIR / 'cache' / 'responses.sqlite3')
+            except Exception as ex:
+                _response_cache_failed = True
+                logger.error(f'Не удалось открыть кэш ответов: {ex}')
+    return _response_cache
+
+
+def _get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Функция возвращает общий семантический кэш, открывая его при первом вызове.
+
+    Returns:
+        Optional[SemanticCache]: Кэш или None, если файл кэша открыть не удалось.
+    """
+    global _semantic_cache, _semantic_cache_failed
+    with _configure_lock:
+        if _semantic_cache is None and not _semantic_cache_failed:
+            try:
+                _semantic_cache = SemanticCache(AI_DATA_DIR / 'cache' / 'responses.sqlite3')
+            except Exception as ex:
+                _semantic_cache_failed = True
+                logger.error(f'Не удалось открыть семантический кэш: {ex}')
+    return _semantic_cache
+
+
+def _get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Функция возвращает общий кэш эмбеддингов, открывая его при первом вызове.
+
+    Returns:
+        Optional[EmbeddingCache]: Кэш или None, если файл кэша открыть не удалось.
+    """
+    global _embedding_cache, _embedding_cache_failed
+    with _configure_lock:
+        if _embedding_cache is None and not _embedding_cache_failed:
+            try:
+                _embedding_cache = EmbeddingCache(AI_DATA_DIR / 'cache' / 'responses.sqlite3')
+            except Exception as ex:
+                _embedding_cache_failed = True
+                logger.error(f'Не удалось открыть кэш эмбеддингов: {ex}')
+    return _embedding_cache
 
 
 class GoogleGenerativeAi:
@@ -96,9 +788,35 @@ class GoogleGenerativeAi:
         chat_history (List[Dict]): История текущего диалога в памяти.
         chat_session_name (str): Имя текущего чата для сохранения истории.
         history_dir (Path): Директория для сохранения истории чатов.
-        history_json_file (Path): Путь к JSON файлу с историей текущего чата.
+        history_json_file (Path): Путь к JSON файлу с экспортом истории текущего чата.
+        history_jsonl_file (Path): Журнал сообщений чата (JSONL, дописывается по одному сообщению).
     """
 
+    # Экземпляр создается на каждый чат-диалог и запрос Ask AI; без __dict__
+    # лишний атрибут (опечатка) сразу дает AttributeError
+    __slots__ = (
+        'api_key',
+        'model_name',
+        'generation_config',
+        'system_instruction',
+        'model',
+        'timestamp',
+        '_chat',
+        'chat_history',
+        'chat_session_name',
+        'history_dir',
+        'history_json_file',
+        '_history_loaded',
+        '_pending_turns',
+        '_unflushed',
+        '_flush_lock',
+        '_exported_state',
+        'service_tier',
+        '_context_cache',
+        '_history_tokens',
+        'profile',
+    )
+
     api_key: str
     system_instruction: Optional[str]
     model_name: str
@@ -116,6 +834,8 @@ class GoogleGenerativeAi:
         model_name: str = 'gemini-1.5-flash',
         generation_config: Optional[Dict] = None,
         system_instruction: Optional[str] = None,
+        service_tier: ServiceTier = 'standard',
+        profile: bool = False,
     ):
         """
         Функция инициализирует экземпляр класса GoogleGenerativeAi.
@@ -127,6 +847,10 @@ class GoogleGenerativeAi:
             generation_config (Optional[Dict]): Конфигурация генерации.
                                                 По умолчанию {'response_mime_type': 'text/plain'}.
             system_instruction (Optional[str]): Системная инструкция для модели.
+            service_tier (str): Уровень обслуживания запросов ask/describe_image:
+                'standard' и 'priority' используют все слоты одновременных запросов,
+                'flex' (фоновые задачи) оставляет один слот интерактивному чату.
+            profile (bool): Выводить время обработки каждого изображения.
 
         Raises:
             ValueError: Если API-ключ не найден.
@@ -145,6 +869,8 @@ class GoogleGenerativeAi:
             'response_mime_type': 'text/plain'
         }
         self.system_instruction = system_instruction
+        self.service_tier = service_tier
+        self.profile = profile
 
         # Инициализация директории для истории чатов
         self.history_dir = AI_DATA_DIR / 'chats'
@@ -153,14 +879,25 @@ class GoogleGenerativeAi:
         self.chat_history = []
         self.chat_session_name = f'chat_{self.timestamp}'
         self.history_json_file = Path()
-
-        logger.debug(f'Инициализация GoogleGenerativeAi: model_name={self.model_name}, '
+        # Сколько последних записей журнала уже загружено в память / показано
+        self._history_loaded: int = 0
+        # Сообщения, еще не записанные в журнал (запись откладывается и объединяется)
+        self._pending_turns: List[Dict] = []
+        self._unflushed: int = 0
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        # (имя чата, число сообщений) на момент последнего экспорта в JSON
+        self._exported_state: Optional[tuple] = None
+        # (хэш контекста, срок действия, модель на кэшированном контексте или None,
+        #  объект CachedContent на сервере или None)
+        self._context_cache: Optional[tuple] = None
+        # (сеанс чата, размер его истории в токенах по usage_metadata последнего ответа)
+        self._history_tokens: Optional[Tuple[Any, int]] = None
+
+        logger.debug(lambda: f'Инициализация GoogleGenerativeAi: model_name={self.model_name}, '
                      f'generation_config={self.generation_config}')
 
         try:
-            genai.configure(api_key=self.api_key)
-            logger.debug('Gemini API сконфигурирован с ключом API')
-            print(self.model_name, self.generation_config, self.system_instruction)
+            _configure_api(self.api_key)
 
             # NOTE: Совместимость с google-generativeai >= 0.6.0
             # Параметр 'response_mime_type': 'text/plain' БОЛЬШЕ НЕ ПОДДЕРЖИВАЕТСЯ.
@@ -175,14 +912,10 @@ class GoogleGenerativeAi:
             # Подробнее: https://ai.google.dev/gemini-api/docs/response-format
 
             self.generation_config = generation_config if generation_config is not None else {}
-            self.model = genai.GenerativeModel(
-                model_name=self.model_name,
-                # generation_config=self.generation_config,
-                # system_instruction=self.system_instruction,
-            )
+            self.model = self._create_model()
             
-            # Инициализация чата с системной инструкцией
-            self._chat = self._start_chat(initial_system_instruction=self.system_instruction)
+            # Инициализация чата: системная инструкция уже задана в модели
+            self._chat = self._start_chat()
             
             logger.info(f'Модель {self.model_name} инициализирована')
             
@@ -193,36 +926,98 @@ class GoogleGenerativeAi:
             logger.error(f'Не удалось инициализировать модель Gemini: {ex}')
             raise
 
-    def _start_chat(
-        self,
-        initial_history: Optional[List[Dict]] = None,
-        initial_system_instruction: Optional[str] = None
-    ) -> genai.ChatSession:
+    @classmethod
+    def get(
+        cls,
+        api_key: Optional[str] = None,
+        model_name: str = 'gemini-1.5-flash',
+        system_instruction: Optional[str] = None,
+    ) -> GoogleGenerativeAi:
+        """
+        Функция возвращает общий экземпляр для ключа API, модели и системной инструкции.
+
+        Предназначена для одиночных запросов (ask, describe_image), которые
+        не ведут собственную историю чата: экземпляр создается один раз и
+        переиспользуется вместе с моделью и клиентом SDK. Для чата с
+        историей создается отдельный экземпляр конструктором.
+
+        Args:
+            api_key (Optional[str]): Ключ API (по умолчанию из get_api_key()).
+            model_name (str): Имя модели Gemini.
+            system_instruction (Optional[str]): Системная инструкция.
+
+        Returns:
+            GoogleGenerativeAi: Общий экземпляр.
+
+        Raises:
+            ValueError: Если API-ключ не найден.
+        """
+        api_key = api_key or get_api_key()
+        key: tuple = (api_key, model_name, system_instruction)
+        instance: Optional[GoogleGenerativeAi] = _shared_instances.get(key)
+        if instance is None:
+            instance = cls(api_key=api_key, model_name=model_name, system_instruction=system_instruction)
+            _shared_instances[key] = instance
+        return instance
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """
+        Функция возвращает статистику кэшей ответов и эмбеддингов (общую для всех экземпляров).
+
+        Returns:
+            Dict[str, Any]: Счетчики попаданий и промахов, hit_rate и
+                embedding_avg_ms (см. CacheStats.snapshot).
+        """
+        return _cache_stats.snapshot()
+
+    @staticmethod
+    def reset_stats() -> None:
+        """Функция обнуляет статистику кэшей."""
+        _cache_stats.reset()
+
+    def _create_model(self) -> genai.GenerativeModel:
+        """
+        Функция возвращает клиент модели с текущей системной инструкцией (общий для экземпляров).
+
+        Системная инструкция передается отдельным полем system_instruction
+        запроса, а не сообщением в истории чата.
+
+        Returns:
+            genai.GenerativeModel: Клиент модели.
+        """
+        # generation_config в модель не передается (см. комментарий в __init__)
+        return _shared_model(self.model_name, self.system_instruction or None)
+
+    def _start_chat(self, initial_history: Optional[List[Dict]] = None) -> genai.ChatSession:
         """
         Функция запускает новый сеанс чата с моделью.
 
         Args:
             initial_history (Optional[List[Dict]]): История для загрузки в чат.
-            initial_system_instruction (Optional[str]): Системная инструкция для сессии.
 
         Returns:
             genai.ChatSession: Объект сеанса чата.
         """
-        history_to_load: List[Dict] = initial_history if initial_history is not None else []
-        
-        # Добавление системной инструкции в начало истории
-        if initial_system_instruction:
-            if not history_to_load or (
-                history_to_load[0].get('role') == 'user' and 
-                initial_system_instruction not in history_to_load[0].get('parts', [])
-            ):
-                history_to_load.insert(0, {
-                    'role': 'user',
-                    'parts': [initial_system_instruction]
-                })
-                logger.debug(f'Системная инструкция добавлена в историю чата')
+        return self.model.start_chat(history=list(initial_history) if initial_history else [])
+
+    def set_model(self, model_name: str) -> None:
+        """
+        Функция переключает модель без пересоздания клиента.
+
+        Конфигурация API и история чата сохраняются; сеанс чата
+        перезапускается на новой модели с текущей историей. Вызывается в
+        фоновом цикле asyncio, как и остальные методы, изменяющие сеанс.
 
-        return self.model.start_chat(history=history_to_load)
+        Args:
+            model_name (str): Имя новой модели.
+        """
+        if model_name == self.model_name:
+            return
+        self.model_name = model_name
+        self.model = self._create_model()
+        self._chat = self._start_chat(initial_history=self.chat_history)
+        logger.info(f'Модель переключена на {model_name}')
 
     def start_new_chat_session(
         self,
@@ -239,19 +1034,123 @@ class GoogleGenerativeAi:
         Returns:
             None
         """
-        if new_system_instruction is not None:
+        if new_system_instruction is not None and new_system_instruction != self.system_instruction:
             self.system_instruction = new_system_instruction
+            self.model = self._create_model()
 
         self.chat_history = []
-        self._chat = self._start_chat(
-            initial_history=initial_history,
-            initial_system_instruction=self.system_instruction
-        )
+        self._chat = self._start_chat(initial_history=initial_history)
         logger.info('Новый сеанс чата успешно начат')
 
-    async def _save_chat_history(self) -> bool:
+    @property
+    def history_jsonl_file(self) -> Path:
         """
-        Функция асинхронно сохраняет текущую историю чата в JSON файл.
+        Функция возвращает путь к журналу сообщений текущего чата.
+
+        Returns:
+            Path: Путь к файлу '<chat_session_name>.jsonl'.
+        """
+        return self.history_dir / f'{self.chat_session_name}.jsonl'
+
+    @property
+    def loaded_turns(self) -> int:
+        """
+        Функция возвращает количество записей журнала, загруженных или добавленных в этом сеансе.
+
+        Returns:
+            int: Количество записей.
+        """
+        return self._history_loaded
+
+    def _append_history(self, *turns: Dict) -> None:
+        """
+        Функция добавляет сообщения в историю и планирует их запись в журнал чата.
+
+        В памяти хранятся только последние HISTORY_MEMORY_TURNS сообщений;
+        полная история остается на диске. Записи, поступившие в течение
+        HISTORY_FLUSH_DELAY_SECONDS, дописываются в журнал одной операцией.
+        Вызывается из корутины в фоновом цикле asyncio.
+
+        Args:
+            *turns (Dict): Сообщения {'role': ..., 'parts': [...]}.
+        """
+        self.chat_history.extend(turns)
+        del self.chat_history[:-HISTORY_MEMORY_TURNS]
+        self._history_loaded += len(turns)
+        self._pending_turns.extend(turns)
+        self._unflushed += len(turns)
+
+        global _history_writer
+        _dirty_histories.add(self)
+        if _history_writer is None or _history_writer.done():
+            _history_writer = asyncio.get_running_loop().create_task(_write_dirty_histories())
+
+    def _take_pending_turns(self) -> List[Dict]:
+        """
+        Функция забирает очередь незаписанных сообщений (вызывается под _flush_lock).
+
+        Returns:
+            List[Dict]: Сообщения для записи в журнал.
+        """
+        records, self._pending_turns = self._pending_turns, []
+        return records
+
+    def _settle_pending_turns(self, records: List[Dict], ok: bool) -> None:
+        """
+        Функция учитывает результат записи сообщений в журнал.
+
+        Args:
+            records (List[Dict]): Сообщения, которые записывались.
+            ok (bool): Успешна ли запись.
+        """
+        if ok:
+            self._unflushed -= len(records)
+            return
+        # Сообщения вернутся в очередь и будут записаны вместе со следующими
+        self._pending_turns[:0] = records
+        logger.error(f'Ошибка записи истории чата в файл {self.history_jsonl_file}')
+
+    async def flush_history(self) -> bool:
+        """
+        Функция дописывает в журнал чата все еще не записанные сообщения.
+
+        Returns:
+            bool: True если записывать нечего или запись успешна.
+        """
+        async with self._flush_lock:
+            if not self._pending_turns:
+                return True
+            records: List[Dict] = self._take_pending_turns()
+            ok: bool = await asyncio.to_thread(jsonl_append, records, self.history_jsonl_file)
+            self._settle_pending_turns(records, ok)
+            return ok
+
+    def load_older_turns(self, count: int) -> List[Dict]:
+        """
+        Функция читает из журнала сообщения, предшествующие уже загруженным.
+
+        Args:
+            count (int): Максимальное количество сообщений.
+
+        Returns:
+            List[Dict]: Сообщения в хронологическом порядке (пустой список, если их больше нет).
+        """
+        if not self.history_jsonl_file.exists():
+            return []
+        # Еще не записанные сообщения отсутствуют в журнале и не учитываются при пропуске
+        turns: List[Dict] = jsonl_tail(
+            self.history_jsonl_file, count, skip=self._history_loaded - self._unflushed
+        )
+        self._history_loaded += len(turns)
+        return turns
+
+    async def export_history(self) -> bool:
+        """
+        Функция асинхронно экспортирует полную историю чата в JSON файл.
+
+        Во время работы история только дописывается в журнал JSONL; единый
+        JSON-массив собирается из журнала лишь по этому явному запросу,
+        поэтому в экспорт попадают и сообщения, вытесненные из памяти.
 
         Returns:
             bool: True в случае успешного сохранения, False при ошибке.
@@ -259,25 +1158,45 @@ class GoogleGenerativeAi:
         json_file_name: str = f'{self.chat_session_name}-{self.timestamp}.json'
         self.history_json_file = self.history_dir / json_file_name
 
-        if not j_dumps(self.chat_history, self.history_json_file):
+        # С прошлого экспорта история не менялась — файл уже актуален
+        state: tuple = (self.chat_session_name, self._history_loaded)
+        if state == self._exported_state and self.history_json_file.exists():
+            logger.debug('История чата не изменилась, экспорт пропущен')
+            return True
+
+        await self.flush_history()
+        journal: Path = self.history_jsonl_file
+
+        def _export() -> bool:
+            turns: List[Dict] = jsonl_load(journal) if journal.exists() else list(self.chat_history)
+            return j_dumps(turns, self.history_json_file)
+
+        # Чтение журнала, сериализация и запись выполняются в пуле потоков
+        if not await asyncio.to_thread(_export):
             logger.error(f'Ошибка сохранения истории чата в файл {self.history_json_file}')
             return False
-        
+
+        self._exported_state = state
         logger.info(f'История чата сохранена в файл {self.history_json_file}')
         return True
 
     async def _load_chat_history(self, chat_data_folder: Optional[str | Path] = None) -> None:
         """
-        Функция асинхронно загружает историю чата из JSON файла.
+        Функция асинхронно загружает последние сообщения чата из журнала.
+
+        Читаются только последние HISTORY_MEMORY_TURNS строк журнала
+        (с конца файла), более ранние подгружаются через load_older_turns.
 
         Args:
-            chat_data_folder (Optional[str | Path]): Путь к папке с файлом 'history.json'.
+            chat_data_folder (Optional[str | Path]): Путь к папке с файлом 'history.json'
+                (загрузка экспорта в формате JSON).
 
         Returns:
             None
         """
         history_to_load: Optional[List[Dict]] = None
-        target_file: Path = self.history_json_file
+        target_file: Path = self.history_jsonl_file
+        self._history_loaded = 0
 
         try:
             if chat_data_folder:
@@ -286,18 +1205,23 @@ class GoogleGenerativeAi:
             if not target_file.exists():
                 logger.info(f'Файл истории {target_file} не найден. Новая история будет создана')
                 self.chat_history = []
-                self._chat = self._start_chat(initial_system_instruction=self.system_instruction)
+                self._chat = self._start_chat()
                 return
 
-            history_to_load = j_loads(target_file)
+            if chat_data_folder:
+                history_to_load = j_loads(target_file)
+            else:
+                history_to_load = await asyncio.to_thread(jsonl_tail, target_file, HISTORY_MEMORY_TURNS)
+                self._history_loaded = len(history_to_load)
             
             if not history_to_load:
                 logger.error(f'Файл истории {target_file} пуст или содержит некорректные данные')
                 self.chat_history = []
-                self._chat = self._start_chat(initial_system_instruction=self.system_instruction)
+                self._chat = self._start_chat()
                 return
 
-            # Удаление системной инструкции из загруженной истории
+            # Удаление системной инструкции из истории, сохраненной прежними версиями
+            # (тогда она передавалась первым сообщением чата)
             if (self.system_instruction and history_to_load and 
                 history_to_load[0].get('role') == 'user' and 
                 self.system_instruction in history_to_load[0].get('parts', [])):
@@ -305,35 +1229,70 @@ class GoogleGenerativeAi:
                 logger.debug('Системная инструкция удалена из загруженной истории')
 
             self.chat_history = history_to_load
-            self._chat = self._start_chat(
-                initial_history=self.chat_history,
-                initial_system_instruction=self.system_instruction
-            )
+            self._chat = self._start_chat(initial_history=self.chat_history)
 
             logger.info(f'История чата ({len(self.chat_history)} сообщений) загружена из {target_file}')
 
         except Exception as ex:
             logger.error(f'Ошибка загрузки истории чата из файла {target_file}: {ex}')
             self.chat_history = []
-            self._chat = self._start_chat(initial_system_instruction=self.system_instruction)
+            self._chat = self._start_chat()
 
-    def clear_history(self) -> None:
+    async def clear_history(self) -> None:
         """
-        Функция очищает историю чата в памяти и удаляет связанный JSON файл.
+        Функция очищает историю чата в памяти и удаляет связанные файлы истории.
+
+        Выполняется в фоновом цикле asyncio под _flush_lock: запись журнала,
+        уже начатая _write_dirty_histories или flush_history, завершается до
+        удаления файла, и очищенные сообщения не появляются в нем снова.
 
         Returns:
             None
         """
-        try:
-            self.chat_history = []
-            if self.history_json_file.exists():
-                self.history_json_file.unlink()
-                logger.info(f'Файл истории {self.history_json_file} удалён')
-            
-            self._chat = self._start_chat(initial_system_instruction=self.system_instruction)
-            logger.info('История чата очищена и сеанс перезапущен')
-        except Exception as ex:
-            logger.error(f'Ошибка при очистке истории чата: {ex}')
+        async with self._flush_lock:
+            try:
+                _dirty_histories.discard(self)
+                self.chat_history = []
+                self._history_loaded = 0
+                self._pending_turns = []
+                self._unflushed = 0
+                self._exported_state = None
+                for history_file in (self.history_jsonl_file, self.history_json_file):
+                    if history_file.is_file():
+                        await asyncio.to_thread(history_file.unlink)
+                        logger.info(f'Файл истории {history_file} удалён')
+
+                self._chat = self._start_chat()
+                logger.info('История чата очищена и сеанс перезапущен')
+            except Exception as ex:
+                logger.error(f'Ошибка при очистке истории чата: {ex}')
+
+    def _chat_parts(
+        self,
+        q: str,
+        context: Optional[Union[str, List[str]]] = None,
+        attachments: Optional[List[Any]] = None
+    ) -> List[Any]:
+        """
+        Функция формирует содержимое чат-запроса с учетом контекста RAG.
+
+        Args:
+            q (str): Вопрос пользователя.
+            context (Optional[Union[str, List[str]]]): Дополнительный контекст для RAG.
+            attachments (Optional[List[Any]]): Нетекстовые части (например,
+                {'mime_type': ..., 'data': bytes} для изображения).
+
+        Returns:
+            List[Any]: Части сообщения для отправки в чат.
+        """
+        parts_to_send: List[Any] = []
+        if context:
+            parts_to_send.append(_context_block(_context_arg(context)))
+
+        parts_to_send.append(q)
+        if attachments:
+            parts_to_send.extend(attachments)
+        return parts_to_send
 
     async def chat(
         self,
@@ -344,6 +1303,8 @@ class GoogleGenerativeAi:
         """
         Функция обрабатывает чат-запрос пользователя с поддержкой RAG.
 
+        Ответ принимается потоком (см. chat_stream) и возвращается целиком.
+
         Args:
             q (str): Вопрос пользователя.
             chat_session_name (str): Имя чата для сохранения/загрузки истории.
@@ -352,167 +1313,395 @@ class GoogleGenerativeAi:
         Returns:
             Optional[str]: Текстовый ответ модели или None в случае ошибки.
         """
-        self.chat_session_name = chat_session_name if chat_session_name else self.chat_session_name
-        response_text: Optional[str] = None
+        return await self.chat_stream(q, chat_session_name=chat_session_name, context=context)
 
-        # Формирование содержимого запроса с учетом контекста
-        parts_to_send: List[Any] = []
-        if context:
-            context_str: str = '\n'.join(context) if isinstance(context, list) else context
-            parts_to_send.append(f'Контекст:\n{context_str}\n\n')
-            logger.debug(f'Контекст RAG добавлен в запрос (длина: {len(context_str)} символов)')
+    async def chat_chunks(
+        self,
+        q: str,
+        chat_session_name: Optional[str] = '',
+        context: Optional[Union[str, List[str]]] = None,
+        attachments: Optional[List[Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Функция возвращает ответ чата асинхронным генератором фрагментов.
 
-        parts_to_send.append(q)
+        Обертка над chat_stream для вызывающего кода, которому удобнее
+        `async for`, чем обработчик on_chunk. История сохраняется так же.
 
+        Args:
+            q (str): Вопрос пользователя.
+            chat_session_name (str): Имя чата для сохранения/загрузки истории.
+            context (Optional[Union[str, List[str]]]): Дополнительный контекст для RAG.
+            attachments (Optional[List[Any]]): Нетекстовые части сообщения.
+
+        Yields:
+            str: Очередной фрагмент текста ответа.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        task: asyncio.Task = asyncio.ensure_future(self.chat_stream(
+            q,
+            chat_session_name=chat_session_name,
+            context=context,
+            attachments=attachments,
+            on_chunk=queue.put_nowait,
+        ))
+        # None в очереди — признак завершения потока
+        task.add_done_callback(lambda _task: queue.put_nowait(None))
         try:
-            try:
-                response = await self._chat.send_message_async(parts_to_send)
+            while (piece := await queue.get()) is not None:
+                yield piece
+        finally:
+            if not task.done():
+                task.cancel()
 
-            except ResourceExhausted:
-                logger.error('Исчерпан ресурс (Resource exhausted). Возможно, превышена квота')
-                logger.info(f'Пауза перед перезапуском чата: {QUOTA_EXHAUSTED_SLEEP_SECONDS} секунд')
-                await asyncio.sleep(QUOTA_EXHAUSTED_SLEEP_SECONDS)
-                self.start_new_chat_session(new_system_instruction=self.system_instruction)
-                return None
+    async def count_prompt_tokens(self, q: str) -> Optional[int]:
+        """
+        Функция оценивает размер запроса (история чата + новое сообщение) в токенах.
 
-            except InvalidArgument as ex:
-                logger.error(f'Недопустимый аргумент (InvalidArgument): {ex}')
-                if hasattr(ex, 'message') and 'maximum number of tokens allowed' in ex.message:
-                    logger.warning('Превышен лимит токенов. Перезапуск чата и повторная попытка')
-                    self.start_new_chat_session(new_system_instruction=self.system_instruction)
-                    return await self.chat(q, chat_session_name, context)
-                return None
+        Размер истории берется из usage_metadata последнего ответа того же
+        сеанса, и к нему добавляется оценка нового сообщения по длине;
+        count_tokens вызывается, только если сеанс с тех пор пересоздан.
 
-            except RpcError as ex:
-                logger.error(f'Ошибка RPC: {ex.code()} - {ex.details()}')
-                if ex.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
-                    timeout: int = 300
-                    logger.debug(f'Таймаут RPC. Пауза {timeout} секунд, затем перезапуск чата')
-                    await asyncio.sleep(timeout)
-                    self.start_new_chat_session(new_system_instruction=self.system_instruction)
-                    return await self.chat(q, chat_session_name, context)
-                return None
+        Args:
+            q (str): Текст нового сообщения.
 
-            except Exception as ex:
-                logger.error(f'Общая ошибка при отправке сообщения в чат: {ex}')
-                return None
+        Returns:
+            Optional[int]: Количество токенов или None, если оценка недоступна.
+        """
+        if self._history_tokens is not None and self._history_tokens[0] is self._chat:
+            return self._history_tokens[1] + int(len(q) / CHARS_PER_TOKEN) + 1
+        try:
+            contents: List[Any] = list(self._chat.history) + [{'role': 'user', 'parts': [q]}]
+            result = await self.model.count_tokens_async(contents)
+            return result.total_tokens
+        except Exception as ex:
+            logger.debug(lambda: f'Не удалось подсчитать токены: {ex}')
+            return None
 
-            # Обработка ответа
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                logger.info(f'Токены в ответе: {response.usage_metadata.candidates_token_count}')
-                logger.info(f'Токены в запросе: {response.usage_metadata.prompt_token_count}')
-                logger.info(f'Общее количество токенов: {response.usage_metadata.total_token_count}')
-
-            if hasattr(response, 'text') and response.text:
-                response_text = response.text
-                self.chat_history.append({'role': 'user', 'parts': parts_to_send})
-                self.chat_history.append({'role': 'model', 'parts': [response_text]})
-                await self._save_chat_history()
-                return response_text
-            else:
-                logger.error(f'Пустой ответ от модели. Ответ: {response}')
-                if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
-                    logger.warning(f'Обратная связь по промпту: {response.prompt_feedback}')
-                return None
+    @staticmethod
+    def _content_text(content: Any) -> str:
+        """
+        Функция возвращает текст сообщения истории ChatSession (без нетекстовых частей).
+
+        Args:
+            content (Any): Объект Content из истории сеанса.
 
+        Returns:
+            str: Объединенный текст частей сообщения.
+        """
+        return ''.join(part.text for part in content.parts)
+
+    async def _summarize_history(self, contents: List[Any]) -> Optional[str]:
+        """
+        Функция сжимает часть истории чата в краткое содержание одним запросом к модели.
+
+        Args:
+            contents (List[Any]): Сообщения истории ChatSession (пары user/model).
+
+        Returns:
+            Optional[str]: Краткое содержание или None, если его получить не удалось.
+        """
+        try:
+            await _request_bucket.acquire()
+            async with _request_slots:
+                response = await self.model.generate_content_async(
+                    contents + [{'role': 'user', 'parts': [HISTORY_SUMMARY_PROMPT]}]
+                )
+            return response.text or None
         except Exception as ex:
-            logger.error(f'Критическая ошибка в методе chat: {ex}')
+            logger.warning(f'Не удалось сжать историю чата: {ex}')
             return None
 
+    async def fit_history(self, q: str, max_tokens: int) -> int:
+        """
+        Функция сворачивает самые старые пары сообщений, пока запрос не уложится в лимит токенов.
+
+        Токены подсчитываются один раз; доля каждой пары оценивается
+        пропорционально длине ее текста. Исключенные сообщения заменяются
+        их кратким содержанием, чтобы модель не теряла контекст начала
+        диалога; если сжать их не удалось, они просто отбрасываются.
+
+        Args:
+            q (str): Текст нового сообщения.
+            max_tokens (int): Допустимый размер запроса в токенах.
+
+        Returns:
+            int: Количество удаленных сообщений.
+        """
+        total: Optional[int] = await self.count_prompt_tokens(q)
+        if total is None or total <= max_tokens:
+            return 0
+
+        history: List[Any] = list(self._chat.history)
+
+        total_chars: int = len(q) + sum(len(self._content_text(c)) for c in history)
+        tokens_per_char: float = total / max(1, total_chars)
+
+        dropped: int = 0
+        while total > max_tokens and len(history) - dropped >= 2:
+            for content in history[dropped:dropped + 2]:
+                total -= int(len(self._content_text(content)) * tokens_per_char)
+            dropped += 2
+
+        if dropped:
+            kept: List[Any] = history[dropped:]
+            # Прежнее краткое содержание входит в сворачиваемую часть и
+            # учитывается в новом, поэтому оно всегда одно
+            summary: Optional[str] = await self._summarize_history(history[:dropped])
+            if summary:
+                kept = [
+                    {'role': 'user', 'parts': [f'Краткое содержание предыдущей части диалога:\n{summary}']},
+                    {'role': 'model', 'parts': ['Понятно, продолжаю с учетом этого.']},
+                ] + kept
+            # Сохраненная история не меняется: сокращается только контекст, отправляемый модели
+            self._chat = self.model.start_chat(history=kept)
+            logger.info(
+                f'Из контекста запроса исключено {dropped} старых сообщений (лимит {max_tokens} токенов)'
+                + (', они заменены кратким содержанием' if summary else '')
+            )
+        return dropped
+
+    async def chat_stream(
+        self,
+        q: str,
+        chat_session_name: Optional[str] = '',
+        context: Optional[Union[str, List[str]]] = None,
+        attachments: Optional[List[Any]] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_retry: Optional[Callable[[int, int], None]] = None
+    ) -> Optional[str]:
+        """
+        Функция обрабатывает чат-запрос в потоковом режиме.
+
+        Изображения передаются в тот же сеанс чата через attachments, поэтому
+        модель видит их в контексте последующих сообщений. Фрагменты ответа
+        передаются в on_chunk по мере поступления. Если
+        is_cancelled() вернул True, чтение потока прекращается, а в историю
+        записывается уже полученная часть ответа. Запросы проходят через
+        общий токен-бакет; при превышении квоты или таймауте запрос
+        повторяется с экспоненциальной паузой.
+
+        Args:
+            q (str): Вопрос пользователя.
+            chat_session_name (str): Имя чата для сохранения/загрузки истории.
+            context (Optional[Union[str, List[str]]]): Дополнительный контекст для RAG.
+            attachments (Optional[List[Any]]): Нетекстовые части сообщения.
+            on_chunk (Optional[Callable[[str], None]]): Обработчик очередного фрагмента текста.
+            is_cancelled (Optional[Callable[[], bool]]): Проверка запроса на остановку.
+            on_retry (Optional[Callable[[int, int], None]]): Уведомление о повторе
+                (номер попытки, всего попыток).
+
+        Returns:
+            Optional[str]: Полный (или прерванный) текст ответа, None в случае ошибки.
+        """
+        self.chat_session_name = chat_session_name if chat_session_name else self.chat_session_name
+        await _wait_quota_pause()
+        if _quota_blocked():
+            logger.error('Квота исчерпана, запрос не отправлен. Повторите позже')
+            return None
+        parts_to_send: List[Any] = self._chat_parts(q, context, attachments)
+        chunks: List[str] = []
+        cancelled: bool = False
+
+        try:
+            # Слот запроса занят только на время отправки и чтения потока,
+            # но не на паузы между повторами
+            response = await self._send_chat_with_retry(parts_to_send, is_cancelled, on_retry)
+        except Exception as ex:
+            logger.error(_chat_error(ex))
+            return None
+
+        try:
+            async for chunk in response:
+                if is_cancelled and is_cancelled():
+                    cancelled = True
+                    break
+                try:
+                    piece: str = chunk.text
+                except ValueError:
+                    # Фрагмент без текстовых частей (например, служебный финальный)
+                    continue
+                if piece:
+                    chunks.append(piece)
+                    if on_chunk:
+                        on_chunk(piece)
+
+        except Exception as ex:
+            logger.error(_chat_error(ex))
+            return None
+        finally:
+            _request_slots.release()
+
+        response_text: str = ''.join(chunks)
+        if not response_text:
+            if not cancelled:
+                logger.error('Пустой ответ от модели')
+            return None
+
+        # В сохраняемую историю попадают только текстовые части
+        self._append_history(
+            {'role': 'user', 'parts': [p for p in parts_to_send if isinstance(p, str)]},
+            {'role': 'model', 'parts': [response_text]},
+        )
+
+        if cancelled:
+            # Незавершенный поток оставляет ChatSession в несогласованном состоянии —
+            # сеанс пересоздается из истории, уже содержащей прерванный ответ
+            logger.info('Потоковый ответ остановлен пользователем')
+            self._chat = self._start_chat(initial_history=self.chat_history)
+        elif (usage := getattr(response, 'usage_metadata', None)):
+            # Запрос и ответ теперь составляют историю сеанса
+            self._history_tokens = (self._chat, usage.total_token_count)
+            logger.info(
+                f'Токены: запрос {usage.prompt_token_count}, ответ {usage.candidates_token_count}, '
+                f'всего {usage.total_token_count}'
+            )
+
+        return response_text
+
+    async def _send_chat_with_retry(
+        self,
+        parts_to_send: List[Any],
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_retry: Optional[Callable[[int, int], None]] = None
+    ) -> Any:
+        """
+        Функция отправляет сообщение в сеанс чата, повторяя его при перегрузке или квоте.
+
+        Каждая попытка занимает слот _request_slots; на паузе между попытками
+        слот свободен. При успехе функция возвращает ответ с занятым слотом —
+        вызывающий код освобождает его после чтения потока.
+
+        Args:
+            parts_to_send (List[Any]): Части сообщения.
+            is_cancelled (Optional[Callable[[], bool]]): Проверка запроса на остановку.
+            on_retry (Optional[Callable[[int, int], None]]): Уведомление о повторе.
+
+        Returns:
+            Any: Потоковый ответ send_message_async (слот _request_slots занят).
+
+        Raises:
+            Exception: Последняя ошибка, если попытки исчерпаны или запрос остановлен.
+        """
+        for attempt in range(CHAT_RETRY_MAX_ATTEMPTS):
+            await _wait_quota_pause()
+            await _request_bucket.acquire()
+            await _request_slots.acquire()
+            try:
+                return await self._chat.send_message_async(parts_to_send, stream=True)
+            except BaseException as ex:
+                _request_slots.release()
+                if not isinstance(ex, (ResourceExhausted, GatewayTimeout, ServiceUnavailable, asyncio.TimeoutError)):
+                    raise
+                if attempt + 1 >= CHAT_RETRY_MAX_ATTEMPTS or (is_cancelled and is_cancelled()):
+                    raise
+                delay: float = min(CHAT_RETRY_MAX_SLEEP_SECONDS, 0.5 * 2 ** attempt + random.random())
+                # Пауза, указанная сервером для ResourceExhausted, важнее собственной оценки
+                server_delay: Optional[float] = _retry_after(ex) if isinstance(ex, ResourceExhausted) else None
+                if server_delay is not None:
+                    if server_delay > CHAT_RETRY_MAX_SLEEP_SECONDS:
+                        raise
+                    delay = max(delay, server_delay)
+                    _pause_quota(server_delay)
+                logger.warning(f'{type(ex).__name__}: повтор через {delay:.1f} сек. '
+                               f'(попытка {attempt + 2}/{CHAT_RETRY_MAX_ATTEMPTS})')
+                if on_retry:
+                    on_retry(attempt + 2, CHAT_RETRY_MAX_ATTEMPTS)
+                await asyncio.sleep(delay)
+
+    def _response_cache_key(self, q: str, context: Optional[Union[str, List[str]]]) -> bytes:
+        """
+        Функция вычисляет ключ кэша ответа для текстового запроса.
+
+        Ключ строится из исходных вопроса и контекста, поэтому при попадании
+        в кэш части запроса не собираются вовсе.
+
+        Args:
+            q (str): Текстовый запрос.
+            context (Optional[Union[str, List[str]]]): Контекст RAG.
+
+        Returns:
+            bytes: Ключ кэша.
+        """
+        return ResponseCache.make_key(
+            model=self.model_name,
+            system_instruction=self.system_instruction,
+            generation_config=self.generation_config,
+            context=_context_digest(_context_arg(context)) if context else None,
+            q=q,
+        )
+
     def ask(
         self,
         q: str,
         attempts: int = 15,
         save_dialogue: bool = False,
         clean_response: bool = True,
-        context: Optional[Union[str, List[str]]] = None
+        context: Optional[Union[str, List[str]]] = None,
+        no_cache: bool = False
     ) -> Optional[str]:
         """
         Функция синхронно отправляет текстовый запрос модели с поддержкой RAG.
 
+        Запрос выполняется через ask_async в общем фоновом цикле asyncio.
+
         Args:
             q (str): Текстовый запрос к модели.
             attempts (int): Количество попыток отправки запроса. По умолчанию 15.
             save_dialogue (bool): Флаг сохранения диалога в файл.
             clean_response (bool): Флаг очистки ответа от разметки. По умолчанию True.
             context (Optional[Union[str, List[str]]]): Дополнительный контекст для RAG.
+            no_cache (bool): Не читать и не пополнять кэши (для конфиденциальных запросов).
 
         Returns:
             Optional[str]: Текстовый ответ модели или None в случае неудачи.
         """
-        start_time = time.time()  # ← ИСПРАВЛЕНО: определение start_time
-        response_text: Optional[str] = None
-
-        # Формирование содержимого запроса с учетом контекста
-        content_to_send: List[Any] = []
-        if context:
-            context_str: str = '\n'.join(context) if isinstance(context, list) else context
-            content_to_send.append(f'Контекст:\n{context_str}\n\n')
-            logger.debug(f'Контекст RAG добавлен в запрос (длина: {len(context_str)} символов)')
-
-        content_to_send.append(q)
-
-        for attempt in range(attempts):
-            try:
-                response = self.model.generate_content(content_to_send)
-
-                if hasattr(response, 'text') and response.text:
-                    response_text = response.text
-                    processing_time = time.time() - start_time
-                    logger.info(f'Запрос обработан за {processing_time:.2f} сек.')
-                    return normalize_answer(response_text) if clean_response else response_text
-                else:
-                    sleep_time: int = INITIAL_RETRY_SLEEP_SECONDS ** attempt
-                    logger.debug(
-                        f'От модели не получен ответ. Попытка: {attempt + 1}/{attempts}. '
-                        f'Пауза: {sleep_time} сек.'
-                    )
-                    time.sleep(sleep_time)
-                    continue
-
-            except (GatewayTimeout, ServiceUnavailable):
-                if attempt >= SERVICE_UNAVAILABLE_MAX_ATTEMPTS:
-                    logger.error(f'Сервис недоступен после {SERVICE_UNAVAILABLE_MAX_ATTEMPTS} попыток')
-                    break
-                sleep_time: int = INITIAL_RETRY_SLEEP_SECONDS ** attempt + SERVICE_RETRY_SLEEP_SECONDS_BASE
-                logger.error(
-                    f'Сервис недоступен. Попытка: {attempt + 1}/{attempts}. '
-                    f'Пауза: {sleep_time} сек.'
-                )
-                time.sleep(sleep_time)
-                continue
-
-            except ResourceExhausted:
-                logger.critical('Исчерпан лимит. В ответе будет передан `ResourceExhausted` строкой')
-                return 'ResourceExhausted'
+        return _run_blocking(self.ask_async(
+            q,
+            attempts=attempts,
+            save_dialogue=save_dialogue,
+            clean_response=clean_response,
+            context=context,
+            no_cache=no_cache,
+        ))
+
+    def ask_many(
+        self,
+        queries: List[str],
+        context: Optional[Union[str, List[str]]] = None,
+        clean_response: bool = True
+    ) -> List[Optional[str]]:
+        """
+        Функция синхронно отправляет несколько запросов (см. ask_many_async).
 
-            except (DefaultCredentialsError, RefreshError):
-                logger.error('Ошибка аутентификации')
-                return None
-            except (InvalidArgument, RpcError):
-                logger.error('Ошибка API')
-                return None
-            except RetryError:
-                logger.error('Модель перегружена (RetryError). Попробуйте позже')
-                return None
-            except Exception as ex:
-                logger.error(f'Ошибка при отправке запроса модели: {ex}')
-                return None
+        Args:
+            queries (List[str]): Текстовые запросы.
+            context (Optional[Union[str, List[str]]]): Общий контекст для RAG.
+            clean_response (bool): Флаг очистки ответов от разметки. По умолчанию True.
 
-        logger.error(f'Не удалось получить ответ от модели после {attempts} попыток')
-        return None
+        Returns:
+            List[Optional[str]]: Ответы в порядке queries (None при ошибке).
+        """
+        return _run_blocking(self.ask_many_async(queries, context=context, clean_response=clean_response))
 
     async def upload_file(
         self,
         file: str | Path | IOBase,
-        file_name: Optional[str] = None
+        file_name: Optional[str] = None,
+        mime_type: Optional[str] = None
     ) -> Optional[Any]:
         """
         Функция асинхронно загружает файл в Google AI File API.
 
+        Небольшой файл отправляется одним запросом; для файла от
+        RESUMABLE_UPLOAD_MIN_BYTES используется resumable-загрузка, которую
+        можно продолжить после обрыва соединения.
+
         Args:
             file (str | Path | IOBase): Путь к файлу или файловый объект.
             file_name (Optional[str]): Имя файла для отображения в API.
+            mime_type (Optional[str]): MIME-тип (для файлового объекта без расширения в имени).
 
         Returns:
             Optional[Any]: Объект File от API в случае успеха, иначе None.
@@ -541,17 +1730,22 @@ class GoogleGenerativeAi:
                 logger.error(f'Неподдерживаемый тип для file: {type(file)}')
                 return None
 
-            logger.debug(f'Начало загрузки файла: {resolved_file_name or resolved_file_path}')
-            
+            size: Optional[int] = _upload_size(resolved_file_path)
+            resumable: bool = size is None or size >= RESUMABLE_UPLOAD_MIN_BYTES
+            logger.debug(lambda: f'Начало загрузки файла: {resolved_file_name or resolved_file_path} '
+                                 f'({size} байт, resumable={resumable})')
+
             response = await genai.upload_file_async(
                 path=resolved_file_path,
-                mime_type=None,
-                name=resolved_file_name,
+                mime_type=mime_type,
+                # Идентификатор файла назначает API: имя с точкой или
+                # заглавными буквами не является допустимым идентификатором
+                name=None,
                 display_name=resolved_file_name,
-                resumable=True,
+                resumable=resumable,
             )
             
-            logger.debug(f'Файл "{response.display_name}" (URI: {response.uri}) успешно загружен')
+            logger.debug(lambda: f'Файл "{response.display_name}" (URI: {response.uri}) успешно загружен')
             return response
 
         except Exception as ex:
@@ -564,92 +1758,437 @@ class GoogleGenerativeAi:
         attempts: int = 15,
         save_dialogue: bool = False,
         clean_response: bool = True,
-        context: Optional[Union[str, List[str]]] = None
+        context: Optional[Union[str, List[str]]] = None,
+        no_cache: bool = False
     ) -> Optional[str]:
         """
         Функция асинхронно отправляет текстовый запрос модели с поддержкой RAG.
 
+        Ответ ищется сначала в кэше по точному совпадению запроса, затем
+        среди недавних почти совпадающих запросов (сравнение текста) и в
+        семантическом кэше: перефразированный вопрос с той же моделью,
+        инструкцией и контекстом получает сохраненный ответ без обращения
+        к модели. Запросы с датой, временем или UUID ищутся только по
+        точному совпадению.
+
         Args:
             q (str): Текстовый запрос к модели.
             attempts (int): Количество попыток отправки запроса. По умолчанию 15.
             save_dialogue (bool): Флаг сохранения диалога в файл.
             clean_response (bool): Флаг очистки ответа от разметки. По умолчанию True.
             context (Optional[Union[str, List[str]]]): Дополнительный контекст для RAG.
+            no_cache (bool): Не читать и не пополнять кэши (для конфиденциальных запросов).
 
         Returns:
             Optional[str]: Текстовый ответ модели или None в случае неудачи.
         """
-        response_text: Optional[str] = None
+        # Идентичный запрос к той же модели возвращается из кэша без обращения к API
+        cache: Optional[ResponseCache] = None if no_cache else await asyncio.to_thread(_get_response_cache)
+        cache_key: bytes = self._response_cache_key(q, context)
+        cached: Optional[str] = await asyncio.to_thread(cache.get, cache_key) if cache else None
+        if cache:
+            _record_ask(cached is not None)
+        if cached is not None:
+            logger.info('Ответ взят из кэша')
+            return normalize_answer(cached) if clean_response else cached
+
+        # Одновременные идентичные запросы ждут один общий ответ
+        pending: Optional[asyncio.Future] = _inflight_asks.get(cache_key)
+        if pending is not None:
+            logger.debug('Идентичный запрос уже выполняется, ожидается его ответ')
+            response_text: Optional[str] = await asyncio.shield(pending)
+        else:
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            _inflight_asks[cache_key] = future
+            response_text = None
+            try:
+                # Числа запроса входят в пространство имен: эмбеддинги запросов,
+                # различающихся только размерами, почти совпадают, но ответ
+                # для другой детали не подходит
+                namespace: bytes = ResponseCache.make_key(
+                    model=self.model_name,
+                    system_instruction=self.system_instruction,
+                    generation_config=self.generation_config,
+                    context=_context_digest(_context_arg(context)) if context else None,
+                    numbers=_NUMBER_RE.findall(q),
+                )
+                # Запросы с датой, временем или идентификатором ищутся только по точному совпадению
+                fuzzy: bool = not no_cache and _VOLATILE_PROMPT_RE.search(q) is None
+                if fuzzy:
+                    response_text = _recent_answer(namespace, q)
+                    if response_text is not None:
+                        _cache_stats.add(fuzzy_hits=1)
+                        logger.info('Ответ взят по почти совпадающему запросу')
+
+                semantic: Optional[SemanticCache] = (
+                    await asyncio.to_thread(_get_semantic_cache) if fuzzy and response_text is None else None
+                )
+                embedding: Optional[Sequence[float]] = await self._embed_query(q) if semantic else None
+                if embedding:
+                    response_text = await asyncio.to_thread(
+                        semantic.lookup, namespace, embedding, SEMANTIC_CACHE_THRESHOLD
+                    )
+                    _cache_stats.add(
+                        semantic_hits=int(response_text is not None),
+                        semantic_misses=int(response_text is None),
+                    )
+                    if response_text is not None:
+                        logger.info('Ответ взят из семантического кэша')
+
+                if response_text is None:
+                    # Части запроса собираются только при промахе кэша. Большой
+                    # контекст берется из кэша контекста Gemini и не отправляется
+                    cached_model: Optional[genai.GenerativeModel] = (
+                        await self._context_cached_model(context) if context else None
+                    )
+                    content_to_send: List[Any] = []
+                    if context and cached_model is None:
+                        content_to_send.append(_context_block(_context_arg(context)))
+                    content_to_send.append(q)
+
+                    start_time: float = time.time()
+                    response_text = await self._generate_with_retry(content_to_send, attempts, model=cached_model)
+                    logger.info(f'Запрос обработан за {time.time() - start_time:.2f} сек.')
+                    # Кэши пополняются только настоящими ответами модели: ответ,
+                    # найденный по похожему запросу, под новым ключом не сохраняется
+                    if response_text and response_text != RESOURCE_EXHAUSTED:
+                        if embedding:
+                            await asyncio.to_thread(semantic.put, namespace, embedding, response_text)
+                        if cache:
+                            await asyncio.to_thread(cache.put, cache_key, response_text)
+                        if fuzzy:
+                            _remember_answer(namespace, q, response_text)
+            finally:
+                del _inflight_asks[cache_key]
+                future.set_result(response_text)
+
+        if not response_text:
+            return None
+        if response_text == RESOURCE_EXHAUSTED:
+            return response_text
+        return normalize_answer(response_text) if clean_response else response_text
+
+    async def ask_many_async(
+        self,
+        queries: List[str],
+        context: Optional[Union[str, List[str]]] = None,
+        clean_response: bool = True
+    ) -> List[Optional[str]]:
+        """
+        Функция асинхронно отправляет несколько независимых запросов.
 
-        # Формирование содержимого запроса с учетом контекста
-        content_to_send: List[Any] = []
-        if context:
-            context_str: str = '\n'.join(context) if isinstance(context, list) else context
-            content_to_send.append(f'Контекст:\n{context_str}\n\n')
-            logger.debug(f'Контекст RAG добавлен в запрос (длина: {len(context_str)} символов)')
+        Запросы выполняются параллельно: каждый ask_async ждет общий
+        токен-бакет и слот из MAX_CONCURRENT_REQUESTS, поэтому время
+        выполнения определяется лимитами, а не суммой задержек сети.
+
+        Args:
+            queries (List[str]): Текстовые запросы.
+            context (Optional[Union[str, List[str]]]): Общий контекст для RAG.
+            clean_response (bool): Флаг очистки ответов от разметки. По умолчанию True.
+
+        Returns:
+            List[Optional[str]]: Ответы в порядке queries (None при ошибке).
+        """
+        return list(await asyncio.gather(*(
+            self.ask_async(q, context=context, clean_response=clean_response)
+            for q in queries
+        )))
+
+    async def embed_texts(
+        self,
+        texts: List[str],
+        task_type: str = 'retrieval_document'
+    ) -> Optional[List[Sequence[float]]]:
+        """
+        Функция вычисляет эмбеддинги списка текстов.
+
+        Уже векторизованные тексты берутся из кэша эмбеддингов; остальные
+        (без повторов) отправляются пакетами по EMBEDDING_BATCH_SIZE — один
+        запрос к API на пакет, а не на каждый текст.
+
+        Args:
+            texts (List[str]): Тексты (например, фрагменты контекста RAG).
+            task_type (str): Назначение эмбеддингов ('retrieval_document', 'retrieval_query').
+
+        Returns:
+            Optional[List[Sequence[float]]]: Векторы в порядке texts или None при ошибке.
+        """
+        cache: Optional[EmbeddingCache] = await asyncio.to_thread(_get_embedding_cache)
+        vectors: Dict[str, Sequence[float]] = {}
+        if cache:
+            for text in set(texts):
+                cached: Optional[Sequence[float]] = await asyncio.to_thread(cache.get, EMBEDDING_MODEL, text)
+                if cached is not None:
+                    vectors[text] = cached
+
+        missing: List[str] = [text for text in dict.fromkeys(texts) if text not in vectors]
+        _cache_stats.add(embedding_hits=len(vectors), embedding_misses=len(missing))
+        for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch: List[str] = missing[start:start + EMBEDDING_BATCH_SIZE]
+            try:
+                start_ns: int = time.perf_counter_ns()
+                result = await genai.embed_content_async(
+                    model=EMBEDDING_MODEL, content=batch, task_type=task_type
+                )
+                _cache_stats.add(embedding_requests=1, embedding_latency_ns=time.perf_counter_ns() - start_ns)
+            except Exception as ex:
+                logger.debug(lambda: f'Не удалось получить эмбеддинги: {ex}')
+                return None
+            for text, embedding in zip(batch, result['embedding']):
+                vectors[text] = (
+                    await asyncio.to_thread(cache.put, EMBEDDING_MODEL, text, embedding) if cache else embedding
+                )
+
+        return [vectors[text] for text in texts]
+
+    async def _embed_query(self, q: str) -> Optional[Sequence[float]]:
+        """
+        Функция вычисляет эмбеддинг запроса для семантического кэша.
+
+        Args:
+            q (str): Текст запроса.
+
+        Returns:
+            Optional[Sequence[float]]: Вектор или None, если получить его не удалось
+                (семантический кэш в этом случае не используется).
+        """
+        embeddings: Optional[List[Sequence[float]]] = await self.embed_texts([q], task_type='retrieval_query')
+        return embeddings[0] if embeddings else None
+
+    async def _context_cached_model(
+        self,
+        context: Union[str, List[str]]
+    ) -> Optional[genai.GenerativeModel]:
+        """
+        Функция возвращает модель, ссылающуюся на кэш контекста Gemini (CachedContent).
+
+        Системная инструкция и большой контекст RAG токенизируются сервером
+        один раз; последующие запросы с тем же контекстом передают только
+        вопрос. Кэш создается для контекста не короче CONTEXT_CACHE_MIN_CHARS
+        (у API есть минимальный размер кэшируемого содержимого) и
+        пересоздается при смене контекста или по истечении срока действия;
+        прежний кэш при этом удаляется с сервера, чтобы не оплачивать его
+        хранение до конца TTL. Неудачное создание повторяется не раньше чем
+        через CONTEXT_CACHE_RETRY_SECONDS.
+
+        Args:
+            context (Union[str, List[str]]): Контекст RAG.
+
+        Returns:
+            Optional[genai.GenerativeModel]: Модель на кэшированном контексте или
+                None, если контекст мал или кэш создать не удалось.
+        """
+        block: str = _context_block(_context_arg(context))
+        if len(block) < CONTEXT_CACHE_MIN_CHARS:
+            return None
+
+        digest: str = _context_digest(_context_arg(context))
+        if self._context_cache and self._context_cache[0] == digest and time.monotonic() < self._context_cache[1]:
+            return self._context_cache[2]
+
+        from google.generativeai import caching
+
+        if self._context_cache and self._context_cache[3] is not None:
+            try:
+                await asyncio.to_thread(caching.CachedContent.delete, self._context_cache[3])
+            except Exception as ex:
+                logger.debug(lambda: f'Не удалось удалить прежний кэш контекста: {ex}')
+            self._context_cache = None
+
+        model: Optional[genai.GenerativeModel] = None
+        cached: Optional[Any] = None
+        try:
+            cached = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=f'models/{self.model_name}',
+                system_instruction=self.system_instruction or None,
+                contents=[block],
+                ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS),
+            )
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            logger.info(f'Контекст ({len(block)} символов) помещен в кэш контекста Gemini')
+        except Exception as ex:
+            # Неудача запоминается ненадолго, чтобы не повторять попытку на каждом запросе
+            logger.warning(f'Кэш контекста недоступен, контекст передается в запросе: {ex}')
+            self._context_cache = (digest, time.monotonic() + CONTEXT_CACHE_RETRY_SECONDS, None, None)
+            return None
 
-        content_to_send.append(q)
+        # Запас в минуту, чтобы не обратиться к уже удаленному на сервере кэшу
+        self._context_cache = (digest, time.monotonic() + CONTEXT_CACHE_TTL_SECONDS - 60, model, cached)
+        return model
 
+    async def _generate_with_retry(
+        self,
+        content_to_send: List[Any],
+        attempts: int,
+        model: Optional[genai.GenerativeModel] = None
+    ) -> Optional[str]:
+        """
+        Функция выполняет текстовый запрос к модели с повторами.
+
+        Реакция на ошибку выбирается по таблице _RETRY_HANDLERS.
+
+        Args:
+            content_to_send (List[Any]): Части запроса.
+            attempts (int): Количество попыток.
+            model (Optional[genai.GenerativeModel]): Модель для запроса (по умолчанию self.model).
+
+        Returns:
+            Optional[str]: Текст ответа без обработки, RESOURCE_EXHAUSTED или None в случае неудачи.
+        """
+        retry_scheduled: bool = False
         for attempt in range(attempts):
+            await _wait_quota_pause()
+            # Повтор, назначенный обработчиком ошибки, выполняется в любом случае
+            if not retry_scheduled and _quota_blocked():
+                return RESOURCE_EXHAUSTED
+            retry_scheduled = False
             try:
-                response = await self.model.generate_content_async(content_to_send)
+                await _request_bucket.acquire()
+                async with _tier_slots(self.service_tier), _request_slots:
+                    response = await (model or self.model).generate_content_async(content_to_send)
                 logger.info(f'Модель {self.model_name} обработала запрос')
 
-                if hasattr(response, 'text') and response.text:
-                    response_text = response.text
-                    return normalize_answer(response_text) if clean_response else response_text
-                else:
-                    sleep_time: int = INITIAL_RETRY_SLEEP_SECONDS ** attempt
-                    logger.debug(
-                        f'От модели не получен ответ. Попытка: {attempt + 1}/{attempts}. '
-                        f'Асинхронная пауза: {sleep_time} сек.'
-                    )
-                    await asyncio.sleep(sleep_time)
-                    continue
+                response_text: Optional[str] = _response_text(response)
+                if response_text:
+                    return response_text
+                sleep_time: float = _backoff(attempt)
+                logger.debug(lambda: (
+                    f'От модели не получен ответ. Попытка: {attempt + 1}/{attempts}. '
+                    f'Пауза: {sleep_time:.1f} сек.'
+                ))
 
-            except (GatewayTimeout, ServiceUnavailable):
-                if attempt >= SERVICE_UNAVAILABLE_MAX_ATTEMPTS:
-                    logger.error(f'Сервис недоступен после {SERVICE_UNAVAILABLE_MAX_ATTEMPTS} попыток')
-                    break
-                sleep_time: int = INITIAL_RETRY_SLEEP_SECONDS ** attempt + SERVICE_RETRY_SLEEP_SECONDS_BASE
+            except Exception as ex:
+                handler = next(
+                    _RETRY_HANDLERS[cls] for cls in type(ex).__mro__ if cls in _RETRY_HANDLERS
+                )
+                outcome: Union[float, str, None] = handler(ex, attempt)
+                if not isinstance(outcome, float):
+                    return outcome
+                sleep_time = outcome
+                retry_scheduled = True
                 logger.error(
-                    f'Сервис недоступен. Попытка: {attempt + 1}/{attempts}. '
-                    f'Асинхронная пауза: {sleep_time} сек.'
+                    f'{type(ex).__name__}: повтор. Попытка: {attempt + 1}/{attempts}. '
+                    f'Пауза: {sleep_time:.1f} сек.'
                 )
-                await asyncio.sleep(sleep_time)
-                continue
 
-            except ResourceExhausted:
-                logger.critical('Исчерпана квота')
-                timeout_quota: int = QUOTA_EXHAUSTED_SLEEP_SECONDS
-                logger.debug(
-                    f'Исчерпана квота. Попытка: {attempt + 1}/{attempts}. '
-                    f'Асинхронная пауза: {timeout_quota/3600} час(ов)'
-                )
-                await asyncio.sleep(timeout_quota)
-                continue
+            await asyncio.sleep(sleep_time)
 
-            except (DefaultCredentialsError, RefreshError):
-                logger.error('Ошибка аутентификации')
-                return None
+        logger.error(f'Не удалось получить ответ от модели после {attempts} попыток')
+        return None
 
-            except (ValueError, TypeError):
-                if attempt >= INVALID_INPUT_MAX_ATTEMPTS:
-                    logger.error(f'Ошибка входных данных после {INVALID_INPUT_MAX_ATTEMPTS} попыток')
-                    break
-                logger.error(f'Некорректные входные данные. Попытка: {attempt + 1}/{attempts}')
-                await asyncio.sleep(5)
-                continue
+    def _build_image_parts(
+        self,
+        image: Path | bytes,
+        prompt: Optional[str] = '',
+        mime_type: Optional[str] = 'image/jpeg'
+    ) -> Optional[List[Any]]:
+        """
+        Функция подготавливает части запроса: текст промпта и изображение.
 
-            except (InvalidArgument, RpcError):
-                logger.error('Ошибка API')
-                return None
+        Изображение передается встроенным блоком (Blob) в том же запросе,
+        что и промпт, — без отдельной загрузки через File API. Части сразу
+        создаются как protobuf glm.Part, и SDK не преобразует их из словарей.
 
-            except Exception as ex:
-                logger.error(f'Неожиданная ошибка: {ex}')
+        Args:
+            image (Path | bytes): Путь к файлу изображения или байты изображения.
+            prompt (Optional[str]): Текстовый промпт для модели вместе с изображением.
+            mime_type (Optional[str]): MIME-тип изображения.
+
+        Returns:
+            Optional[List[Any]]: Список частей запроса или None при ошибке.
+        """
+        # Подготавливаем контент: сначала текст (если есть), затем изображение
+        content_parts: List[Any] = []
+        if prompt:
+            content_parts.append(_text_part(prompt))
+
+        # Обработка изображения: Path читается в байты, bytes передаются как есть
+        # (строка с путем была бы отправлена модели как обычный текст)
+        if isinstance(image, Path):
+            if not image.exists():
+                logger.error(f'Файл изображения не найден: {image}')
+                return None
+            image_data: Optional[bytes] = get_image_bytes(str(image))
+            if image_data is None:
                 return None
+            content_parts.append(glm.Part(inline_data=glm.Blob(mime_type=mime_type, data=image_data)))
+        elif isinstance(image, bytes):
+            content_parts.append(glm.Part(inline_data=glm.Blob(mime_type=mime_type, data=image)))
+        else:
+            logger.error(f'Некорректный тип для image. Ожидается Path или bytes, получено: {type(image)}')
+            return None
 
-        logger.error(f'Не удалось получить ответ от модели после {attempts} попыток')
+        return content_parts
+
+    async def _image_parts_async(
+        self,
+        image: Path | bytes,
+        prompt: Optional[str] = '',
+        mime_type: Optional[str] = 'image/jpeg'
+    ) -> Optional[List[Any]]:
+        """
+        Функция подготавливает части запроса с изображением, не блокируя цикл asyncio.
+
+        Изображение до INLINE_DATA_MAX_BYTES передается встроенным блоком в
+        том же запросе; более крупное загружается через File API, и в запрос
+        попадает ссылка на файл.
+
+        Args:
+            image (Path | bytes): Путь к файлу изображения или байты изображения.
+            prompt (Optional[str]): Текстовый промпт для модели вместе с изображением.
+            mime_type (Optional[str]): MIME-тип изображения.
+
+        Returns:
+            Optional[List[Any]]: Список частей запроса или None при ошибке.
+        """
+        # Чтение файла выполняется в пуле потоков
+        content_parts: Optional[List[Any]] = await asyncio.to_thread(
+            self._build_image_parts, image, prompt, mime_type
+        )
+        if content_parts is None or len(content_parts[-1].inline_data.data) <= INLINE_DATA_MAX_BYTES:
+            return content_parts
+
+        logger.info('Изображение превышает предел встроенных данных, загрузка через File API')
+        uploaded: Optional[Any] = await self.upload_file(
+            BytesIO(content_parts[-1].inline_data.data),
+            file_name=image.name if isinstance(image, Path) else 'image',
+            mime_type=mime_type,
+        )
+        if uploaded is None:
+            return None
+        content_parts[-1] = uploaded
+        return content_parts
+
+    def _log_image_time(self, start_ns: int) -> None:
+        """
+        Функция выводит время обработки изображения, если включен profile.
+
+        Args:
+            start_ns (int): Значение time.perf_counter_ns() в начале обработки (0 без profile).
+        """
+        if self.profile:
+            logger.info(f'Изображение обработано за {(time.perf_counter_ns() - start_ns) / 1e6:.1f} мс')
+
+    def _image_response_text(self, response: Any, start_ns: int) -> Optional[str]:
+        """
+        Функция извлекает текст ответа модели на запрос с изображением.
+
+        Args:
+            response (Any): Ответ модели.
+            start_ns (int): Начало обработки запроса (см. _log_image_time).
+
+        Returns:
+            Optional[str]: Нормализованный текст ответа или None.
+        """
+        response_text: Optional[str] = _response_text(response)
+        if response_text:
+            self._log_image_time(start_ns)
+            return normalize_answer(response_text)
+
+        logger.error(f'Пустой ответ от модели при описании изображения. Ответ: {response}')
+        if (feedback := getattr(response, 'prompt_feedback', None)):
+            logger.warning(f'Обратная связь по промпту: {feedback}')
         return None
 
     def describe_image(
@@ -661,6 +2200,9 @@ class GoogleGenerativeAi:
         """
         Функция отправляет изображение в модель Gemini и возвращает его описание.
 
+        Синхронная обертка над describe_image_async: запрос выполняется в общем
+        фоновом цикле с теми же лимитами и обработкой крупных изображений.
+
         Args:
             image (Path | bytes): Путь к файлу изображения или байты изображения.
             mime_type (Optional[str]): MIME-тип изображения. По умолчанию 'image/jpeg'.
@@ -669,54 +2211,167 @@ class GoogleGenerativeAi:
         Returns:
             Optional[str]: Текстовое описание изображения или None при ошибке.
         """
-        start_time: float = time.time()
+        return _run_blocking(self.describe_image_async(image, mime_type=mime_type, prompt=prompt))
+
+    async def describe_image_async(
+        self,
+        image: Path | bytes,
+        mime_type: Optional[str] = 'image/jpeg',
+        prompt: Optional[str] = '',
+        service_tier: Optional[ServiceTier] = None
+    ) -> Optional[str]:
+        """
+        Функция асинхронно отправляет изображение в модель Gemini и возвращает его описание.
+
+        Args:
+            image (Path | bytes): Путь к файлу изображения или байты изображения.
+            mime_type (Optional[str]): MIME-тип изображения. По умолчанию 'image/jpeg'.
+            prompt (Optional[str]): Текстовый промпт для модели вместе с изображением.
+            service_tier (Optional[str]): Уровень обслуживания; по умолчанию — уровень экземпляра.
+
+        Returns:
+            Optional[str]: Текстовое описание изображения или None при ошибке.
+        """
+        start_ns: int = time.perf_counter_ns() if self.profile else 0
+
+        content_parts: Optional[List[Any]] = await self._image_parts_async(image, prompt, mime_type)
+        if content_parts is None:
+            return None
+        await _wait_quota_pause()
+        if _quota_blocked():
+            return RESOURCE_EXHAUSTED
 
         try:
-            # Подготавливаем контент: сначала текст (если есть), затем изображение
-            content_parts: List[Any] = []
-            if prompt:
-                content_parts.append(prompt)
-
-            # Обработка изображения: преобразуем Path в строку, bytes оставляем как есть
-            if isinstance(image, Path):
-                if not image.exists():
-                    logger.error(f'Файл изображения не найден: {image}')
-                    return None
-                # Передаём путь как строку — это требует google-generativeai
-                content_parts.append(str(image))
-            elif isinstance(image, bytes):
-                content_parts.append(image)
-            else:
-                logger.error(f'Некорректный тип для image. Ожидается Path или bytes, получено: {type(image)}')
-                return None
+            # Запрос идет через асинхронный gRPC-транспорт SDK с постоянным каналом
+            await _request_bucket.acquire()
+            async with _tier_slots(service_tier or self.service_tier), _request_slots:
+                response = await self.model.generate_content_async(content_parts)
+            return self._image_response_text(response, start_ns)
 
-            # Генерация ответа — библиотека сама загрузит файл по пути
-            try:
-                response = self.model.generate_content(content_parts)
-
-                if hasattr(response, 'text') and response.text:
-                    processing_time = time.time() - start_time
-                    logger.info(f'Изображение обработано за {processing_time:.2f} сек.')
-                    return normalize_answer(response.text)
-                else:
-                    logger.error(f'Пустой ответ от модели при описании изображения. Ответ: {response}')
-                    if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
-                        logger.warning(f'Обратная связь по промпту: {response.prompt_feedback}')
-                    return None
-
-            except (DefaultCredentialsError, RefreshError):
-                logger.error('Ошибка аутентификации')
-                return None
-            except ResourceExhausted:
-                logger.error('Лимит ресурсов исчерпан (ResourceExhausted)')
-                return 'ResourceExhausted'
-            except (InvalidArgument, RpcError) as ex:
-                logger.error(f'Ошибка API при обработке изображения: {ex}')
-                return None
-            except Exception as ex:
-                logger.error(f'Неожиданная ошибка при генерации описания изображения: {ex}')
-                return None
+        except (DefaultCredentialsError, RefreshError):
+            logger.error('Ошибка аутентификации')
+            return None
+        except ResourceExhausted as ex:
+            logger.error('Лимит ресурсов исчерпан (ResourceExhausted)')
+            _quota_error(ex)
+            return RESOURCE_EXHAUSTED
+        except (InvalidArgument, RpcError) as ex:
+            logger.error(f'Ошибка API при обработке изображения: {ex}')
+            return None
+        except Exception as ex:
+            logger.error(f'Неожиданная ошибка при генерации описания изображения: {ex}')
+            return None
+
+    async def describe_images_async(
+        self,
+        images: List[Path],
+        prompt: Optional[str] = ''
+    ) -> Dict[str, Optional[str]]:
+        """
+        Функция описывает набор изображений одним вызовом.
+
+        Запросы выполняются параллельно в пределах общего токен-бакета
+        и лимита одновременных запросов с уровнем 'flex', не занимая слот
+        интерактивного чата; MIME-тип определяется по расширению.
+
+        Args:
+            images (List[Path]): Пути к файлам изображений.
+            prompt (Optional[str]): Промпт, общий для всех изображений.
+
+        Returns:
+            Dict[str, Optional[str]]: Описание для каждого пути (None при ошибке).
+        """
+        results: List[Optional[str]] = await asyncio.gather(*(
+            self.describe_image_async(
+                image,
+                mime_type=IMAGE_MIME_TYPES.get(image.suffix.lower(), 'image/jpeg'),
+                prompt=prompt,
+                service_tier='flex',
+            )
+            for image in images
+        ))
+        return dict(zip(map(str, images), results))
+
+    def describe_images_batch(
+        self,
+        images: List[Path],
+        prompt: Optional[str] = ''
+    ) -> Dict[str, Optional[str]]:
+        """
+        Функция синхронно описывает набор изображений (см. describe_images_async).
+
+        Args:
+            images (List[Path]): Пути к файлам изображений.
+            prompt (Optional[str]): Промпт, общий для всех изображений.
+
+        Returns:
+            Dict[str, Optional[str]]: Описание для каждого пути (None при ошибке).
+        """
+        return _run_blocking(self.describe_images_async(images, prompt))
+
+    async def describe_image_stream(
+        self,
+        image: Path | bytes,
+        mime_type: Optional[str] = 'image/jpeg',
+        prompt: Optional[str] = '',
+        on_chunk: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """
+        Функция отправляет изображение в модель Gemini и получает описание потоком.
+
+        Фрагменты ответа передаются в on_chunk по мере генерации.
 
+        Args:
+            image (Path | bytes): Путь к файлу изображения или байты изображения.
+            mime_type (Optional[str]): MIME-тип изображения. По умолчанию 'image/jpeg'.
+            prompt (Optional[str]): Текстовый промпт для модели вместе с изображением.
+            on_chunk (Optional[Callable[[str], None]]): Обработчик очередного фрагмента текста.
+
+        Returns:
+            Optional[str]: Полное нормализованное описание или None при ошибке.
+        """
+        start_ns: int = time.perf_counter_ns() if self.profile else 0
+
+        content_parts: Optional[List[Any]] = await self._image_parts_async(image, prompt, mime_type)
+        if content_parts is None:
+            return None
+        await _wait_quota_pause()
+        if _quota_blocked():
+            return RESOURCE_EXHAUSTED
+
+        chunks: List[str] = []
+        try:
+            await _request_bucket.acquire()
+            async with _tier_slots(self.service_tier), _request_slots:
+                response = await self.model.generate_content_async(content_parts, stream=True)
+                async for chunk in response:
+                    try:
+                        piece: str = chunk.text
+                    except ValueError:
+                        # Фрагмент без текстовых частей
+                        continue
+                    if piece:
+                        chunks.append(piece)
+                        if on_chunk:
+                            on_chunk(piece)
+
+        except (DefaultCredentialsError, RefreshError):
+            logger.error('Ошибка аутентификации')
+            return None
+        except ResourceExhausted as ex:
+            logger.error('Лимит ресурсов исчерпан (ResourceExhausted)')
+            _quota_error(ex)
+            return RESOURCE_EXHAUSTED
+        except (InvalidArgument, RpcError) as ex:
+            logger.error(f'Ошибка API при обработке изображения: {ex}')
+            return None
         except Exception as ex:
-            logger.error(f'Произошла ошибка при обработке изображения: {ex}')
-            return None
\ No newline at end of file
+            logger.error(f'Неожиданная ошибка при генерации описания изображения: {ex}')
+            return None
+
+        if not chunks:
+            logger.error('Пустой ответ от модели при описании изображения')
+            return None
+
+        self._log_image_time(start_ns)
+        return normalize_answer(''.join(chunks))
@@ -6,6 +6,7 @@
 import json
 import FreeCAD
 from pathlib import Path
+from typing import Optional
 
 # Единый путь к данным — должен совпадать с AI_DATA_DIR из utils.py
 AI_DATA_DIR = Path(FreeCAD.getUserAppDataDir()) / "AIEngineer" / "data"
@@ -14,11 +15,15 @@ PROJECT_FILE = AI_DATA_DIR / "project.json"
 # Создаём директорию при импорте
 AI_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Общий экземпляр проекта для всех команд и диалогов
+_PROJECT: Optional["AIProject"] = None
+
 class AIProject:
     """Управляет связями: изображение ↔ текстовый промпт."""
 
     def __init__(self):
         self.data = self._load()
+        self._linked_snapshot: frozenset[str] | None = None
 
     def _load(self):
         """Загружает проект из JSON-файла или создаёт новый."""
@@ -41,12 +46,14 @@ class AIProject:
     def link_text_to_image(self, image_file: str, text_file: str) -> None:
         """Связывает изображение с текстовым файлом."""
         self.data["links"][image_file] = text_file
+        self._linked_snapshot = None
         self.save()
 
     def unlink_image(self, image_file: str) -> None:
         """Отвязывает изображение от текста."""
         if image_file in self.data["links"]:
             del self.data["links"][image_file]
+            self._linked_snapshot = None
             self.save()
 
     def unlink_text(self, text_file: str) -> None:
@@ -57,6 +64,7 @@ class AIProject:
         for img in images_to_unlink:
             del self.data["links"][img]
         if images_to_unlink:
+            self._linked_snapshot = None
             self.save()
 
     def get_linked_text(self, image_file: str) -> str | None:
@@ -69,4 +77,18 @@ class AIProject:
 
     def is_image_linked(self, image_file: str) -> bool:
         """Проверяет, связано ли изображение с каким-либо текстом."""
-        return image_file in self.data["links"]
\ No newline at end of file
+        return image_file in self.data["links"]
+
+    def linked_images_snapshot(self) -> frozenset[str]:
+        """Возвращает множество связанных изображений (пересчитывается только после изменения связей)."""
+        if self._linked_snapshot is None:
+            self._linked_snapshot = frozenset(self.data["links"])
+        return self._linked_snapshot
+
+
+def get_project() -> AIProject:
+    """Возвращает общий экземпляр AIProject (project.json читается один раз)."""
+    global _PROJECT
+    if _PROJECT is None:
+        _PROJECT = AIProject()
+    return _PROJECT
@@ -0,0 +1,53 @@
+## \file AIEngineer/rate_limit.py
+# -*- coding: utf-8 -*-
+"""
+Ограничение частоты запросов к Gemini на стороне клиента.
+=========================================================
+
+Токен-бакет сглаживает всплески запросов, чтобы они не упирались
+в поминутную квоту API и не превращались в ошибки ResourceExhausted.
+
+.. module:: AIEngineer.rate_limit
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Асинхронный токен-бакет.
+
+    Атрибуты:
+        rate (float): Скорость пополнения, токенов в секунду.
+        burst (int): Емкость бакета (допустимый всплеск запросов).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Функция инициализирует бакет, заполненный до емкости.
+
+        Args:
+            rate (float): Скорость пополнения, токенов в секунду.
+            burst (int): Емкость бакета.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens: float = float(burst)
+        self._updated: float = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Функция начисляет токены за время, прошедшее с последнего обновления."""
+        now: float = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Функция ожидает свободный токен и забирает его."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,406 @@
+## \file AIEngineer/response_cache.py
+# -*- coding: utf-8 -*-
+"""
+Постоянный кэш ответов Gemini на одиночные запросы.
+===================================================
+
+Ответ хранится под ключом BLAKE2b от всех параметров, влияющих на
+результат (модель, системная инструкция, конфигурация генерации,
+контекст и текст запроса). Повторный идентичный запрос возвращается
+из SQLite-файла без обращения к API, в том числе после перезапуска FreeCAD.
+
+SemanticCache дополнительно находит ответ на перефразированный вопрос
+по косинусной близости эмбеддингов запросов, а EmbeddingCache хранит
+сами эмбеддинги, чтобы одинаковый текст не отправлялся на векторизацию
+повторно. CacheStats подсчитывает попадания во все уровни кэша.
+
+.. module:: AIEngineer.response_cache
+"""
+
+import hashlib
+import json
+import math
+import operator
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from array import array
+from typing import Any, Optional, Sequence
+
+
+class ResponseCache:
+    """
+    Кэш «ключ → текст ответа» в SQLite с ограничением количества записей.
+
+    Атрибуты:
+        path (Path): Путь к файлу базы данных.
+        max_entries (int): Максимальное число хранимых ответов (старые удаляются).
+    """
+
+    def __init__(self, path: Path, max_entries: int = 1000):
+        """
+        Функция открывает (или создает) файл кэша.
+
+        Args:
+            path (Path): Путь к файлу базы данных.
+            max_entries (int): Максимальное число хранимых ответов.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Соединение используется из потока GUI и из пула потоков цикла asyncio
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key BLOB PRIMARY KEY, response TEXT NOT NULL, ts REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(**params: Any) -> bytes:
+        """
+        Функция вычисляет ключ кэша по параметрам запроса.
+
+        Args:
+            **params: Параметры, влияющие на ответ (сериализуемые в JSON).
+
+        Returns:
+            bytes: 16-байтовый дайджест BLAKE2b.
+        """
+        payload: str = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        Функция возвращает сохраненный ответ.
+
+        Args:
+            key (bytes): Ключ кэша.
+
+        Returns:
+            Optional[str]: Текст ответа или None, если его нет в кэше.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: bytes, response: str) -> None:
+        """
+        Функция сохраняет ответ и удаляет самые старые записи сверх max_entries.
+
+        Args:
+            key (bytes): Ключ кэша.
+            response (str): Текст ответа.
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, ts) VALUES (?, ?, ?)',
+                (key, response, time.time())
+            )
+            self._conn.execute(
+                'DELETE FROM responses WHERE key NOT IN '
+                '(SELECT key FROM responses ORDER BY ts DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+
+class SemanticCache:
+    """
+    Кэш ответов, найденных по смыслу запроса, в SQLite.
+
+    Эмбеддинги хранятся нормированными (float32), поэтому косинусная
+    близость сводится к скалярному произведению. Поиск — полный перебор
+    записей пространства имен: записей немного (max_entries), и отдельный
+    векторный индекс не нужен.
+
+    Атрибуты:
+        path (Path): Путь к файлу базы данных.
+        max_entries (int): Максимальное число хранимых ответов (старые удаляются).
+        ttl_seconds (float): Срок жизни записи в секундах.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 500, ttl_seconds: float = 7 * 24 * 3600):
+        """
+        Функция открывает (или создает) файл кэша.
+
+        Args:
+            path (Path): Путь к файлу базы данных.
+            max_entries (int): Максимальное число хранимых ответов.
+            ttl_seconds (float): Срок жизни записи в секундах.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS semantic_responses ('
+            'id INTEGER PRIMARY KEY, namespace BLOB NOT NULL, embedding BLOB NOT NULL, '
+            'response TEXT NOT NULL, ts REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS semantic_namespace ON semantic_responses (namespace, ts)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> array:
+        """
+        Функция нормирует вектор к единичной длине.
+
+        Args:
+            embedding (Sequence[float]): Эмбеддинг запроса.
+
+        Returns:
+            array: Нормированный вектор float32.
+        """
+        norm: float = math.sqrt(sum(x * x for x in embedding)) or 1.0
+        return array('f', (x / norm for x in embedding))
+
+    def lookup(self, namespace: bytes, embedding: Sequence[float], threshold: float) -> Optional[str]:
+        """
+        Функция возвращает ответ на ближайший по смыслу сохраненный запрос.
+
+        Args:
+            namespace (bytes): Пространство имен (модель, инструкция, контекст).
+            embedding (Sequence[float]): Эмбеддинг нового запроса.
+            threshold (float): Минимальная косинусная близость.
+
+        Returns:
+            Optional[str]: Текст ответа или None, если похожего запроса нет.
+        """
+        query: array = self._unit(embedding)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT embedding, response FROM semantic_responses WHERE namespace = ? AND ts >= ?',
+                (namespace, time.time() - self.ttl_seconds)
+            ).fetchall()
+
+        best_score: float = threshold
+        best: Optional[str] = None
+        stored: array = array('f')
+        for blob, response in rows:
+            del stored[:]
+            stored.frombytes(blob)
+            if len(stored) != len(query):
+                # Эмбеддинг другой модели
+                continue
+            score: float = sum(map(operator.mul, query, stored))
+            if score >= best_score:
+                best_score, best = score, response
+        return best
+
+    def put(self, namespace: bytes, embedding: Sequence[float], response: str) -> None:
+        """
+        Функция сохраняет ответ и удаляет самые старые записи сверх max_entries.
+
+        Args:
+            namespace (bytes): Пространство имен (модель, инструкция, контекст).
+            embedding (Sequence[float]): Эмбеддинг запроса.
+            response (str): Текст ответа.
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO semantic_responses (namespace, embedding, response, ts) VALUES (?, ?, ?, ?)',
+                (namespace, self._unit(embedding).tobytes(), response, time.time())
+            )
+            self._conn.execute(
+                'DELETE FROM semantic_responses WHERE id NOT IN '
+                '(SELECT id FROM semantic_responses ORDER BY ts DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+
+class EmbeddingCache:
+    """
+    Двухуровневый кэш эмбеддингов: LRU в памяти и таблица SQLite на диске.
+
+    Ключ — SHA-256 от имени модели эмбеддингов и текста.
+
+    Атрибуты:
+        path (Path): Путь к файлу базы данных.
+        memory_entries (int): Емкость кэша в памяти.
+    """
+
+    def __init__(self, path: Path, memory_entries: int = 4096):
+        """
+        Функция открывает (или создает) файл кэша.
+
+        Args:
+            path (Path): Путь к файлу базы данных.
+            memory_entries (int): Емкость кэша в памяти.
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, array] = OrderedDict()
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS emb_cache ('
+            'hash TEXT PRIMARY KEY, model TEXT NOT NULL, vec BLOB NOT NULL, ts REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """
+        Функция вычисляет ключ эмбеддинга.
+
+        Args:
+            model (str): Модель эмбеддингов.
+            text (str): Текст.
+
+        Returns:
+            str: SHA-256 в шестнадцатеричном виде.
+        """
+        return hashlib.sha256(f'{model}\0{text}'.encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, vec: array) -> None:
+        """Функция помещает вектор в кэш в памяти, вытесняя самый старый."""
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model: str, text: str) -> Optional[array]:
+        """
+        Функция возвращает сохраненный эмбеддинг.
+
+        Args:
+            model (str): Модель эмбеддингов.
+            text (str): Текст.
+
+        Returns:
+            Optional[array]: Вектор float32 или None, если его нет в кэше.
+        """
+        key: str = self.make_key(model, text)
+        with self._lock:
+            vec: Optional[array] = self._memory.get(key)
+            if vec is not None:
+                self._memory.move_to_end(key)
+                return vec
+            row = self._conn.execute('SELECT vec FROM emb_cache WHERE hash = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            vec = array('f')
+            vec.frombytes(row[0])
+            self._remember(key, vec)
+            return vec
+
+    def put(self, model: str, text: str, embedding: Sequence[float]) -> array:
+        """
+        Функция сохраняет эмбеддинг.
+
+        Args:
+            model (str): Модель эмбеддингов.
+            text (str): Текст.
+            embedding (Sequence[float]): Вектор.
+
+        Returns:
+            array: Сохраненный вектор float32.
+        """
+        key: str = self.make_key(model, text)
+        vec: array = array('f', embedding)
+        with self._lock:
+            self._remember(key, vec)
+            self._conn.execute(
+                'INSERT OR IGNORE INTO emb_cache (hash, model, vec, ts) VALUES (?, ?, ?, ?)',
+                (key, model, vec.tobytes(), time.time())
+            )
+            self._conn.commit()
+        return vec
+
+    def prune_older_than(self, ttl_seconds: float) -> int:
+        """
+        Функция удаляет с диска эмбеддинги старше ttl_seconds.
+
+        Args:
+            ttl_seconds (float): Максимальный возраст записи в секундах.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        with self._lock:
+            deleted: int = self._conn.execute(
+                'DELETE FROM emb_cache WHERE ts < ?', (time.time() - ttl_seconds,)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+
+class CacheStats:
+    """
+    Счетчики попаданий в кэши ответов и эмбеддингов.
+
+    Нужны для подбора порогов и сроков хранения: доля попаданий показывает,
+    какой уровень кэша действительно экономит запросы к API.
+
+    Атрибуты:
+        exact_hits, exact_misses (int): Кэш ответов по точному ключу.
+        fuzzy_hits (int): Ответы на почти совпадающие недавние запросы.
+        semantic_hits, semantic_misses (int): Семантический кэш.
+        embedding_hits, embedding_misses (int): Кэш эмбеддингов (по текстам).
+        embedding_requests (int): Запросы векторизации к API.
+        embedding_latency_ns (int): Суммарное время этих запросов.
+    """
+
+    __slots__ = (
+        'exact_hits',
+        'exact_misses',
+        'fuzzy_hits',
+        'semantic_hits',
+        'semantic_misses',
+        'embedding_hits',
+        'embedding_misses',
+        'embedding_requests',
+        'embedding_latency_ns',
+        '_lock',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Функция обнуляет счетчики."""
+        with self._lock:
+            for name in self.__slots__[:-1]:
+                setattr(self, name, 0)
+
+    def add(self, **counts: int) -> None:
+        """
+        Функция увеличивает счетчики.
+
+        Args:
+            **counts (int): Приращения по именам счетчиков.
+        """
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> dict:
+        """
+        Функция возвращает значения счетчиков и производные показатели.
+
+        Returns:
+            dict: Счетчики, доля попаданий (hit_rate) по всем запросам ask
+                и среднее время запроса эмбеддингов в мс.
+        """
+        with self._lock:
+            data: dict = {name: getattr(self, name) for name in self.__slots__[:-1]}
+        asks: int = data['exact_hits'] + data['exact_misses']
+        hits: int = data['exact_hits'] + data['fuzzy_hits'] + data['semantic_hits']
+        data['hit_rate'] = hits / asks if asks else 0.0
+        data['embedding_avg_ms'] = (
+            data['embedding_latency_ns'] / data['embedding_requests'] / 1e6 if data['embedding_requests'] else 0.0
+        )
+        return data
@@ -5,10 +5,16 @@
 
 import FreeCAD
 import os
+import re
 import json
 import datetime
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+# Ограждения markdown-блоков кода (```lang\n и закрывающие ```)
+_CODE_FENCE_RE = re.compile(r'```[a-zA-Z]*\n|```')
 
 # Единый путь к данным аддона — используется ВЕЗДЕ
 AI_DATA_DIR: Path = Path(FreeCAD.getUserAppDataDir()) / 'AIEngineer' / 'data'
@@ -38,6 +44,54 @@ def get_icon(icon_name: str) -> str:
     return icon_file
 
 
+# Кэш списков файлов AI_DATA_DIR: набор расширений → (mtime каталога, список имен)
+_data_files_cache: dict[frozenset, tuple[int, list[str]]] = {}
+
+IMAGE_EXTENSIONS: frozenset = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.svg', '.gif'})
+TEXT_EXTENSIONS: frozenset = frozenset({'.txt', '.md'})
+
+# MIME-типы изображений по расширению файла
+IMAGE_MIME_TYPES: dict[str, str] = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.bmp': 'image/bmp',
+    '.svg': 'image/svg+xml',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+
+
+def _list_data_files(exts: frozenset) -> list[str]:
+    """
+    Функция возвращает отсортированный список файлов AI_DATA_DIR с указанными расширениями.
+
+    Повторное сканирование выполняется только при изменении mtime каталога
+    (создание, удаление или переименование файла).
+
+    Args:
+        exts (frozenset): Допустимые расширения в нижнем регистре.
+
+    Returns:
+        list[str]: Отсортированный список имен файлов (копия кэша).
+    """
+    mtime: int = os.stat(AI_DATA_DIR).st_mtime_ns
+    cached = _data_files_cache.get(exts)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+
+    files: list[str] = []
+    with os.scandir(AI_DATA_DIR) as it:
+        for entry in it:
+            # rpartition дешевле splitext/Path.suffix; пустое имя до точки — скрытый файл
+            head, _, ext = entry.name.rpartition('.')
+            if head and f'.{ext.lower()}' in exts:
+                files.append(entry.name)
+    files.sort()
+    _data_files_cache[exts] = (mtime, files)
+    return list(files)
+
+
 def get_image_files() -> list[str]:
     """
     Функция возвращает список изображений в AI_DATA_DIR.
@@ -45,11 +99,7 @@ def get_image_files() -> list[str]:
     Returns:
         list[str]: Отсортированный список имен файлов изображений.
     """
-    exts: set = {'.png', '.jpg', '.jpeg', '.bmp', '.svg', '.gif'}
-    return sorted([
-        f for f in os.listdir(AI_DATA_DIR)
-        if Path(f).suffix.lower() in exts
-    ])
+    return _list_data_files(IMAGE_EXTENSIONS)
 
 
 def get_text_files() -> list[str]:
@@ -59,11 +109,7 @@ def get_text_files() -> list[str]:
     Returns:
         list[str]: Отсортированный список имен текстовых файлов.
     """
-    exts: set = {'.txt', '.md'}
-    return sorted([
-        f for f in os.listdir(AI_DATA_DIR)
-        if Path(f).suffix.lower() in exts
-    ])
+    return _list_data_files(TEXT_EXTENSIONS)
 
 
 def safe_remove(filepath: Path) -> bool:
@@ -226,9 +272,20 @@ def get_api_key() -> str:
     return api_key
 
 
+# Кэш прочитанных изображений: (путь, mtime_ns, размер) → байты.
+# Изменение файла меняет ключ, поэтому устаревшие данные не возвращаются
+IMAGE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+_image_cache: OrderedDict[Tuple[str, int, int], bytes] = OrderedDict()
+_image_cache_bytes: int = 0
+_image_cache_lock = threading.Lock()
+
+
 def get_image_bytes(image_path: str) -> Optional[bytes]:
     """
     Функция считывает изображение как байты.
+
+    Повторное чтение неизмененного файла возвращает байты из LRU-кэша
+    в памяти объемом до IMAGE_CACHE_MAX_BYTES.
     
     Args:
         image_path (str): Путь к файлу изображения.
@@ -236,13 +293,32 @@ def get_image_bytes(image_path: str) -> Optional[bytes]:
     Returns:
         Optional[bytes]: Байты изображения или None при ошибке.
     """
+    global _image_cache_bytes
     try:
+        st = os.stat(image_path)
+        key: Tuple[str, int, int] = (os.path.abspath(image_path), st.st_mtime_ns, st.st_size)
+        with _image_cache_lock:
+            data: Optional[bytes] = _image_cache.get(key)
+            if data is not None:
+                _image_cache.move_to_end(key)
+                return data
+
         with open(image_path, 'rb') as f:
-            return f.read()
+            data = f.read()
     except Exception as ex:
         FreeCAD.Console.PrintError(f'[AIEngineer] Failed to read image: {ex}\n')
         return None
 
+    if len(data) <= IMAGE_CACHE_MAX_BYTES:
+        with _image_cache_lock:
+            if key not in _image_cache:
+                _image_cache[key] = data
+                _image_cache_bytes += len(data)
+            while _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+                _, evicted = _image_cache.popitem(last=False)
+                _image_cache_bytes -= len(evicted)
+    return data
+
 
 def normalize_answer(answer: str) -> str:
     """
@@ -258,9 +334,7 @@ def normalize_answer(answer: str) -> str:
         return ''
     
     # Удаление markdown блоков кода
-    import re
-    answer = re.sub(r'```[a-zA-Z]*\n', '', answer)
-    answer = re.sub(r'```', '', answer)
+    answer = _CODE_FENCE_RE.sub('', answer)
     
     # Удаление лишних пробелов и переносов строк
     answer = answer.strip()
@@ -271,6 +345,9 @@ def normalize_answer(answer: str) -> str:
 def j_dumps(data: dict | list, filepath: Path) -> bool:
     """
     Функция сохраняет данные в JSON-файл.
+
+    Данные сериализуются целиком до записи и подменяют файл через
+    os.replace, поэтому при сбое прежнее содержимое остается целым.
     
     Args:
         data (dict | list): Данные для сохранения.
@@ -279,12 +356,17 @@ def j_dumps(data: dict | list, filepath: Path) -> bool:
     Returns:
         bool: True если сохранение успешно, False в случае ошибки.
     """
+    tmp: Path = filepath.with_name(filepath.name + '.tmp')
     try:
         filepath.parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Один вызов dumps вместо множества мелких записей json.dump в файл
+        payload: bytes = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, filepath)
         return True
     except Exception as ex:
+        tmp.unlink(missing_ok=True)
         FreeCAD.Console.PrintError(f'[AIEngineer] j_dumps error: {ex}\n')
         return False
 
@@ -311,6 +393,99 @@ def j_loads(filepath: Path) -> dict | list | None:
         return None
 
 
+def jsonl_append(records: list, filepath: Path) -> bool:
+    """
+    Функция дописывает записи в конец JSONL-файла (по одной JSON-строке на запись).
+    
+    Args:
+        records (list): Записи для добавления.
+        filepath (Path): Путь к файлу.
+    
+    Returns:
+        bool: True если запись успешна, False в случае ошибки.
+    """
+    try:
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+        return True
+    except Exception as ex:
+        FreeCAD.Console.PrintError(f'[AIEngineer] jsonl_append error: {ex}\n')
+        return False
+
+
+def jsonl_tail(filepath: Path, count: int, skip: int = 0) -> list:
+    """
+    Функция читает последние записи JSONL-файла, не загружая файл целиком.
+    
+    Файл читается с конца блоками по 64 КБ, пока не наберется нужное
+    количество строк.
+    
+    Args:
+        filepath (Path): Путь к файлу.
+        count (int): Количество записей.
+        skip (int): Сколько последних записей пропустить (для постраничной загрузки).
+    
+    Returns:
+        list: Записи в порядке следования в файле (пустой список при ошибке).
+    """
+    block_size: int = 1 << 16
+    need: int = count + skip
+    try:
+        with open(filepath, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            pos: int = f.tell()
+            buf: bytes = b''
+            while pos > 0 and buf.count(b'\n') <= need:
+                step: int = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+    except OSError as ex:
+        FreeCAD.Console.PrintError(f'[AIEngineer] jsonl_tail error: {ex}\n')
+        return []
+
+    lines: list[bytes] = buf.split(b'\n')
+    if pos > 0:
+        # Первая строка блока может быть обрезана
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip()]
+    end: int = max(0, len(lines) - skip)
+
+    records: list = []
+    for line in lines[max(0, end - count):end]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            FreeCAD.Console.PrintWarning(f'[AIEngineer] Skipping malformed line in {filepath.name}\n')
+    return records
+
+
+def jsonl_load(filepath: Path) -> list:
+    """
+    Функция читает все записи JSONL-файла.
+    
+    Args:
+        filepath (Path): Путь к файлу.
+    
+    Returns:
+        list: Записи в порядке следования в файле (пустой список при ошибке).
+    """
+    records: list = []
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    FreeCAD.Console.PrintWarning(f'[AIEngineer] Skipping malformed line in {filepath.name}\n')
+    except OSError as ex:
+        FreeCAD.Console.PrintError(f'[AIEngineer] jsonl_load error: {ex}\n')
+    return records
+
+
 def pprint(data: str, *args, **kwargs) -> None:
     """
     Функция выводит данные в консоль FreeCAD.